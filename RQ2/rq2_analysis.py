@@ -1,83 +1,28 @@
-import json
-from collections import Counter, OrderedDict
-from typing import Dict, List
-import matplotlib.pyplot as plt
+import argparse
+import sys
+from collections import Counter
+from typing import Dict, Union
 import numpy as np
+from pathlib import Path
 
-# Define label mappings
-BUG_TYPE_LABELS = OrderedDict([
-    ("A1", "tool integration issue"),
-    ("A2", "model integration issue"),
-    ("A3", "api compatibility and dependency issue"),
-    ("A4", "framework setup issue"),
-    ("A5", "data format problem"),
-    ("A6", "memory management issue"),
-    ("A7", "context window overflow"),
-    ("A8", "hallucination"),
-    ("A9", "other")
-])
-
-ROOT_CAUSE_LABELS = OrderedDict([
-    ("B1", "tool design and behavior mismatch"),
-    ("B2", "unsupported tool functionality"),
-    ("B3", "unhandled tool exception"),
-    ("B4", "model version incompatibility"),
-    ("B5", "unhandled model exception handling"),
-    ("B6", "api rate limit exceeded"),
-    ("B7", "wrong api implementation"),
-    ("B8", "improper api usage"),
-    ("B9", "misconfigured api keys or tokens"),
-    ("B10", "library dependency conflicts"),
-    ("B11", "dependency installation failure"),
-    ("B12", "incompatible execution environment"),
-    ("B13", "unhandled exceptions in asynchronous operations"),
-    ("B14", "network connectivity problems"),
-    ("B15", "unsupported data format"),
-    ("B16", "incorrect response parsing"),
-    ("B17", "other")
-])
-
-SYMPTOM_LABELS = OrderedDict([
-    ("C1", "crash"),
-    ("C2", "authentication failure"),
-    ("C3", "Wrong Output than expected"),
-    ("C4", "performance degradation")
-])
-
-def get_label(category: str, value: str) -> str:
-    if category == 'bug_type':
-        return next((k for k, v in BUG_TYPE_LABELS.items() if v.lower() == value.lower()), "Unknown")
-    elif category == 'root_cause':
-        return next((k for k, v in ROOT_CAUSE_LABELS.items() if v.lower() == value.lower()), "Unknown")
-    elif category == 'symptoms':
-        return next((k for k, v in SYMPTOM_LABELS.items() if v.lower() == value.lower()), "Unknown")
-    return value
-
-def analyze_json(file_path: str) -> Dict[str, Counter]:
-    categories = ['bug_type', 'root_cause', 'symptoms']
-    stats = {category: Counter() for category in categories}
-    combinations = Counter()
-
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-        for issue in data.values():
-            for category in categories:
-                label = get_label(category, issue[category])
-                stats[category][label] += 1
-
-            bug_type_label = get_label('bug_type', issue['bug_type'])
-            root_cause_label = get_label('root_cause', issue['root_cause'])
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from taxonomy import BUG_TYPE_LABELS, ROOT_CAUSE_LABELS, SYMPTOM_LABELS, report_unknown_labels
+from labeled_dataset import LabeledDataset, load_labeled_dataset
+from contingency import ContingencyTable, contingency
+from rq_registry import register_analysis
+from plotting import figure_path, pyplot, save_figure
 
-            combinations[f"{bug_type_label} + {root_cause_label}"] += 1
-
-    stats['combinations'] = combinations
+def analyze_dataset(dataset: LabeledDataset) -> Dict[str, Union[Counter, ContingencyTable]]:
+    categories = ['bug_type', 'root_cause', 'symptoms']
+    stats = {category: dataset.counter(category) for category in categories}
+    stats['bug_type_root_cause'] = contingency(dataset, ['bug_type', 'root_cause'])
     return stats
 
 def calculate_percentages(counter: Counter) -> Dict[str, float]:
     total = sum(counter.values())
     return {item: (count / total) * 100 for item, count in counter.items()}
 
-def print_and_save_rq2_analysis(framework_stats: Dict[str, Dict[str, Counter]]):
+def print_and_save_rq2_analysis(framework_stats: Dict[str, Dict[str, Union[Counter, ContingencyTable]]], output_dir: str = "."):
     output = []
 
     for framework, stats in framework_stats.items():
@@ -108,10 +53,8 @@ def print_and_save_rq2_analysis(framework_stats: Dict[str, Dict[str, Counter]]):
             output.append(f"   {label} ({symptom}): {percentage:.2f}%")
 
         # 4. Print the top 5 most frequent combinations of bug types and root causes
-        combination_percentages = calculate_percentages(stats['combinations'])
         output.append("\n4. Top 5 most frequent combinations of bug types and root causes:")
-        for combination, percentage in sorted(combination_percentages.items(), key=lambda x: x[1], reverse=True)[:5]:
-            bug_type, root_cause = combination.split(" + ")
+        for (bug_type, root_cause), _, percentage in stats['bug_type_root_cause'].top_k(5):
             bug_type_name = BUG_TYPE_LABELS.get(bug_type, "Unknown")
             root_cause_name = ROOT_CAUSE_LABELS.get(root_cause, "Unknown")
             output.append(f"   {bug_type_name} ({bug_type}) + {root_cause_name} ({root_cause}): {percentage:.2f}%")
@@ -122,10 +65,11 @@ def print_and_save_rq2_analysis(framework_stats: Dict[str, Dict[str, Counter]]):
     print("\n".join(output))
 
     # Save to file
-    with open("rq2_analysis_results.txt", "w") as f:
+    with open(Path(output_dir) / "rq2_analysis_results.txt", "w") as f:
         f.write("\n".join(output))
 
-def plot_bug_types_across_frameworks(framework_stats: Dict[str, Dict[str, Counter]], filename: str):
+def plot_bug_types_across_frameworks(framework_stats: Dict[str, Dict[str, Union[Counter, ContingencyTable]]], filename: str, mode: str = 'publication'):
+    plt = pyplot()
     frameworks = list(framework_stats.keys())
     bug_types = list(BUG_TYPE_LABELS.keys())
     
@@ -151,10 +95,24 @@ def plot_bug_types_across_frameworks(framework_stats: Dict[str, Dict[str, Counte
     
     plt.xticks(rotation=45, ha='right', fontsize=16)
     plt.tight_layout()
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
-    plt.close()
+    save_figure(filename, mode, bbox_inches='tight')
+
+def analyze_frameworks(dataset: LabeledDataset) -> Dict[str, Dict[str, Union[Counter, ContingencyTable]]]:
+    return {framework: analyze_dataset(dataset.select(framework)) for framework in dataset.frameworks}
+
+@register_analysis('rq2_results', outputs=('rq2_analysis_results.txt',))
+def rq2_results(dataset: LabeledDataset, output_dir: str):
+    print_and_save_rq2_analysis(analyze_frameworks(dataset), output_dir)
+
+@register_analysis('rq2_bar', kind='figure', outputs=('rq2_bug_types_across_frameworks.pdf',), params={'mode': 'publication'})
+def rq2_bar(dataset: LabeledDataset, output_dir: str, mode: str = 'publication'):
+    plot_bug_types_across_frameworks(analyze_frameworks(dataset), figure_path(output_dir, 'rq2_bug_types_across_frameworks', mode), mode)
 
 def main():
+    parser = argparse.ArgumentParser(description="RQ2: bug types, root causes and symptoms per framework.")
+    parser.add_argument("--text-only", action="store_true", help="Only write rq2_analysis_results.txt; never imports matplotlib")
+    args = parser.parse_args()
+
     file_paths = {
         'langchain': '../../result/final/labeled_issues_langchain.json',
         'OpenDevin': '../../result/final/labeled_issues_OpenDevin.json',
@@ -163,9 +121,16 @@ def main():
         'gpt-engineer': '../../result/final/labeled_issues_gpt-engineer.json',
     }
     
+    dataset = load_labeled_dataset(file_paths)
+    report_unknown_labels()
+
     framework_stats = {}
-    for framework, file_path in file_paths.items():
-        framework_stats[framework] = analyze_json(file_path)
+    for framework in file_paths:
+        framework_stats[framework] = analyze_dataset(dataset.select(framework))
+
+    if args.text_only:
+        print_and_save_rq2_analysis(framework_stats)
+        return
 
     # print_and_save_rq2_analysis(framework_stats)
     
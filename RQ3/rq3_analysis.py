@@ -1,62 +1,28 @@
-import json
-from collections import Counter, OrderedDict
-from typing import Dict, List
-import matplotlib.pyplot as plt
+import argparse
+import sys
+from collections import Counter
+from typing import Dict, Union
 import numpy as np
+from pathlib import Path
 
-# Define label mappings 
-BUG_TYPE_LABELS = OrderedDict([
-    ("A1", "tool integration issue"),
-    ("A2", "model integration issue"),
-    ("A3", "api compatibility and dependency issue"),
-    ("A4", "framework setup issue"),
-    ("A5", "data format problem"),
-    ("A6", "memory management issue"),
-    ("A7", "context window overflow"),
-    ("A8", "hallucination"),
-    ("A9", "other")
-])
-
-DEVELOPMENT_CYCLE_LABELS = OrderedDict([
-    ("D1", "Preprocessing Stage"),
-    ("D2", "Agent Development and Integration Stage"),
-    ("D3", "Postprocessing Stage"),
-    ("D4", "Unknown")
-])
-
-def get_label(category: str, value: str) -> str:
-    if category == 'bug_type':
-        return next((k for k, v in BUG_TYPE_LABELS.items() if v.lower() == value.lower()), "Unknown")
-    elif category == 'development_cycle':
-        return next((k for k, v in DEVELOPMENT_CYCLE_LABELS.items() if v.lower() == value.lower()), "Unknown")
-    return value
-
-def analyze_json(file_paths: List[str]) -> Dict[str, Counter]:
-    categories = ['bug_type', 'development_cycle']
-    stats = {category: Counter() for category in categories}
-    combinations = Counter()
-
-    for file_path in file_paths:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-            for issue in data.values():
-                for category in categories:
-                    label = get_label(category, issue[category])
-                    stats[category][label] += 1
-
-                bug_type_label = get_label('bug_type', issue['bug_type'])
-                development_cycle_label = get_label('development_cycle', issue['development_cycle'])
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from taxonomy import BUG_TYPE_LABELS, DEVELOPMENT_CYCLE_LABELS, report_unknown_labels
+from labeled_dataset import LabeledDataset, load_labeled_dataset
+from contingency import ContingencyTable, contingency
+from rq_registry import register_analysis
+from plotting import colormap, figure_path, pyplot, save_figure
 
-                combinations[f"{bug_type_label} + {development_cycle_label}"] += 1
-
-    stats['combinations'] = combinations
+def analyze_dataset(dataset: LabeledDataset) -> Dict[str, Union[Counter, ContingencyTable]]:
+    categories = ['bug_type', 'development_cycle']
+    stats = {category: dataset.counter(category) for category in categories}
+    stats['bug_type_development_cycle'] = contingency(dataset, ['bug_type', 'development_cycle'])
     return stats
 
 def calculate_percentages(counter: Counter) -> Dict[str, float]:
     total = sum(counter.values())
     return {item: (count / total) * 100 for item, count in counter.items()}
 
-def print_and_save_rq3_analysis(stats: Dict[str, Counter]):
+def print_and_save_rq3_analysis(stats: Dict[str, Union[Counter, ContingencyTable]], output_dir: str = "."):
     output = []
 
     # 1. Calculate and print the percentage of bugs in each development cycle stage
@@ -69,10 +35,8 @@ def print_and_save_rq3_analysis(stats: Dict[str, Counter]):
         output.append(f"   {label} ({stage}): {percentage:.2f}%")
 
     # 2. Calculate and print the top 5 most frequent combinations of bug types and development cycle stages
-    combination_percentages = calculate_percentages(stats['combinations'])
     output.append("\n2. Top 5 most frequent combinations of bug types and development cycle stages:")
-    for combination, percentage in sorted(combination_percentages.items(), key=lambda x: x[1], reverse=True)[:5]:
-        bug_type, development_cycle = combination.split(" + ")
+    for (bug_type, development_cycle), _, percentage in stats['bug_type_development_cycle'].top_k(5):
         bug_type_name = BUG_TYPE_LABELS.get(bug_type, "Unknown")
         development_cycle_name = DEVELOPMENT_CYCLE_LABELS.get(development_cycle, "Unknown")
         output.append(f"   {bug_type_name} ({bug_type}) + {development_cycle_name} ({development_cycle}): {percentage:.2f}%")
@@ -81,18 +45,16 @@ def print_and_save_rq3_analysis(stats: Dict[str, Counter]):
     print("\n".join(output))
 
     # Save to file
-    with open("rq3_analysis_results.txt", "w") as f:
+    with open(Path(output_dir) / "rq3_analysis_results.txt", "w") as f:
         f.write("\n".join(output))
 
-import matplotlib.pyplot as plt
-from matplotlib.cm import get_cmap
-
-def plot_bugs_across_development_phases(stats, output_file):
+def plot_bugs_across_development_phases(stats, output_file, mode='publication'):
+    plt = pyplot()
     development_cycle_data = stats['development_cycle']
     labels = [DEVELOPMENT_CYCLE_LABELS[stage] for stage in development_cycle_data.keys()]
     sizes = list(development_cycle_data.values())
     
-    colors = get_cmap('tab20b')(np.linspace(0, 1, len(labels)))
+    colors = colormap('tab20b')(np.linspace(0, 1, len(labels)))
     
     plt.figure(figsize=(12, 8))
     patches, texts, autotexts = plt.pie(sizes, colors=colors, autopct='%1.1f%%', startangle=90, pctdistance=0.85)
@@ -111,12 +73,23 @@ def plot_bugs_across_development_phases(stats, output_file):
     # Adjust layout to prevent the legend from being cut off
     plt.tight_layout()
     
-    plt.savefig(output_file, format='pdf', bbox_inches='tight')
-    plt.close()
+    save_figure(output_file, mode, bbox_inches='tight')
 
     print(f"Pie chart saved as {output_file}")
 
+@register_analysis('rq3_results', outputs=('rq3_analysis_results.txt',))
+def rq3_results(dataset: LabeledDataset, output_dir: str):
+    print_and_save_rq3_analysis(analyze_dataset(dataset), output_dir)
+
+@register_analysis('rq3_pie', kind='figure', outputs=('rq3_bugs_across_development_phases.pdf',), params={'mode': 'publication'})
+def rq3_pie(dataset: LabeledDataset, output_dir: str, mode: str = 'publication'):
+    plot_bugs_across_development_phases(analyze_dataset(dataset), figure_path(output_dir, 'rq3_bugs_across_development_phases', mode), mode)
+
 def main():
+    parser = argparse.ArgumentParser(description="RQ3: bugs across development cycle stages.")
+    parser.add_argument("--text-only", action="store_true", help="Only write rq3_analysis_results.txt; never imports matplotlib")
+    args = parser.parse_args()
+
     file_paths = [
         '../../result/final/labeled_issues_langchain.json',
         '../../result/final/labeled_issues_OpenDevin.json',
@@ -125,10 +98,13 @@ def main():
         '../../result/final/labeled_issues_gpt-engineer.json',
     ]
     
-    stats = analyze_json(file_paths)
+    dataset = load_labeled_dataset(file_paths)
+    report_unknown_labels()
+    stats = analyze_dataset(dataset)
     print_and_save_rq3_analysis(stats)
 
-    plot_bugs_across_development_phases(stats, 'rq3_bugs_across_development_phases.pdf')
+    if not args.text_only:
+        plot_bugs_across_development_phases(stats, 'rq3_bugs_across_development_phases.pdf')
 
     total_issues = sum(stats['bug_type'].values())
     print(f"\nTotal issues analyzed: {total_issues}")
@@ -1,45 +1,49 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-
-df = pd.read_csv('./rq4_raw.csv')
-df = df[df['owner/repo'] != 'Total']
-df['repo'] = df['owner/repo'].str.split('/').str[1]
-num_repos = len(df['repo'].unique())
-colors = cm.get_cmap('viridis', num_repos)
-fig, axes = plt.subplots(2, 2, figsize=(20, 15))
-fontsize = 25
-labelsize = 20
-
-for i, repo in enumerate(df['repo']):
-    axes[0, 0].bar(repo, df['average_changes'][i], color=colors(i))
-axes[0, 0].set_title('Average Changes per PR', fontsize=fontsize)
-axes[0, 0].set_ylabel('Average Changes', fontsize=fontsize)
-axes[0, 0].tick_params(axis='x', rotation=0, labelsize=labelsize)
-axes[0, 0].tick_params(axis='y', rotation=0, labelsize=labelsize)
-
-for i, repo in enumerate(df['repo']):
-    axes[0, 1].bar(repo, df['average_changed_files'][i], color=colors(i))
-axes[0, 1].set_title('Average Changed Files per PR', fontsize=fontsize)
-axes[0, 1].set_ylabel('Average Changed Files', fontsize=fontsize)
-axes[0, 1].tick_params(axis='x', rotation=0, labelsize=labelsize)
-axes[0, 1].tick_params(axis='y', rotation=0, labelsize=labelsize)
-
-for i, repo in enumerate(df['repo']):
-    axes[1, 0].bar(repo, df['average_time'][i] / 86400, color=colors(i))
-axes[1, 0].set_title('Average Resolution Time per PR', fontsize=fontsize)
-axes[1, 0].set_ylabel('Average Time (days)', fontsize=fontsize)
-axes[1, 0].tick_params(axis='x', rotation=0, labelsize=labelsize)
-axes[1, 0].tick_params(axis='y', rotation=0, labelsize=labelsize)
-
-for i, repo in enumerate(df['repo']):
-    axes[1, 1].bar(repo, df['average_commits'][i], color=colors(i))
-axes[1, 1].set_title('Average Commits per PR', fontsize=fontsize)
-axes[1, 1].set_ylabel('Average Commits', fontsize=fontsize)
-axes[1, 1].tick_params(axis='x', rotation=0, labelsize=labelsize)  
-axes[1, 1].tick_params(axis='y', rotation=0, labelsize=labelsize)  
-
-
-plt.tight_layout()
-plt.savefig('rq4_visualizations.pdf', format='pdf')
-plt.close()
\ No newline at end of file
+import sys
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from rq_registry import register_analysis
+from plotting import colormap, figure_path, pyplot, save_figure
+
+RQ4_RAW = Path(__file__).resolve().parent / 'rq4_raw.csv'
+
+# (column, title, y label, scale) for each panel of the 2x2 grid
+PANELS = [
+    ('average_changes', 'Average Changes per PR', 'Average Changes', 1),
+    ('average_changed_files', 'Average Changed Files per PR', 'Average Changed Files', 1),
+    ('average_time', 'Average Resolution Time per PR', 'Average Time (days)', 86400),
+    ('average_commits', 'Average Commits per PR', 'Average Commits', 1),
+]
+
+def plot_rq4_visualizations(csv_path, filename, mode='publication'):
+    import pandas as pd
+    plt = pyplot()
+    df = pd.read_csv(csv_path)
+    df = df[df['owner/repo'] != 'Total']
+    repos = df['owner/repo'].str.split('/').str[1].to_numpy()
+    colors = colormap('viridis', len(repos))(np.arange(len(repos)))
+    fig, axes = plt.subplots(2, 2, figsize=(20, 15))
+    fontsize = 25
+    labelsize = 20
+
+    for ax, (column, title, ylabel, scale) in zip(axes.flat, PANELS):
+        ax.bar(repos, df[column].to_numpy() / scale, color=colors)
+        ax.set_title(title, fontsize=fontsize)
+        ax.set_ylabel(ylabel, fontsize=fontsize)
+        ax.tick_params(axis='x', rotation=0, labelsize=labelsize)
+        ax.tick_params(axis='y', rotation=0, labelsize=labelsize)
+
+    plt.tight_layout()
+    save_figure(filename, mode)
+
+@register_analysis('rq4_figure', kind='figure', outputs=('rq4_visualizations.pdf',), needs_dataset=False,
+                   inputs=('rq4_raw.csv',), params={'mode': 'publication'})
+def rq4_figure(dataset, output_dir: str, mode: str = 'publication'):
+    plot_rq4_visualizations(RQ4_RAW, figure_path(output_dir, 'rq4_visualizations', mode), mode)
+
+def main():
+    plot_rq4_visualizations('./rq4_raw.csv', 'rq4_visualizations.pdf')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+def to_rest(issue: dict) -> dict:
+    """A mined issue back in the shape of the REST API's issue objects."""
+    return {
+        'number': issue['issue_number'],
+        'html_url': issue['issue_url'],
+        'title': issue['title'],
+        'body': issue['body'],
+        'labels': [{'name': label} for label in issue['labels']],
+        'comments': issue['num_comments'],
+        'state': 'closed' if issue.get('closed_at') else 'open',
+        'created_at': issue.get('created_at'),
+        'updated_at': issue.get('updated_at'),
+        'closed_at': issue.get('closed_at'),
+    }
+
+def _timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+class MockGitHub:
+    """Serves GET /repos/<owner>/<name>/issues from memory, paginated like GitHub.
+
+    The state (open by default), labels and since parameters select the
+    issues as on GitHub, before pagination. Responses carry Link and
+    X-RateLimit headers, so the miner takes the same concurrent-pages and
+    pacing paths as against api.github.com.
+    """
+
+    def __init__(self, issues_by_repo: dict):
+        self.issues = {repo: [to_rest(issue) for issue in issues] for repo, issues in issues_by_repo.items()}
+        self.selections = {}
+        self.pages = {}
+        self.requests = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def select(self, repo: str, state: str = 'open', labels: str = None, since: str = None) -> list:
+        """The issues of a repository that the query asks for, in the order they are served."""
+        key = (repo, state, labels, since)
+        if key not in self.selections:
+            wanted = {label.strip().lower() for label in labels.split(',')} if labels else set()
+            after = _timestamp(since) if since else None
+            self.selections[key] = [
+                issue for issue in self.issues[repo]
+                if state in ('all', issue['state'])
+                and wanted <= {label['name'].lower() for label in issue['labels']}
+                and (after is None or (issue['updated_at'] and _timestamp(issue['updated_at']) >= after))
+            ]
+        return self.selections[key]
+
+    def page(self, repo: str, page: int, per_page: int, state: str = 'open', labels: str = None,
+             since: str = None) -> bytes:
+        key = (repo, page, per_page, state, labels, since)
+        if key not in self.pages:
+            issues = self.select(repo, state, labels, since)
+            self.pages[key] = json.dumps(issues[(page - 1) * per_page:page * per_page]).encode()
+        return self.pages[key]
+
+    def encode_pages(self, per_page: int = 100, state: str = 'open'):
+        """Serialize every page of a query up front, so timings measure the client rather than this server."""
+        for repo in self.issues:
+            for page in range(1, -(-len(self.select(repo, state)) // per_page) + 1):
+                self.page(repo, page, per_page, state)
+
+    def start(self) -> 'MockGitHub':
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, as the miner's pooled session expects from api.github.com; without
+            # TCP_NODELAY the separate header and body writes stall on delayed ACKs.
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                mock.requests += 1
+                url = urlparse(self.path)
+                parts = url.path.strip('/').split('/')
+                repo = '/'.join(parts[1:3])
+                if len(parts) != 4 or parts[3] != 'issues' or repo not in mock.issues:
+                    self.send_error(404)
+                    return
+                query = {name: values[0] for name, values in parse_qs(url.query).items()}
+                page = int(query.pop('page', '1'))
+                per_page = int(query.get('per_page', '30'))
+                selection = (query.get('state', 'open'), query.get('labels'), query.get('since'))
+                last = max(1, -(-len(mock.select(repo, *selection)) // per_page))
+                body = mock.page(repo, page, per_page, *selection)
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('X-RateLimit-Remaining', '5000')
+                self.send_header('X-RateLimit-Reset', '9999999999')
+                if last > 1:
+                    base = f"http://{self.headers['Host']}{url.path}?{urlencode(query)}"
+                    links = [f'<{base}&page={last}>; rel="last"']
+                    if page < last:
+                        links.insert(0, f'<{base}&page={page + 1}>; rel="next"')
+                    self.send_header('Link', ', '.join(links))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
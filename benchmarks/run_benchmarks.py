@@ -0,0 +1,199 @@
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = REPO_ROOT / 'src'
+sys.path.insert(0, str(SRC_DIR))
+from synthetic_corpus import DEFAULT_CORPUS_DIR, SCALES, generate_corpus, parse_scale
+
+BENCHMARKS = ['mining', 'filtering', 'labels', 'aggregation', 'rendering']
+
+def peak_rss_mb() -> float:
+    # On Linux ru_maxrss survives fork and exec, so a child would report the parent's
+    # peak; VmHWM starts over with the new process image.
+    status = Path('/proc/self/status')
+    if status.is_file():
+        for line in status.read_text().splitlines():
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def mined_paths(corpus_dir: Path):
+    return sorted((corpus_dir / 'mined').glob('github_issues_*_False.json'))
+
+def labeled_paths(corpus_dir: Path):
+    return sorted((corpus_dir / 'labeled').glob('labeled_issues_*.json'))
+
+def bench_mining(corpus_dir: Path, api_url: str, repos):
+    from collect_github_issues import GitHubIssueMiner
+    miner = GitHubIssueMiner('benchmark')
+    miner.base_url = api_url
+    start = time.perf_counter()
+    mined = sum(len(miner.fetch_issues(repo, 'closed', None)) for repo in repos)
+    return time.perf_counter() - start, mined, 'issues'
+
+def bench_filtering(corpus_dir: Path, api_url: str, repos):
+    from preprocess_buggy_files import analyze_github_issues
+    start = time.perf_counter()
+    total = 0
+    for path in mined_paths(corpus_dir):
+        total += analyze_github_issues(path, filter_expression='study')['total_issues']
+    return time.perf_counter() - start, total, 'issues'
+
+def bench_labels(corpus_dir: Path, api_url: str, repos):
+    from labeled_dataset import parse_labeled_issues
+    start = time.perf_counter()
+    dataset = parse_labeled_issues(labeled_paths(corpus_dir))
+    return time.perf_counter() - start, len(dataset), 'issues'
+
+def bench_aggregation(corpus_dir: Path, api_url: str, repos):
+    from labeled_dataset import parse_labeled_issues
+    from run_analyses import load_module
+    dataset = parse_labeled_issues(labeled_paths(corpus_dir))
+    modules = [load_module(REPO_ROOT / f'RQ{i}' / f'rq{i}_analysis.py') for i in (1, 2, 3)]
+    start = time.perf_counter()
+    modules[0].analyze_dataset(dataset)
+    modules[1].analyze_frameworks(dataset)
+    modules[2].analyze_dataset(dataset)
+    return time.perf_counter() - start, len(dataset), 'issues'
+
+def bench_rendering(corpus_dir: Path, api_url: str, repos):
+    from labeled_dataset import parse_labeled_issues
+    from run_analyses import discover_analyses, run_analysis
+    dataset = parse_labeled_issues(labeled_paths(corpus_dir))
+    # Only the figures drawn from the labeled issues; the RQ4 figure does not depend on the scale.
+    figures = [analysis for analysis in discover_analyses().values()
+               if analysis.kind == 'figure' and analysis.needs_dataset]
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        for analysis in figures:
+            name, _, _, error = run_analysis(analysis, dataset, output_dir)
+            if error:
+                raise RuntimeError(f"{name} failed:\n{error}")
+        seconds = time.perf_counter() - start
+    return seconds, len(figures), 'figures'
+
+def run_child(name: str, corpus_dir: Path, api_url: str, repos):
+    seconds, items, unit = globals()[f'bench_{name}'](corpus_dir, api_url, repos)
+    print(json.dumps({'seconds': seconds, 'items': items, 'unit': unit, 'peak_rss_mb': peak_rss_mb()}))
+
+def run_benchmark(name: str, corpus_dir: Path, server=None) -> dict:
+    """Run one benchmark in a fresh interpreter, so its peak RSS is its own."""
+    command = [sys.executable, __file__, '--child', name, '--corpus-dir', str(corpus_dir)]
+    if server:
+        command += ['--api-url', server.base_url, '--repos', *server.issues]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"{name} benchmark failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def serve_corpus(corpus_dir: Path, limit: int):
+    """Start a mock GitHub API with up to `limit` issues of the corpus, split over the repositories."""
+    from mock_github import MockGitHub
+    from preprocess_buggy_files import iter_issues, repo_of
+    with open(corpus_dir / 'corpus.json', 'r') as f:
+        manifest = json.load(f)
+    scale = sum(manifest['repos'].values())
+    served = {repo: -(-count * min(limit, scale) // scale) for repo, count in manifest['repos'].items()}
+
+    issues_by_repo = {}
+    for path in mined_paths(corpus_dir):
+        issues = []
+        for issue in iter_issues(path):
+            if len(issues) == served.get(repo_of(issue), 0):
+                break
+            issues.append(issue)
+        if issues:
+            issues_by_repo[repo_of(issues[0])] = issues
+    server = MockGitHub(issues_by_repo)
+    # The miner asks for 100 closed issues per page.
+    server.encode_pages(100, 'closed')
+    return server.start()
+
+def git_commit() -> str:
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or 'unknown'
+
+def format_results(results, baseline=None):
+    previous = {(row['benchmark'], row['scale']): row for row in (baseline or {}).get('results', [])}
+    output = [f"{'benchmark':<12} {'scale':>8} {'wall (s)':>9} {'throughput':>18} {'peak RSS (MB)':>14}"
+              + ("   vs baseline" if baseline else "")]
+    for row in results:
+        line = (f"{row['benchmark']:<12} {row['scale']:>8} {row['seconds']:9.3f} "
+                f"{row['items'] / row['seconds'] if row['seconds'] else 0:>10.0f} {row['unit'] + '/s':<7} "
+                f"{row['peak_rss_mb']:14.1f}")
+        old = previous.get((row['benchmark'], row['scale']))
+        if old:
+            line += f"   {row['seconds'] / old['seconds']:.2f}x time, {row['peak_rss_mb'] / old['peak_rss_mb']:.2f}x RSS"
+        output.append(line)
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the mining, filtering, aggregation and rendering stages on synthetic issue corpora.")
+    parser.add_argument("--scales", type=str, nargs="+", default=['10k', '100k'], help=f"Corpus sizes, numbers or {', '.join(SCALES)} (default: 10k 100k)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpora (default: 0)")
+    parser.add_argument("--only", type=str, nargs="+", choices=BENCHMARKS, default=BENCHMARKS, help="Benchmarks to run (default: all)")
+    parser.add_argument("-n", "--repeats", type=int, default=3, help="Runs per benchmark, the median time is reported (default: 3)")
+    parser.add_argument("--mine-limit", type=int, default=20000, help="Issues served by the mock GitHub API per scale (default: 20000)")
+    parser.add_argument("--corpus-dir", type=str, default=str(DEFAULT_CORPUS_DIR), help=f"Where the corpora are generated and reused (default: {DEFAULT_CORPUS_DIR})")
+    parser.add_argument("--compare", type=str, default=None, help="Results JSON of an earlier run to compare against")
+    parser.add_argument("-o", "--output", type=str, default=None, help="Write the results as JSON")
+    parser.add_argument("--child", type=str, choices=BENCHMARKS, help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", type=str, default='', help=argparse.SUPPRESS)
+    parser.add_argument("--repos", type=str, nargs="*", default=[], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, Path(args.corpus_dir), args.api_url, args.repos)
+        return
+
+    results = []
+    for scale in map(parse_scale, args.scales):
+        corpus_dir = Path(args.corpus_dir) / f"{scale}-{args.seed}"
+        start = time.perf_counter()
+        generate_corpus(scale, corpus_dir, args.seed)
+        print(f"Corpus of {scale} issues ready in {time.perf_counter() - start:.2f}s ({corpus_dir})")
+        for name in args.only:
+            server = serve_corpus(corpus_dir, args.mine_limit) if name == 'mining' else None
+            try:
+                runs = [run_benchmark(name, corpus_dir, server) for _ in range(args.repeats)]
+            finally:
+                if server:
+                    server.stop()
+            row = dict(runs[0], seconds=statistics.median(run['seconds'] for run in runs),
+                       peak_rss_mb=max(run['peak_rss_mb'] for run in runs))
+            results.append(dict(row, benchmark=name, scale=scale, repeats=args.repeats))
+            print(f"   {name}: {row['seconds']:.3f}s")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    print()
+    print("\n".join(format_results(results, baseline)))
+
+    if args.output:
+        report = {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'seed': args.seed,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
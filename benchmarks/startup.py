@@ -0,0 +1,75 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = REPO_ROOT / 'src'
+
+# Run in a fresh interpreter so every measurement pays the real import cost.
+IMPORT_SNIPPET = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('rq', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+print(json.dumps({'seconds': time.perf_counter() - start,
+                  'matplotlib': 'matplotlib' in sys.modules,
+                  'pandas': 'pandas' in sys.modules}))
+"""
+
+PLOTTING_SNIPPET = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+from plotting import pyplot, seaborn
+pyplot(); seaborn()
+print(json.dumps({'seconds': time.perf_counter() - start}))
+"""
+
+def run_snippet(snippet: str, *args) -> dict:
+    result = subprocess.run([sys.executable, '-c', snippet, *map(str, args)],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def time_command(command, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long the RQ scripts take to start and to write the text results.")
+    parser.add_argument("--data-dir", type=str, help="Directory with the labeled_issues_*.json files; enables the end-to-end runs")
+    parser.add_argument("-n", "--repeats", type=int, default=5, help="Runs per measurement, the median is reported (default: 5)")
+    args = parser.parse_args()
+
+    print("Module import (median of fresh interpreters):")
+    for script in sorted(REPO_ROOT.glob('RQ*/rq*_analysis.py')):
+        runs = [run_snippet(IMPORT_SNIPPET, script) for _ in range(args.repeats)]
+        seconds = statistics.median(run['seconds'] for run in runs)
+        loaded = [name for name in ('matplotlib', 'pandas') if runs[-1][name]]
+        print(f"   {script.relative_to(REPO_ROOT)}: {seconds * 1000:8.1f} ms"
+              f"   plotting stack loaded: {', '.join(loaded) or 'no'}")
+
+    seconds = statistics.median(run_snippet(PLOTTING_SNIPPET, SRC_DIR)['seconds'] for _ in range(args.repeats))
+    print(f"   matplotlib.pyplot + seaborn, paid only when a figure is drawn: {seconds * 1000:8.1f} ms")
+
+    if args.data_dir:
+        print("\nrun_analyses.py end to end (--force, so nothing is skipped):")
+        with tempfile.TemporaryDirectory() as output_dir:
+            runner = [sys.executable, str(SRC_DIR / 'run_analyses.py'), '--data-dir', args.data_dir,
+                      '-o', output_dir, '--force', '-j', '1']
+            text_only = time_command(runner + ['--text-only'], args.repeats)
+            everything = time_command(runner, args.repeats)
+        print(f"   --text-only: {text_only:8.2f} s")
+        print(f"   all figures: {everything:8.2f} s")
+
+if __name__ == "__main__":
+    main()
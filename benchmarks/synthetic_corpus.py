@@ -0,0 +1,188 @@
+import argparse
+import json
+import string
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / 'src'))
+from taxonomy import CATEGORY_LABELS
+
+DEFAULT_CORPUS_DIR = REPO_ROOT / '.cache' / 'corpus'
+
+# Bump when the generated corpus changes for the same scale and seed.
+GENERATOR_VERSION = 2
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# Bug issues per repository in Tables Data/total_issues.csv, used as the share of each framework.
+REPO_WEIGHTS = {
+    'langchain-ai/langchain': 622,
+    'OpenDevin/OpenDevin': 232,
+    'Significant-Gravitas/AutoGPT': 81,
+    'microsoft/autogen': 58,
+    'gpt-engineer-org/gpt-engineer': 23,
+}
+
+# Label counts of the 1,016 labeled issues of the study; root causes are drawn given the bug type.
+BUG_TYPE_COUNTS = {'A1': 458, 'A2': 174, 'A3': 162, 'A4': 85, 'A5': 80, 'A6': 30, 'A7': 12, 'A8': 8, 'A9': 7}
+ROOT_CAUSE_COUNTS = {
+    'A1': {'B1': 191, 'B2': 168, 'B3': 54, 'B8': 3, 'B9': 3, 'B10': 1, 'B11': 1, 'B12': 4, 'B13': 1, 'B14': 31, 'B17': 1},
+    'A2': {'B1': 16, 'B2': 3, 'B3': 1, 'B4': 78, 'B5': 14, 'B6': 10, 'B7': 24, 'B8': 2, 'B9': 11, 'B10': 1, 'B12': 2, 'B14': 10, 'B17': 2},
+    'A3': {'B2': 1, 'B8': 4, 'B9': 17, 'B10': 109, 'B12': 30, 'B14': 1},
+    'A4': {'B1': 1, 'B8': 1, 'B10': 6, 'B11': 66, 'B12': 10, 'B17': 1},
+    'A5': {'B1': 1, 'B2': 1, 'B3': 1, 'B15': 34, 'B16': 43},
+    'A6': {'B1': 3, 'B3': 1, 'B8': 1, 'B12': 3, 'B13': 15, 'B14': 1, 'B15': 1, 'B16': 1, 'B17': 4},
+    'A7': {'B1': 2, 'B2': 3, 'B3': 3, 'B4': 1, 'B17': 3},
+    'A8': {'B1': 6, 'B4': 2},
+    'A9': {'B5': 1, 'B8': 4, 'B9': 1, 'B14': 1},
+}
+SYMPTOM_COUNTS = {'C1': 498, 'C2': 44, 'C3': 439, 'C4': 35}
+DEVELOPMENT_CYCLE_COUNTS = {'D1': 74, 'D2': 815, 'D3': 30, 'D4': 97}
+
+# GitHub label sets of the mined issues and their weights; most carry a bug label.
+GITHUB_LABEL_SETS = [
+    (['bug'], 50), (['bug', 'triage'], 8), (['type: bug', 'area: agent'], 4), (['enhancement'], 12),
+    (['question'], 8), (['documentation'], 5), (['bug', 'documentation'], 2), (['help wanted'], 3),
+    (['bug', 'enhancement'], 2), ([], 6),
+]
+DUPLICATE_RATE = 0.03
+DOMAIN_WORDS = (
+    "agent tool llm openai api key error exception traceback timeout rate limit retry model gpt chat "
+    "completion prompt token context window memory vector store embedding retriever chain callback "
+    "async await docker install pip import module version dependency conflict json parse output "
+    "response stream function call plugin browser file path permission config environment variable "
+    "azure anthropic ollama local server request http connection websocket crash hang loop infinite "
+    "wrong result empty none type attribute key value schema pydantic validation serialization"
+).split()
+VOCABULARY_SIZE = 5000
+
+def synthetic_vocabulary() -> np.ndarray:
+    return np.array(DOMAIN_WORDS + [f"term{i}" for i in range(VOCABULARY_SIZE - len(DOMAIN_WORDS))])
+
+def _choice(rng, counts: dict, size: int) -> np.ndarray:
+    keys = list(counts)
+    weights = np.array([counts[key] for key in keys], dtype=float)
+    return np.array(keys)[rng.choice(len(keys), size=size, p=weights / weights.sum())]
+
+def _timestamps(seconds: np.ndarray) -> list:
+    return [f"{value}Z" for value in seconds.astype('datetime64[s]').astype(str)]
+
+def generate_mined_issues(rng, repo: str, count: int, vocabulary: np.ndarray) -> list:
+    """Issues shaped like collect_github_issues.py output, with Zipf-distributed words."""
+    ranks = np.minimum(rng.zipf(1.3, size=(count, 48)) - 1, len(vocabulary) - 1)
+    words = vocabulary[ranks]
+    weights = np.array([weight for _, weight in GITHUB_LABEL_SETS], dtype=float)
+    label_sets = rng.choice(len(GITHUB_LABEL_SETS), size=count, p=weights / weights.sum())
+    comments = rng.geometric(0.35, size=count) - 1
+    start = np.datetime64('2023-01-01T00:00:00').astype(np.int64)
+    created = start + rng.integers(0, 730 * 86400, size=count)
+    closed = created + (rng.lognormal(np.log(5 * 86400), 1.5, size=count)).astype(np.int64)
+    is_closed = rng.random(count) < 0.8
+    updated = np.where(is_closed, closed, created + rng.integers(0, 30 * 86400, size=count))
+    created_at, closed_at, updated_at = _timestamps(created), _timestamps(closed), _timestamps(updated)
+
+    issues = []
+    for i in range(count):
+        number = count - i
+        if i and rng.random() < DUPLICATE_RATE:
+            # A re-filed copy of an earlier issue with a short note appended.
+            original = issues[rng.integers(len(issues))]
+            title, body = original['title'], original['body'] + " same problem here"
+        else:
+            title, body = ' '.join(words[i, :8]), ' '.join(words[i, 8:])
+        issues.append({
+            'issue_number': int(number),
+            'issue_url': f"https://github.com/{repo}/issues/{number}",
+            'title': title,
+            'body': body,
+            'labels': GITHUB_LABEL_SETS[label_sets[i]][0],
+            'num_comments': int(comments[i]),
+            'created_at': created_at[i],
+            'updated_at': updated_at[i],
+            'closed_at': closed_at[i] if is_closed[i] else None,
+        })
+    return issues
+
+def generate_labels(rng, count: int) -> list:
+    """Label dicts shaped like the labeled_issues_<framework>.json values."""
+    bug_types = _choice(rng, BUG_TYPE_COUNTS, count)
+    root_causes = np.empty(count, dtype=object)
+    for bug_type, counts in ROOT_CAUSE_COUNTS.items():
+        mask = bug_types == bug_type
+        root_causes[mask] = _choice(rng, counts, int(mask.sum()))
+    codes = {
+        'bug_type': bug_types,
+        'root_cause': root_causes,
+        'symptoms': _choice(rng, SYMPTOM_COUNTS, count),
+        'development_cycle': _choice(rng, DEVELOPMENT_CYCLE_COUNTS, count),
+    }
+    # The converted spreadsheets capitalize the lower-case descriptions ('Tool Integration
+    # Issue'), so parsing goes through the case-insensitive lookup as it does on the study data.
+    spellings = {category: {code: string.capwords(description) if description.islower() else description
+                            for code, description in labels.items()}
+                 for category, labels in CATEGORY_LABELS.items()}
+    return [{category: spellings[category][column[i]] for category, column in codes.items()}
+            for i in range(count)]
+
+def write_json_array(items, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i, item in enumerate(items):
+            f.write((',\n' if i else '') + json.dumps(item))
+        f.write('\n]')
+
+def generate_corpus(scale: int, output_dir, seed: int = 0) -> dict:
+    """Write mined/ and labeled/ issue files for `scale` issues; reuses a matching earlier run."""
+    output_dir = Path(output_dir)
+    manifest_path = output_dir / 'corpus.json'
+    wanted = {'version': GENERATOR_VERSION, 'scale': scale, 'seed': seed}
+    if manifest_path.is_file():
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if all(manifest.get(key) == value for key, value in wanted.items()):
+            return manifest
+
+    rng = np.random.default_rng(seed)
+    vocabulary = synthetic_vocabulary()
+    total = sum(REPO_WEIGHTS.values())
+    counts = {repo: scale * weight // total for repo, weight in REPO_WEIGHTS.items()}
+    counts['langchain-ai/langchain'] += scale - sum(counts.values())
+
+    (output_dir / 'mined').mkdir(parents=True, exist_ok=True)
+    (output_dir / 'labeled').mkdir(parents=True, exist_ok=True)
+    for repo, count in counts.items():
+        name = repo.split('/')[1]
+        issues = generate_mined_issues(rng, repo, count, vocabulary)
+        write_json_array(issues, output_dir / 'mined' / f"github_issues_{name}_False.json")
+        labels = generate_labels(rng, count)
+        with open(output_dir / 'labeled' / f"labeled_issues_{name}.json", 'w', encoding='utf-8') as f:
+            json.dump({str(issue['issue_number']): label for issue, label in zip(issues, labels)}, f)
+
+    manifest = dict(wanted, repos=counts)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def parse_scale(value: str) -> int:
+    return SCALES.get(value.lower()) or int(value)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic corpus of mined and labeled issues.")
+    parser.add_argument("scale", type=str, help=f"Number of issues, or one of {', '.join(SCALES)}")
+    parser.add_argument("-o", "--output-dir", type=str, default=None, help=f"Output directory (default: {DEFAULT_CORPUS_DIR}/<scale>-<seed>)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    scale = parse_scale(args.scale)
+    output_dir = Path(args.output_dir) if args.output_dir else DEFAULT_CORPUS_DIR / f"{scale}-{args.seed}"
+    start = time.perf_counter()
+    manifest = generate_corpus(scale, output_dir, args.seed)
+    for repo, count in manifest['repos'].items():
+        print(f"   {repo}: {count} issues")
+    print(f"Corpus of {scale} issues in {output_dir} ({time.perf_counter() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
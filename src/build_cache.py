@@ -0,0 +1,95 @@
+import hashlib
+import inspect
+import json
+import os
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, List
+
+from rq_registry import Analysis
+
+MANIFEST_NAME = '.build_manifest.json'
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Bump when the fingerprint recipe changes so every output is rebuilt once.
+FINGERPRINT_VERSION = 1
+
+def hash_files(paths) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(str(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def code_files(module) -> List[Path]:
+    """The module's source plus every repository module it pulls names from (taxonomy, contingency, ...)."""
+    files = {Path(inspect.getfile(module)).resolve()}
+    for value in vars(module).values():
+        source = inspect.getmodule(value)
+        path = getattr(source, '__file__', None)
+        if path and Path(path).resolve().is_relative_to(REPO_ROOT):
+            files.add(Path(path).resolve())
+    return sorted(files)
+
+def library_versions(kind: str) -> Dict[str, str]:
+    packages = ['numpy', 'matplotlib', 'seaborn'] if kind == 'figure' else ['numpy']
+    versions = {}
+    for package in packages:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+def fingerprint(analysis: Analysis, module, dataset_digest: str) -> str:
+    """Hash of everything an output depends on: the data, the code, the extra inputs and the parameters."""
+    module_dir = Path(inspect.getfile(module)).resolve().parent
+    recipe = {
+        'version': FINGERPRINT_VERSION,
+        'function': analysis.function,
+        'data': dataset_digest if analysis.needs_dataset else None,
+        'code': hash_files(code_files(module)),
+        'inputs': hash_files(module_dir / path for path in analysis.inputs),
+        'params': analysis.params,
+        'outputs': list(analysis.outputs),
+        'libraries': library_versions(analysis.kind),
+    }
+    return hashlib.sha256(json.dumps(recipe, sort_keys=True, default=str).encode()).hexdigest()
+
+class BuildManifest:
+    """Fingerprints of the outputs last written to an output directory.
+
+    A step is fresh when its fingerprint matches the recorded one and all of
+    its output files still exist; everything else is rebuilt.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_NAME
+        self.entries = {}
+        if self.path.is_file():
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.entries = {}
+
+    def is_fresh(self, analysis: Analysis, fingerprint: str) -> bool:
+        if self.entries.get(analysis.name) != fingerprint:
+            return False
+        return all((self.output_dir / output).is_file() for output in analysis.outputs)
+
+    def record(self, analysis: Analysis, fingerprint: str):
+        self.entries[analysis.name] = fingerprint
+
+    def forget(self, analysis: Analysis):
+        self.entries.pop(analysis.name, None)
+
+    def save(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -1,41 +1,116 @@
 import requests
 import json
-from datetime import datetime
+import gzip
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from request_scheduler import RequestScheduler
+from github_graphql import iter_issue_pages, linked_pull_requests, node_to_issue, save_pr_metrics_csv, summarize_pr_metrics
+from labeled_dataset import DEFAULT_DATA_DIR, labeled_issue_numbers, labeled_issue_paths
+
+# The original dumps are named after mine_issues' is_open flag, e.g. github_issues_autogen_False.json.
+STATE_SUFFIXES = {'open': 'True', 'closed': 'False', 'all': 'all'}
+
+REPO_LIST = ["microsoft/autogen", "joaomdmoura/crewAI", "langchain-ai/langchain", "xlang-ai/OpenAgents", "gpt-engineer-org/gpt-engineer", "Significant-Gravitas/AutoGPT", "OpenDevin/OpenDevin"]
 
 class GitHubIssueMiner:
-    def __init__(self, token):
+    def __init__(self, token, max_workers=8, cache_dir=None, pool_maxsize=None, max_requests=None):
         self.base_url = "https://api.github.com"
         self.headers = {
             "Authorization": f"token {token}",
             "Accept": "application/vnd.github.v3+json"
         }
+        # One pooled session shared by every worker thread, so pages reuse
+        # keep-alive connections instead of opening a new one per request.
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize or max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.scheduler = RequestScheduler(self.session, cache_dir=cache_dir, max_requests=max_requests)
+
+    def fetch_page(self, url, params, page):
+        return self.scheduler.get(url, params={**params, 'page': page})
+
+    def get_last_page(self, response):
+        last = response.links.get('last')
+        if not last:
+            return None
+        return int(parse_qs(urlparse(last['url']).query)['page'][0])
+
+    def iter_pages(self, repo, state='all', labels="bug", concurrent=True, since=None, start_page=1):
+        """Yield (page number, extracted issues) in page order as each page arrives."""
+        url = f"{self.base_url}/repos/{repo}/issues"
+        params = {
+            'state': state,
+            'per_page': 100,
+            'labels': labels if labels else None,
+            'since': since
+        }
 
-    def fetch_issues(self, repo, state='all', labels="bug"):
+        first = self.fetch_page(url, params, start_page)
+        last_page = self.get_last_page(first) if concurrent else None
+        if last_page is None:
+            yield from self._iter_serial(url, params, first, start_page)
+            return
+
+        # The first page tells us how many pages there are, so the rest can be
+        # requested in parallel. Only a bounded window of pages is in flight,
+        # and they are handed out in page order.
+        yield start_page, self._extract_page(first.json())
+        remaining = iter(range(start_page + 1, last_page + 1))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque((page, executor.submit(self.fetch_page, url, params, page))
+                            for page in islice(remaining, 2 * self.max_workers))
+            while pending:
+                page, future = pending.popleft()
+                for next_page in islice(remaining, 1):
+                    pending.append((next_page, executor.submit(self.fetch_page, url, params, next_page)))
+                yield page, self._extract_page(future.result().json())
+
+    def iter_issues(self, repo, state='all', labels="bug", concurrent=True, since=None):
+        for _, page_issues in self.iter_pages(repo, state, labels, concurrent, since):
+            yield from page_issues
+
+    def fetch_issues(self, repo, state='all', labels="bug", concurrent=True, since=None):
+        return list(self.iter_issues(repo, state, labels, concurrent, since))
+
+    def iter_pages_graphql(self, repo, state='all', labels="bug"):
+        """Yield (issues, linked pull requests) for each page of the GraphQL backend."""
+        # One cursor-paginated GraphQL query returns the issues together with
+        # their labels, comment counts and linked pull requests' diff stats.
+        for nodes in iter_issue_pages(self.scheduler, f"{self.base_url}/graphql", repo, state, labels):
+            yield ([node_to_issue(node) for node in nodes],
+                   [pr for node in nodes for pr in linked_pull_requests(node, repo)])
+
+    def fetch_issues_graphql(self, repo, state='all', labels="bug"):
         issues = []
-        page = 1
+        pull_requests = []
+        for page_issues, linked in self.iter_pages_graphql(repo, state, labels):
+            issues.extend(page_issues)
+            pull_requests.extend(linked)
+        return issues, pull_requests
+
+    def _iter_serial(self, url, params, first, page):
+        response = first
         while True:
-            url = f"{self.base_url}/repos/{repo}/issues"
-            params = {
-                'state': state,
-                'page': page,
-                'per_page': 100,
-                'labels': labels if labels else None
-            }
-            response = requests.get(url, headers=self.headers, params=params)
-            if response.status_code != 200:
-                raise Exception(f"API request failed: {response.status_code}, {response.text}")
-            
             page_issues = response.json()
             if not page_issues:
                 break
-            
-            for issue in page_issues:
-                if 'pull_request' not in issue:  
-                    issues.append(self.extract_issue_data(issue))
-            
+
+            yield page, self._extract_page(page_issues)
+
             page += 1
-        
-        return issues
+            response = self.fetch_page(url, params, page)
+
+    def _extract_page(self, page_issues):
+        return [self.extract_issue_data(issue) for issue in page_issues
+                if 'pull_request' not in issue]
 
     def extract_issue_data(self, issue):
         return {
@@ -45,30 +120,231 @@ class GitHubIssueMiner:
             'body': issue['body'],
             'labels': [label['name'] for label in issue['labels']],
             'num_comments': issue['comments'],
+            'created_at': issue['created_at'],
+            'updated_at': issue['updated_at'],
+            'closed_at': issue['closed_at'],
         }
 
-    def mine_issues(self, repo, is_open=True, labels=None):
+    def mine_issues(self, repo, is_open=True, labels=None, concurrent=True, since=None):
         state = 'open' if is_open else 'closed'
-        return self.fetch_issues(repo, state, labels)
+        return self.fetch_issues(repo, state, labels, concurrent, since)
+
+    def mine_issues_graphql(self, repo, is_open=True, labels=None):
+        state = 'open' if is_open else 'closed'
+        return self.fetch_issues_graphql(repo, state, labels)
+
+class IssueStore:
+    """Issues of one repo kept on disk and keyed by issue_number.
+
+    The file keeps the same list-of-issues JSON layout that save_to_json
+    writes, so the preprocessing scripts can read it unchanged.
+    """
+
+    def __init__(self, filename):
+        self.filename = Path(filename)
+        self.issues = {}
+        if self.filename.is_file():
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                self.issues = {issue['issue_number']: issue for issue in json.load(f)}
+
+    def upsert(self, issues):
+        added = 0
+        for issue in issues:
+            if issue['issue_number'] not in self.issues:
+                added += 1
+            self.issues[issue['issue_number']] = issue
+        return added, len(issues) - added
+
+    def high_water_mark(self):
+        # updated_at is ISO 8601 in UTC, so string order is time order.
+        return max((issue['updated_at'] for issue in self.issues.values()
+                    if issue.get('updated_at')), default=None)
+
+    def save(self):
+        # Newest first, matching the order the issues API returns.
+        ordered = [self.issues[number] for number in sorted(self.issues, reverse=True)]
+        save_to_json(ordered, self.filename)
+
+def load_mining_state(filename):
+    if not Path(filename).is_file():
+        return {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_mining_state(mining_state, filename):
+    save_to_json(mining_state, filename)
+
+def mine_incremental(miner, repo, store_filename, mining_state, is_open=False, labels=None):
+    """Fetch only issues updated since the last run and upsert them into the store."""
+    key = f"{repo}:{'open' if is_open else 'closed'}"
+    store = IssueStore(store_filename)
+    since = mining_state.get(key) or store.high_water_mark()
+
+    issues = miner.mine_issues(repo, is_open, labels, since=since)
+    added, updated = store.upsert(issues)
+    store.save()
+
+    high_water_mark = store.high_water_mark()
+    if high_water_mark:
+        mining_state[key] = high_water_mark
+    return store, added, updated
+
+def issues_filename(repo, state, extension='.json'):
+    """Name of the mined issue file of one repository and issue state."""
+    return f"github_issues_{repo.split('/')[-1]}_{STATE_SUFFIXES[state]}{extension}"
 
 def save_to_json(data, filename):
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
 
+def _open_jsonl(filename, mode):
+    if str(filename).endswith('.gz'):
+        return gzip.open(filename, mode + 't', encoding='utf-8')
+    return open(filename, mode, encoding='utf-8')
+
+class JsonlWriter:
+    """Append-only JSON Lines writer; a filename ending in .gz is gzip-compressed.
+
+    Every write_page call is flushed to disk before it returns, so the records
+    of each fetched page survive a crash and can already be read by
+    read_jsonl while the crawl is still running.
+    """
+
+    def __init__(self, filename):
+        self.filename = Path(filename)
+        self.file = _open_jsonl(self.filename, 'a')
+        self.records = 0
+        self.bytes_written = 0
+
+    def write_page(self, records):
+        lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        self.file.write(lines)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.records += len(records)
+        self.bytes_written += len(lines.encode('utf-8'))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_jsonl(filename):
+    """Yield records from a JSON Lines file, tolerating a crawl that is still writing it."""
+    with _open_jsonl(filename, 'r') as f:
+        try:
+            for line in f:
+                if line.endswith('\n'):
+                    yield json.loads(line)
+        except EOFError:
+            # A gzip stream that is still being appended to has no trailer yet.
+            return
+
+def save_to_jsonl(pages, filename):
+    with JsonlWriter(filename) as writer:
+        for page_issues in pages:
+            writer.write_page(page_issues)
+        return writer.records
+
+def labeled_pr_metrics(pull_requests_by_repo, data_dir=DEFAULT_DATA_DIR):
+    """rq4_raw.csv rows over the pull requests linked to labeled issues, the set RQ4 studies."""
+    issue_paths = labeled_issue_paths(data_dir, [repo.split('/')[1] for repo in pull_requests_by_repo])
+    rows = []
+    for repo, pull_requests in pull_requests_by_repo.items():
+        issues_path = issue_paths[repo.split('/')[1]]
+        if not issues_path.is_file():
+            print(f"No labeled issues for {repo} at {issues_path}, leaving it out of rq4_raw.csv")
+            continue
+        issue_numbers = labeled_issue_numbers(issues_path)
+        rows.append(summarize_pr_metrics(repo, [pr for pr in pull_requests if pr['issue_number'] in issue_numbers]))
+    return rows
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mine GitHub issues from agent framework repositories.")
+    parser.add_argument("--incremental", action="store_true", help="Only fetch issues updated since the last run and merge them into the existing files")
+    parser.add_argument("--output-dir", type=str, default="../reports/Github/", help="Directory for the mined issue files (default: ../reports/Github/)")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Directory for cached responses used in ETag conditional requests")
+    parser.add_argument("--backend", choices=["rest", "graphql"], default="rest", help="API used for mining; graphql also writes the RQ4 pull request metrics of the labeled issues (default: rest)")
+    parser.add_argument("--data-dir", type=str, default=str(DEFAULT_DATA_DIR), help="Directory with the labeled_issues_*.json files the RQ4 metrics are restricted to")
+    parser.add_argument("--jsonl", action="store_true", help="Stream issues page by page into github_issues_<repo>_False.jsonl instead of one JSON file")
+    parser.add_argument("--gzip", action="store_true", help="Gzip-compress the JSONL output (implies --jsonl)")
+    parser.add_argument("--index", action="store_true", help="Update the full-text issue index (issue_index.sqlite in the output directory) after mining")
+    parser.add_argument("--warehouse", type=str, nargs="?", const="", default=None, help="Load the mined issues (and the RQ4 metrics of the graphql backend) into the study warehouse; optionally give its database path")
+    args = parser.parse_args()
+    if args.incremental and args.backend == "graphql":
+        parser.error("--incremental is only supported with the rest backend")
+    if args.incremental and (args.jsonl or args.gzip):
+        parser.error("--incremental updates the JSON issue files and cannot be combined with --jsonl")
+
     token = "YOUR GITHUB TOKEN HERE"
-    miner = GitHubIssueMiner(token)
-    repo_list = ["microsoft/autogen", "joaomdmoura/crewAI", "langchain-ai/langchain", "xlang-ai/OpenAgents", "gpt-engineer-org/gpt-engineer", "Significant-Gravitas/AutoGPT", "OpenDevin/OpenDevin"]
+    miner = GitHubIssueMiner(token, cache_dir=args.cache_dir)
+    repo_list = REPO_LIST
+    output_dir = Path(args.output_dir)
+    state_filename = output_dir / "mining_state.json"
+    mining_state = load_mining_state(state_filename)
+    pull_requests_by_repo = {}
+    total_issues = 0
+    mined_files = []
 
     for repo_num in range(len(repo_list)):
         repo = repo_list[repo_num]
         is_open = False
         labels = None
 
-        issues = miner.mine_issues(repo, is_open, labels)
+        state = 'open' if is_open else 'closed'
+        filename = issues_filename(repo, state)
+
+        if args.incremental:
+            store, added, updated = mine_incremental(miner, repo, output_dir / filename, mining_state, is_open, labels)
+            save_mining_state(mining_state, state_filename)
+            issue_count = len(store.issues)
+            print(f"{repo}: {added} new and {updated} updated issues")
+        elif args.jsonl or args.gzip:
+            filename = issues_filename(repo, state, '.jsonl.gz' if args.gzip else '.jsonl')
+            (output_dir / filename).unlink(missing_ok=True)
+            if args.backend == "graphql":
+                pull_requests = []
+                with JsonlWriter(output_dir / filename) as writer:
+                    for page_issues, linked in miner.iter_pages_graphql(repo, state, labels):
+                        writer.write_page(page_issues)
+                        pull_requests.extend(linked)
+                pull_requests_by_repo[repo] = pull_requests
+                issue_count = writer.records
+            else:
+                pages = (page_issues for _, page_issues in miner.iter_pages(repo, state, labels))
+                issue_count = save_to_jsonl(pages, output_dir / filename)
+        elif args.backend == "graphql":
+            issues, pull_requests = miner.mine_issues_graphql(repo, is_open, labels)
+            save_to_json(issues, output_dir / filename)
+            issue_count = len(issues)
+            pull_requests_by_repo[repo] = pull_requests
+        else:
+            issues = miner.mine_issues(repo, is_open, labels)
+            save_to_json(issues, output_dir / filename)
+            issue_count = len(issues)
+
+        total_issues += issue_count
+        mined_files.append(output_dir / filename)
+        print(f"Mined {issue_count} issues and saved to {filename}")
+
+    pr_metrics = labeled_pr_metrics(pull_requests_by_repo, args.data_dir)
+    if pr_metrics:
+        save_pr_metrics_csv(pr_metrics, output_dir / "rq4_raw.csv")
+
+    print(f"Mined {total_issues} issues from {len(repo_list)} repositories")
 
-        repo_name = repo.split('/')[-1]
-        filename = f"github_issues_{repo_name}_{is_open}.json"
-        save_to_json(issues, '../reports/Github/'+filename)
+    if args.index:
+        from issue_index import connect, update_index
+        counts = update_index(connect(output_dir / "issue_index.sqlite"), mined_files)
+        print(f"Indexed {sum(counts.values())} new or updated issues in {output_dir / 'issue_index.sqlite'}")
 
-    print(f"Mined {len(issues)} issues and saved to {filename}")
\ No newline at end of file
+    if args.warehouse is not None:
+        from study_warehouse import DEFAULT_DB, connect, load_issue_dumps, load_pr_metrics
+        warehouse = connect(args.warehouse or DEFAULT_DB)
+        print(f"Loaded {load_issue_dumps(warehouse, mined_files)} issues into {args.warehouse or DEFAULT_DB}")
+        if pr_metrics:
+            load_pr_metrics(warehouse, output_dir / "rq4_raw.csv")
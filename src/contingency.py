@@ -0,0 +1,73 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from labeled_dataset import UNKNOWN_CODE, LabeledDataset
+
+class ContingencyTable:
+    """Issue counts over the cross product of one or more label dimensions.
+
+    Axis i has one slot per taxonomy code of dimensions[i], plus a final
+    "Unknown" slot, so counts.sum() is always the number of issues counted.
+    first_seen holds the row of the first issue in each cell and is used to
+    break ties the way the issue-by-issue Counters used to.
+    """
+
+    def __init__(self, dimensions: List[str], labels: List[List[str]], counts: np.ndarray,
+                 first_seen: np.ndarray):
+        self.dimensions = dimensions
+        self.labels = labels
+        self.counts = counts
+        self.first_seen = first_seen
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def axis(self, dimension: str) -> int:
+        return self.dimensions.index(dimension)
+
+    def marginal(self, *dimensions: str) -> 'ContingencyTable':
+        keep = [self.axis(dimension) for dimension in dimensions]
+        summed = tuple(axis for axis in range(self.counts.ndim) if axis not in keep)
+        # Reductions leave the kept axes in their original order; reorder to the request.
+        order = np.argsort(np.argsort(keep))
+        counts = np.moveaxis(self.counts.sum(axis=summed), order, range(len(keep)))
+        first_seen = np.moveaxis(self.first_seen.min(axis=summed), order, range(len(keep)))
+        return ContingencyTable(list(dimensions), [self.labels[axis] for axis in keep], counts, first_seen)
+
+    def percentages(self) -> np.ndarray:
+        total = self.total
+        return self.counts / total * 100 if total else np.zeros(self.counts.shape)
+
+    def known(self) -> np.ndarray:
+        """Counts without the Unknown slot of any axis."""
+        return self.counts[tuple(slice(0, -1) for _ in self.dimensions)]
+
+    def top_k(self, k: int) -> List[Tuple[Tuple[str, ...], int, float]]:
+        """The k most frequent non-empty cells as (labels, count, percentage of all issues)."""
+        flat = self.counts.ravel()
+        order = np.lexsort((self.first_seen.ravel(), -flat))[:k]
+        order = order[flat[order] > 0]
+        total = self.total
+        cells = []
+        for index in order:
+            position = np.unravel_index(index, self.counts.shape)
+            labels = tuple(self.labels[axis][i] for axis, i in enumerate(position))
+            cells.append((labels, int(flat[index]), float(flat[index] / total * 100)))
+        return cells
+
+def contingency(dataset: LabeledDataset, dimensions: Sequence[str]) -> ContingencyTable:
+    """Count the dataset's issues over the given label dimensions in one bincount."""
+    dimensions = list(dimensions)
+    labels = [dataset.codes[dimension] + ["Unknown"] for dimension in dimensions]
+    shape = tuple(len(axis_labels) for axis_labels in labels)
+    # Map UNKNOWN_CODE to the last slot of each axis.
+    indices = [np.where(dataset.columns[dimension] == UNKNOWN_CODE, size - 1, dataset.columns[dimension]).astype(np.intp)
+               for dimension, size in zip(dimensions, shape)]
+    flat = np.ravel_multi_index(indices, shape) if len(dataset) else np.zeros(0, dtype=np.intp)
+    size = int(np.prod(shape))
+    counts = np.bincount(flat, minlength=size).reshape(shape)
+    first_seen = np.full(size, len(dataset), dtype=np.intp)
+    np.minimum.at(first_seen, flat, np.arange(len(dataset)))
+    return ContingencyTable(dimensions, labels, counts, first_seen.reshape(shape))
@@ -0,0 +1,149 @@
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from numbers_parser import Document
+
+from labeled_dataset import DEFAULT_DATA_DIR, file_digest, framework_name
+
+DEFAULT_INPUT_DIR = Path(__file__).resolve().parent.parent / 'labeled_github_issues'
+STATE_FILE = '.conversion_state.json'
+
+# Bump when the JSON written for the same spreadsheet changes, so every file is converted again.
+CONVERTER_VERSION = 2
+
+# Spreadsheet header -> key in labeled_issues_<framework>.json
+COLUMNS = {
+    'bug type': 'bug_type',
+    'root cause': 'root_cause',
+    'symptom': 'symptoms',
+    'development cycle': 'development_cycle',
+}
+ISSUE_COLUMN = 'issue_num'
+
+def setup_logging(log_level):
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+def _cell(value) -> str:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return "Unknown"
+    return str(value).strip()
+
+def _issue_number(value):
+    # Numbers stores every number as a float (22972.0).
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip() if value is not None and str(value).strip() else None
+
+def iter_labeled_rows(path):
+    """Yield (issue number, labels) from the first table of a labeled_issues_*.numbers file."""
+    table = Document(str(path)).sheets[0].tables[0]
+    rows = table.iter_rows(values_only=True)
+    header = [str(name).strip().lower() if name is not None else '' for name in next(rows)]
+    missing = [name for name in [ISSUE_COLUMN, *COLUMNS] if name not in header]
+    if missing:
+        raise ValueError(f"{path} has no {', '.join(missing)} column")
+    issue_index = header.index(ISSUE_COLUMN)
+    indices = {key: header.index(name) for name, key in COLUMNS.items()}
+
+    for row in rows:
+        issue = _issue_number(row[issue_index])
+        if issue is None:
+            continue
+        yield issue, {key: _cell(row[index]) for key, index in indices.items()}
+
+def output_path(path, output_dir) -> Path:
+    return Path(output_dir) / f'labeled_issues_{framework_name(path)}.json'
+
+def convert_numbers_file(path, output_dir):
+    """Stream one spreadsheet into labeled_issues_<framework>.json; returns (path, issues, duplicates)."""
+    target = output_path(path, output_dir)
+    tmp_target = target.with_name(target.name + '.tmp')
+    seen = set()
+    duplicates = 0
+    with open(tmp_target, 'w') as f:
+        f.write('{')
+        for issue, labels in iter_labeled_rows(path):
+            if issue in seen:
+                # A JSON object cannot hold the key twice; keep the first row like the manual export did.
+                duplicates += 1
+                continue
+            entry = json.dumps({issue: labels}, indent=4)[2:-2]
+            f.write(('\n' if not seen else ',\n') + entry)
+            seen.add(issue)
+        f.write('\n}' if seen else '}')
+    os.replace(tmp_target, target)
+    return str(path), len(seen), duplicates
+
+def load_state(output_dir) -> dict:
+    path = Path(output_dir) / STATE_FILE
+    if path.is_file():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {}
+
+def save_state(output_dir, state: dict):
+    path = Path(output_dir) / STATE_FILE
+    with open(path.with_name(path.name + '.tmp'), 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path.with_name(path.name + '.tmp'), path)
+
+def source_fingerprint(path) -> str:
+    return f"v{CONVERTER_VERSION}:{file_digest(path)}"
+
+def convert_all(input_paths, output_dir, jobs=None, force=False):
+    """Convert the spreadsheets whose content changed since the last run, in parallel."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    state = load_state(output_dir)
+    fingerprints = {str(path): source_fingerprint(path) for path in input_paths}
+
+    stale = [path for path in input_paths
+             if force or state.get(path.name) != fingerprints[str(path)] or not output_path(path, output_dir).is_file()]
+    for path in input_paths:
+        if path not in stale:
+            logging.info(f"{path.name} is unchanged, keeping {output_path(path, output_dir).name}")
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=jobs or len(stale)) as executor:
+            futures = {executor.submit(convert_numbers_file, path, output_dir): path for path in stale}
+            for future, path in futures.items():
+                try:
+                    _, issues, duplicates = future.result()
+                except Exception as e:
+                    logging.error(f"Could not convert {path.name}: {e}")
+                    state.pop(path.name, None)
+                    continue
+                logging.info(f"{path.name}: wrote {issues} issues to {output_path(path, output_dir).name}")
+                if duplicates:
+                    logging.warning(f"{path.name}: skipped {duplicates} duplicate issue number(s)")
+                state[path.name] = fingerprints[str(path)]
+        save_state(output_dir, state)
+    return stale
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the labeled_issues_*.numbers spreadsheets into the JSON files the RQ scripts read.")
+    parser.add_argument("input_paths", nargs="*", help=f"Spreadsheets to convert (default: {DEFAULT_INPUT_DIR.name}/*.numbers)")
+    parser.add_argument("-o", "--output-dir", type=str, default=str(DEFAULT_DATA_DIR), help="Directory for the labeled_issues_*.json files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: one per spreadsheet)")
+    parser.add_argument("--force", action="store_true", help="Convert every spreadsheet even if it is unchanged")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose output")
+    args = parser.parse_args()
+
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    input_paths = [Path(path) for path in args.input_paths] or sorted(DEFAULT_INPUT_DIR.glob('labeled_issues_*.numbers'))
+    if not input_paths:
+        parser.error(f"No .numbers files found in {DEFAULT_INPUT_DIR}")
+
+    converted = convert_all(input_paths, args.output_dir, args.jobs, args.force)
+    print(f"Converted {len(converted)} of {len(input_paths)} spreadsheet(s) into {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from collect_github_issues import REPO_LIST, GitHubIssueMiner, JsonlWriter, issues_filename
+from request_scheduler import RequestBudgetExhausted
+
+def setup_logging(log_level):
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+class RepoCheckpoint:
+    """Page cursor of one repository's crawl, saved after every page that reaches disk.
+
+    The byte offset of the output file is saved with it, so a page that was
+    written but not yet checkpointed when the crawl was killed is cut off
+    again on resume instead of being written twice.
+    """
+
+    def __init__(self, filename):
+        self.filename = Path(filename)
+        self.next_page = 1
+        self.offset = 0
+        self.issues = 0
+        self.pages = 0
+        self.done = False
+        if self.filename.is_file():
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                self.__dict__.update(json.load(f))
+
+    def advance(self, page, offset, issues):
+        self.next_page = page + 1
+        self.offset = offset
+        self.issues += issues
+        self.pages += 1
+        self.save()
+
+    def save(self):
+        state = {key: value for key, value in self.__dict__.items() if key != 'filename'}
+        tmp_filename = self.filename.with_suffix('.tmp')
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_filename, self.filename)
+
+def crawl_repo(miner, repo, state, labels, output_dir, checkpoint_dir):
+    output_filename = output_dir / issues_filename(repo, state, '.jsonl')
+    checkpoint = RepoCheckpoint(checkpoint_dir / f"{repo.replace('/', '__')}_{state}.json")
+    summary = {'repo': repo, 'status': 'done'}
+    start = time.perf_counter()
+
+    if not checkpoint.done:
+        if output_filename.is_file():
+            with open(output_filename, 'r+b') as f:
+                f.truncate(checkpoint.offset)
+        elif checkpoint.offset:
+            # The output is gone, so the cursor is meaningless; start over.
+            checkpoint.filename.unlink()
+            checkpoint = RepoCheckpoint(checkpoint.filename)
+
+        try:
+            with JsonlWriter(output_filename) as writer:
+                for page, page_issues in miner.iter_pages(repo, state, labels, start_page=checkpoint.next_page):
+                    writer.write_page(page_issues)
+                    checkpoint.advance(page, output_filename.stat().st_size, len(page_issues))
+            checkpoint.done = True
+            checkpoint.save()
+        except RequestBudgetExhausted:
+            summary['status'] = 'budget exhausted'
+        except Exception as e:
+            logging.error(f"Crawl of {repo} stopped at page {checkpoint.next_page}: {e}")
+            summary['status'] = 'failed'
+
+    path_prefix = f"/repos/{repo}/"
+    summary.update({
+        'issues': checkpoint.issues,
+        'pages': checkpoint.pages,
+        'bytes': output_filename.stat().st_size if output_filename.is_file() else 0,
+        'wall_time': time.perf_counter() - start,
+        'requests': sum(count for path, count in miner.scheduler.requests_by_path.items()
+                        if path.startswith(path_prefix)),
+    })
+    return summary
+
+def print_summary(summaries):
+    header = f"{'Repository':<36} {'Status':<17} {'Issues':>8} {'Pages':>6} {'Bytes':>12} {'Time (s)':>9} {'Requests':>9}"
+    print("\nCrawl summary:")
+    print(header)
+    print("-" * len(header))
+    for summary in summaries:
+        print(f"{summary['repo']:<36} {summary['status']:<17} {summary['issues']:>8} {summary['pages']:>6} "
+              f"{summary['bytes']:>12} {summary['wall_time']:>9.1f} {summary['requests']:>9}")
+    print("-" * len(header))
+    print(f"{'Total':<36} {'':<17} {sum(s['issues'] for s in summaries):>8} {sum(s['pages'] for s in summaries):>6} "
+          f"{sum(s['bytes'] for s in summaries):>12} {'':>9} {sum(s['requests'] for s in summaries):>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl the issues of several GitHub repositories in parallel with resumable checkpoints.")
+    parser.add_argument("repos", nargs="*", default=REPO_LIST, help="owner/repo names to crawl (default: the study's repositories)")
+    parser.add_argument("--token", type=str, default=os.environ.get("GITHUB_TOKEN", "YOUR GITHUB TOKEN HERE"), help="GitHub token (default: $GITHUB_TOKEN)")
+    parser.add_argument("--state", choices=["open", "closed", "all"], default="closed", help="Issue state to crawl (default: closed)")
+    parser.add_argument("--labels", type=str, default=None, help="Comma-separated labels to filter on")
+    parser.add_argument("--output-dir", type=str, default="../reports/Github/", help="Directory for the JSONL issue files (default: ../reports/Github/)")
+    parser.add_argument("--checkpoint-dir", type=str, default=None, help="Directory for page checkpoints (default: <output-dir>/checkpoints)")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Directory for cached responses used in ETag conditional requests")
+    parser.add_argument("--repo-workers", type=int, default=3, help="Repositories crawled in parallel (default: 3)")
+    parser.add_argument("--page-workers", type=int, default=4, help="Pages fetched in parallel per repository (default: 4)")
+    parser.add_argument("--max-requests", type=int, default=None, help="Global request budget shared by all repositories")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args()
+
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+
+    output_dir = Path(args.output_dir)
+    checkpoint_dir = Path(args.checkpoint_dir) if args.checkpoint_dir else output_dir / "checkpoints"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    # A single miner means a single session and scheduler, so every repository
+    # draws from the same rate-limit budget.
+    miner = GitHubIssueMiner(args.token, max_workers=args.page_workers, cache_dir=args.cache_dir,
+                             pool_maxsize=args.repo_workers * args.page_workers, max_requests=args.max_requests)
+
+    with ThreadPoolExecutor(max_workers=args.repo_workers) as executor:
+        summaries = list(executor.map(
+            lambda repo: crawl_repo(miner, repo, args.state, args.labels, output_dir, checkpoint_dir),
+            args.repos))
+
+    print_summary(summaries)
+
+if __name__ == "__main__":
+    main()
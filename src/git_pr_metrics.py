@@ -0,0 +1,219 @@
+import argparse
+import json
+import logging
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from github_graphql import save_pr_metrics_csv, summarize_pr_metrics
+from labeled_dataset import DEFAULT_CACHE_DIR, DEFAULT_DATA_DIR, labeled_issue_numbers, labeled_issue_paths
+
+# The repositories of RQ4, in the row order of RQ4/rq4_raw.csv.
+RQ4_REPOS = [
+    "gpt-engineer-org/gpt-engineer",
+    "langchain-ai/langchain",
+    "microsoft/autogen",
+    "OpenDevin/OpenDevin",
+    "Significant-Gravitas/AutoGPT",
+]
+# Same layout as RQ4/rq4_raw.csv, but not a drop-in replacement for the
+# hand-curated file: clones only show merged PRs, so total_PRs equals
+# investigated_PRs, and a PR's start is its first commit's author date.
+DEFAULT_OUTPUT = Path(__file__).resolve().parent.parent / 'RQ4' / 'rq4_git_metrics.csv'
+
+# Bump when the metrics computed for the same commits change.
+CACHE_VERSION = 1
+
+MERGE_SUBJECT = re.compile(r'^Merge pull request #(\d+)')
+SQUASH_SUBJECT = re.compile(r'\(#(\d+)\)\s*$')
+ISSUE_REFERENCE = re.compile(r'(?<![\w/])#(\d+)\b')
+
+# One record per commit: \x1e starts a record and \x1f separates the fields.
+LOG_FORMAT = '%x1e%H%x1f%P%x1f%ct%x1f%B%x1f'
+
+def setup_logging(log_level):
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+def run_git(git_dir, *args) -> str:
+    result = subprocess.run(['git', '--git-dir', str(git_dir), *args],
+                            capture_output=True, text=True, errors='replace', check=True)
+    return result.stdout
+
+def find_clone(clones_dir, repo) -> Optional[Path]:
+    """The local clone of owner/name: <owner>/<name>.git, <name>.git or a plain checkout's .git."""
+    owner, name = repo.split('/')
+    for candidate in [Path(clones_dir) / owner / f'{name}.git', Path(clones_dir) / f'{name}.git',
+                      Path(clones_dir) / owner / name / '.git', Path(clones_dir) / name / '.git']:
+        if candidate.exists():
+            return candidate
+    return None
+
+def _timestamp(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def iter_log_records(output: str):
+    """Split `git log --format=LOG_FORMAT` output into (sha, parents, commit time, message, rest)."""
+    for record in output.split('\x1e')[1:]:
+        sha, parents, committed, message, rest = record.split('\x1f', 4)
+        yield sha, parents.split(), int(committed), message, rest
+
+def pull_request_commits(git_dir, rev='HEAD') -> List[dict]:
+    """Pull requests merged into the default branch, found from merge and squash commit subjects."""
+    merged = []
+    for sha, parents, committed, message, _ in iter_log_records(
+            run_git(git_dir, 'log', '--first-parent', f'--format={LOG_FORMAT}', rev)):
+        subject = message.split('\n', 1)[0]
+        match = MERGE_SUBJECT.match(subject) if len(parents) > 1 else SQUASH_SUBJECT.search(subject)
+        if not match:
+            continue
+        pr_number = int(match.group(1))
+        references = {int(number) for number in ISSUE_REFERENCE.findall(message)} - {pr_number}
+        merged.append({'sha': sha, 'parents': parents, 'pr_number': pr_number,
+                       'merged_at': committed, 'references': references})
+    return merged
+
+def pull_heads(git_dir) -> Dict[int, str]:
+    # Mirror clones of GitHub repositories carry refs/pull/<n>/head for every PR.
+    heads = {}
+    for line in run_git(git_dir, 'for-each-ref', '--format=%(refname) %(objectname)', 'refs/pull/').splitlines():
+        refname, sha = line.split()
+        parts = refname.split('/')
+        if len(parts) == 4 and parts[3] == 'head':
+            heads[int(parts[2])] = sha
+    return heads
+
+def diff_stats(git_dir, shas: List[str], chunk_size: int = 200) -> Dict[str, dict]:
+    """Additions, deletions and changed files of each commit against its first parent, via --numstat."""
+    stats = {}
+    for start in range(0, len(shas), chunk_size):
+        output = run_git(git_dir, 'log', '--no-walk=unsorted', '--diff-merges=first-parent', '--numstat',
+                         f'--format={LOG_FORMAT}', *shas[start:start + chunk_size])
+        for sha, _, _, _, numstat in iter_log_records(output):
+            additions = deletions = changed_files = 0
+            for line in numstat.strip().splitlines():
+                added, deleted, _ = line.split('\t', 2)
+                # Binary files show '-' for both counts but still count as changed.
+                additions += int(added) if added != '-' else 0
+                deletions += int(deleted) if deleted != '-' else 0
+                changed_files += 1
+            stats[sha] = {'additions': additions, 'deletions': deletions, 'changed_files': changed_files}
+    return stats
+
+def branch_commits(git_dir, head: str, base: str) -> List[int]:
+    """Author times of the commits on the PR branch that the base did not have."""
+    return [int(line) for line in run_git(git_dir, 'log', '--format=%at', head, '--not', base).split()]
+
+def load_cache(cache_file) -> dict:
+    if cache_file and Path(cache_file).is_file():
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+        if cached.get('version') == CACHE_VERSION:
+            return cached['commits']
+    return {}
+
+def save_cache(cache_file, commits: dict):
+    cache_file = Path(cache_file)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'commits': commits}, f, sort_keys=True)
+    os.replace(tmp_file, cache_file)
+
+def repo_pull_requests(repo, git_dir, issue_numbers, cache_file=None) -> List[dict]:
+    """Merged PRs of one clone that reference a labeled issue, shaped like github_graphql.linked_pull_requests."""
+    candidates = [pr for pr in pull_request_commits(git_dir) if pr['references'] & issue_numbers]
+    heads = pull_heads(git_dir)
+    cache = load_cache(cache_file)
+
+    # The PR head pins the branch commits, so the key changes if the ref is ever force-updated.
+    for pr in candidates:
+        pr['head'] = heads.get(pr['pr_number']) or (pr['parents'][1] if len(pr['parents']) > 1 else pr['sha'])
+        pr['key'] = f"{pr['sha']}:{pr['head']}"
+
+    missing = [pr for pr in candidates if pr['key'] not in cache]
+    stats = diff_stats(git_dir, [pr['sha'] for pr in missing]) if missing else {}
+    for pr in missing:
+        authored = branch_commits(git_dir, pr['head'], pr['parents'][0]) or [pr['merged_at']]
+        cache[pr['key']] = dict(stats[pr['sha']], commits=len(authored), created_at=min(authored))
+    if missing and cache_file:
+        save_cache(cache_file, cache)
+
+    pull_requests = []
+    for pr in sorted(candidates, key=lambda pr: pr['pr_number']):
+        metrics = cache[pr['key']]
+        pull_requests.append({
+            'issue_number': min(pr['references'] & issue_numbers),
+            'pr_number': pr['pr_number'],
+            'pr_url': f"https://github.com/{repo}/pull/{pr['pr_number']}",
+            'merged': True,
+            'created_at': _timestamp(metrics['created_at']),
+            'merged_at': _timestamp(pr['merged_at']),
+            'additions': metrics['additions'],
+            'deletions': metrics['deletions'],
+            'changed_files': metrics['changed_files'],
+            'commits': metrics['commits'],
+        })
+    return pull_requests
+
+def _repo_task(repo, git_dir, issues_path, cache_dir):
+    cache_file = Path(cache_dir) / 'git_pr_metrics' / f"{repo.replace('/', '__')}.json" if cache_dir else None
+    pull_requests = repo_pull_requests(repo, git_dir, labeled_issue_numbers(issues_path), cache_file)
+    return repo, pull_requests
+
+def compute_pr_metrics(repos, clones_dir, data_dir=DEFAULT_DATA_DIR, cache_dir=DEFAULT_CACHE_DIR, jobs=None):
+    """One rq4_raw.csv row per repository with a clone and labeled issues, in the order of repos."""
+    issue_paths = labeled_issue_paths(data_dir, [repo.split('/')[1] for repo in repos])
+    tasks = []
+    for repo in repos:
+        git_dir = find_clone(clones_dir, repo)
+        issues_path = issue_paths[repo.split('/')[1]]
+        if git_dir is None:
+            logging.warning(f"No clone of {repo} in {clones_dir}, skipping it")
+        elif not issues_path.is_file():
+            logging.warning(f"No labeled issues for {repo} at {issues_path}, skipping it")
+        else:
+            tasks.append((repo, git_dir, issues_path, cache_dir))
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs or max(len(tasks), 1)) as executor:
+        futures = [executor.submit(_repo_task, *task) for task in tasks]
+        for future, task in zip(futures, tasks):
+            try:
+                repo, pull_requests = future.result()
+            except subprocess.CalledProcessError as e:
+                logging.error(f"git failed for {task[0]}: {e.stderr.strip()}")
+                continue
+            logging.info(f"{repo}: {len(pull_requests)} merged PRs reference labeled issues")
+            results[repo] = pull_requests
+    return [summarize_pr_metrics(repo, results[repo]) for repo in repos if repo in results]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the RQ4 pull request metrics from local clones instead of the GitHub API.")
+    parser.add_argument("clones_dir", type=str, help="Directory with the bare clones (<owner>/<name>.git or <name>.git; mirror clones also give refs/pull/*)")
+    parser.add_argument("repos", nargs="*", default=RQ4_REPOS, help="Repositories as owner/name (default: the five RQ4 repositories)")
+    parser.add_argument("--data-dir", type=str, default=str(DEFAULT_DATA_DIR), help="Directory with the labeled_issues_*.json files")
+    parser.add_argument("--cache-dir", type=str, default=str(DEFAULT_CACHE_DIR), help="Directory for the per-commit metrics cache")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every commit's metrics")
+    parser.add_argument("-o", "--output", type=str, default=str(DEFAULT_OUTPUT), help="Output CSV (default: RQ4/rq4_git_metrics.csv)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: one per repository)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose output")
+    args = parser.parse_args()
+
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    rows = compute_pr_metrics(args.repos, args.clones_dir, args.data_dir,
+                              None if args.no_cache else args.cache_dir, args.jobs)
+    if not rows:
+        parser.error("No repository could be processed")
+    save_pr_metrics_csv(rows, args.output)
+    print(f"Wrote metrics for {len(rows)} repositories to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import csv
+from datetime import datetime
+
+from request_scheduler import GitHubAPIError
+
+ISSUES_QUERY = """
+query($owner: String!, $name: String!, $states: [IssueState!], $labels: [String!], $cursor: String, $pageSize: Int!) {
+  repository(owner: $owner, name: $name) {
+    issues(first: $pageSize, after: $cursor, states: $states, labels: $labels,
+           orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        url
+        title
+        body
+        createdAt
+        updatedAt
+        closedAt
+        labels(first: 50) { nodes { name } }
+        comments { totalCount }
+        timelineItems(first: 25, itemTypes: [CROSS_REFERENCED_EVENT, CONNECTED_EVENT, CLOSED_EVENT]) {
+          nodes {
+            ... on CrossReferencedEvent { source { ...prFields } }
+            ... on ConnectedEvent { subject { ...prFields } }
+            ... on ClosedEvent { closer { ...prFields } }
+          }
+        }
+      }
+    }
+  }
+  rateLimit { cost remaining resetAt }
+}
+
+fragment prFields on PullRequest {
+  number
+  url
+  repository { nameWithOwner }
+  merged
+  createdAt
+  mergedAt
+  additions
+  deletions
+  changedFiles
+  commits { totalCount }
+}
+"""
+
+GRAPHQL_STATES = {
+    'open': ['OPEN'],
+    'closed': ['CLOSED'],
+    'all': None,
+}
+
+PR_METRICS_FIELDS = [
+    'owner/repo', 'total_PRs', 'investigated_PRs',
+    'total_additions', 'average_additions', 'total_deletions', 'average_deletions',
+    'total_changes', 'average_changes', 'total_changed_files', 'average_changed_files',
+    'total_commits', 'average_commits', 'total_time', 'average_time',
+]
+
+def iter_issue_pages(scheduler, graphql_url, repo, state='all', labels=None, page_size=50):
+    """Yield lists of raw issue nodes of one repo, following the GraphQL cursor page by page."""
+    owner, name = repo.split('/')
+    variables = {
+        'owner': owner,
+        'name': name,
+        'states': GRAPHQL_STATES[state],
+        'labels': labels.split(',') if labels else None,
+        'cursor': None,
+        'pageSize': page_size,
+    }
+    while True:
+        payload = scheduler.post(graphql_url, {'query': ISSUES_QUERY, 'variables': variables}).json()
+        if payload.get('errors'):
+            raise GitHubAPIError(200, payload['errors'])
+
+        issues = payload['data']['repository']['issues']
+        yield issues['nodes']
+
+        if not issues['pageInfo']['hasNextPage']:
+            break
+        variables['cursor'] = issues['pageInfo']['endCursor']
+
+def node_to_issue(node):
+    # Same fields as GitHubIssueMiner.extract_issue_data produces from REST.
+    return {
+        'issue_number': node['number'],
+        'issue_url': node['url'],
+        'title': node['title'],
+        'body': node['body'],
+        'labels': [label['name'] for label in node['labels']['nodes']],
+        'num_comments': node['comments']['totalCount'],
+        'created_at': node['createdAt'],
+        'updated_at': node['updatedAt'],
+        'closed_at': node['closedAt'],
+    }
+
+def linked_pull_requests(node, repo):
+    """Pull requests of the same repository that reference, connect to or close the issue."""
+    pull_requests = {}
+    for event in node['timelineItems']['nodes']:
+        pr = event.get('source') or event.get('subject') or event.get('closer')
+        if not pr or 'additions' not in pr:
+            continue
+        if pr['repository']['nameWithOwner'].lower() != repo.lower():
+            continue
+        pull_requests[pr['number']] = {
+            'issue_number': node['number'],
+            'pr_number': pr['number'],
+            'pr_url': pr['url'],
+            'merged': pr['merged'],
+            'created_at': pr['createdAt'],
+            'merged_at': pr['mergedAt'],
+            'additions': pr['additions'],
+            'deletions': pr['deletions'],
+            'changed_files': pr['changedFiles'],
+            'commits': pr['commits']['totalCount'],
+        }
+    return list(pull_requests.values())
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def summarize_pr_metrics(repo, pull_requests):
+    """One rq4_raw.csv row: totals and per-PR averages over the merged pull requests."""
+    unique = {pr['pr_number']: pr for pr in pull_requests}
+    investigated = [pr for pr in unique.values() if pr['merged']]
+    totals = {
+        'additions': sum(pr['additions'] for pr in investigated),
+        'deletions': sum(pr['deletions'] for pr in investigated),
+        'changed_files': sum(pr['changed_files'] for pr in investigated),
+        'commits': sum(pr['commits'] for pr in investigated),
+        'time': sum((_parse_timestamp(pr['merged_at']) - _parse_timestamp(pr['created_at'])).total_seconds()
+                    for pr in investigated),
+    }
+    totals['changes'] = totals['additions'] + totals['deletions']
+    return _metrics_row(repo, len(unique), len(investigated), totals)
+
+def _metrics_row(repo, total_prs, investigated_prs, totals):
+    row = {'owner/repo': repo, 'total_PRs': total_prs, 'investigated_PRs': investigated_prs}
+    for metric in ['additions', 'deletions', 'changes', 'changed_files', 'commits', 'time']:
+        row[f'total_{metric}'] = totals[metric]
+        row[f'average_{metric}'] = totals[metric] / investigated_prs if investigated_prs else 0
+    return row
+
+def save_pr_metrics_csv(rows, filename):
+    """Write the per-repo rows plus the 'Total' row in the layout of RQ4/rq4_raw.csv."""
+    totals = {metric: sum(row[f'total_{metric}'] for row in rows)
+              for metric in ['additions', 'deletions', 'changes', 'changed_files', 'commits', 'time']}
+    total_row = _metrics_row('Total', sum(row['total_PRs'] for row in rows),
+                             sum(row['investigated_PRs'] for row in rows), totals)
+
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=PR_METRICS_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+        writer.writerow(total_row)
@@ -0,0 +1,170 @@
+import argparse
+import json
+import logging
+import re
+import time
+import zlib
+from typing import List
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from preprocess_buggy_files import expand_paths, issue_key, iter_issues
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+TOKEN = re.compile(r'\w+')
+# Documents after each one in its bucket that it is paired with; buckets up to
+# this size + 1 are compared in full, larger ones (boilerplate issues) are capped.
+BUCKET_NEIGHBORS = 50
+
+def setup_logging(log_level):
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+def shingle_hashes(text: str, k: int = 3) -> np.ndarray:
+    """32-bit hashes of the word k-shingles of a text; texts shorter than k words form one shingle."""
+    tokens = np.array([zlib.crc32(token.encode()) for token in TOKEN.findall((text or '').lower())], dtype=np.uint64)
+    if len(tokens) == 0:
+        return tokens
+    if len(tokens) < k:
+        k = len(tokens)
+    # Fold each window of k token hashes into one value with a polynomial hash.
+    hashes = np.zeros(len(tokens) - k + 1, dtype=np.uint64)
+    for offset in range(k):
+        hashes = hashes * np.uint64(1000003) + tokens[offset:len(tokens) - k + 1 + offset]
+    return np.unique(hashes & MAX_HASH)
+
+class MinHasher:
+    """Computes MinHash signatures for many documents at once with universal hashing."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets: List[np.ndarray], chunk_shingles: int = 1 << 15) -> np.ndarray:
+        """(documents, num_perm) uint32 signatures; empty documents get all-max rows."""
+        signatures = np.full((len(shingle_sets), self.num_perm), MAX_HASH, dtype=np.uint64)
+        lengths = np.array([len(shingles) for shingles in shingle_sets], dtype=np.int64)
+        ends = np.cumsum(lengths)
+        start = 0
+        while start < len(shingle_sets):
+            # Take documents until about chunk_shingles shingles, so the permuted
+            # (num_perm, shingles) matrix stays bounded while one reduceat covers them all.
+            done = ends[start - 1] if start else 0
+            end = max(int(np.searchsorted(ends, done + chunk_shingles, side='right')), start + 1)
+            nonempty = start + np.flatnonzero(lengths[start:end])
+            if len(nonempty):
+                values = np.concatenate([shingle_sets[i] for i in nonempty])
+                # uint64 products wrap around, which keeps the hash family universal enough for MinHash.
+                permuted = ((self.a[:, None] * values[None, :] + self.b[:, None]) % MERSENNE_PRIME) & MAX_HASH
+                offsets = np.concatenate([[0], np.cumsum(lengths[nonempty])[:-1]])
+                signatures[nonempty] = np.minimum.reduceat(permuted, offsets, axis=1).T
+            start = end
+        return signatures.astype(np.uint32)
+
+def lsh_parameters(num_perm: int, threshold: float):
+    """Bands and rows per band whose S-curve threshold (1/b)^(1/r) is closest below the target."""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows == 0 and (1 / (num_perm // rows)) ** (1 / rows) <= threshold:
+            best = (num_perm // rows, rows)
+    return best
+
+def candidate_pairs(signatures: np.ndarray, bands: int, rows: int,
+                    neighbors: int = BUCKET_NEIGHBORS) -> np.ndarray:
+    """Pairs of documents sharing a bucket in at least one band, as an (n, 2) array.
+
+    Every pair within a bucket is a candidate, since each pair is verified on
+    its own and a failed middle pair must not hide the others. In buckets of
+    more than neighbors + 1 documents each one is only paired with the next
+    `neighbors` in bucket order, which bounds such a bucket to m * neighbors pairs.
+    """
+    pairs = []
+    multipliers = np.uint64(0x100000001B3) ** np.arange(rows, dtype=np.uint64)
+    for band in range(bands):
+        keys = (signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) * multipliers).sum(axis=1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        # Pair the documents `offset` apart in bucket order; once no bucket
+        # reaches that far, no larger offset can pair anything either.
+        for offset in range(1, min(neighbors, len(keys) - 1) + 1):
+            same = sorted_keys[offset:] == sorted_keys[:-offset]
+            if not same.any():
+                break
+            pairs.append(np.stack([order[:-offset][same], order[offset:][same]], axis=1))
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.intp)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+def duplicate_clusters(keys: List[str], shingle_sets: List[np.ndarray], threshold: float = 0.8,
+                       num_perm: int = 128, seed: int = 1) -> List[dict]:
+    """Clusters of near-duplicate documents whose estimated Jaccard similarity reaches the threshold."""
+    signatures = MinHasher(num_perm, seed).signatures(shingle_sets)
+    # Empty documents share one all-max signature; leave them out of the buckets.
+    nonempty = np.flatnonzero([len(shingles) > 0 for shingles in shingle_sets])
+    bands, rows = lsh_parameters(num_perm, threshold)
+    pairs = nonempty[candidate_pairs(signatures[nonempty], bands, rows)]
+
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    pairs, similarity = pairs[similarity >= threshold], similarity[similarity >= threshold]
+
+    n = len(keys)
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    _, component = connected_components(graph, directed=False)
+    sizes = np.bincount(component)
+
+    clusters = {}
+    for index in np.flatnonzero(sizes[component] > 1):
+        clusters.setdefault(component[index], []).append(index)
+    min_similarity = np.ones(len(sizes))
+    np.minimum.at(min_similarity, component[pairs[:, 0]], similarity)
+
+    # The first issue of each cluster in input order is kept as the canonical one.
+    return [{
+        'canonical': keys[members[0]],
+        'duplicates': [keys[member] for member in members[1:]],
+        'min_similarity': round(float(min_similarity[label]), 3),
+    } for label, members in sorted(clusters.items(), key=lambda item: item[1][0])]
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate issues across the mined dumps with MinHash and LSH.")
+    parser.add_argument("file_path", type=str, nargs="+", help="Issue dumps (JSON/JSONL, optionally gzipped), directories or glob patterns")
+    parser.add_argument("-o", "--output", type=str, default="duplicate_clusters.json", help="Clusters file (default: duplicate_clusters.json)")
+    parser.add_argument("-t", "--threshold", type=float, default=0.8, help="Minimum estimated Jaccard similarity (default: 0.8)")
+    parser.add_argument("-k", "--shingle-size", type=int, default=3, help="Words per shingle (default: 3)")
+    parser.add_argument("--num-perm", type=int, default=128, help="MinHash permutations (default: 128)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the hash functions (default: 1)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args()
+
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    start = time.perf_counter()
+    keys, shingle_sets = [], []
+    seen = set()
+    for path in expand_paths(args.file_path):
+        for issue in iter_issues(path):
+            key = issue_key(issue)
+            if key in seen:
+                continue
+            seen.add(key)
+            keys.append(key)
+            shingle_sets.append(shingle_hashes(f"{issue.get('title') or ''}\n{issue.get('body') or ''}", args.shingle_size))
+    logging.info(f"Shingled {len(keys)} issues in {time.perf_counter() - start:.2f}s")
+
+    clusters = duplicate_clusters(keys, shingle_sets, args.threshold, args.num_perm, args.seed)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(clusters, f, indent=2)
+
+    duplicates = sum(len(cluster['duplicates']) for cluster in clusters)
+    print(f"Found {len(clusters)} clusters with {duplicates} duplicate issues among {len(keys)} "
+          f"({time.perf_counter() - start:.2f}s); saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
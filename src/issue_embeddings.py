@@ -0,0 +1,380 @@
+"""Semantic vectors for the mined issues, for clustering and "more like this" queries.
+
+Titles and bodies are embedded with TF-IDF followed by a truncated SVD
+(latent semantic analysis), which needs nothing beyond numpy and scipy and
+runs on a laptop CPU. The store is a directory next to the mined files:
+
+    model.npz     vocabulary, IDF weights and SVD components
+    vectors.f32   one unit-length float32 row per issue, read through np.memmap
+    issues.json   issue key, content hash and title of each row
+    ivf.npz       inverted-file index: k-means centroids and the rows of each list
+
+`update` embeds only issues whose content hash is not in the store yet, in
+batches, and reuses every other row. A query scores the centroids, scans
+the rows of the closest lists (`--nprobe`) and ranks them exactly, so it
+touches a few thousand rows instead of all of them.
+
+    python issue_embeddings.py update ../reports/Github/
+    python issue_embeddings.py similar langchain-ai/langchain#1234
+    python issue_embeddings.py similar "agent loops forever calling the same tool"
+    python issue_embeddings.py cluster -k 40 -o issue_clusters.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+
+from issue_filters import compile_filter
+from preprocess_buggy_files import expand_paths, issue_key, iter_issues
+
+DEFAULT_STORE = Path('../reports/Github/issue_embeddings')
+DEFAULT_SOURCES = '../reports/Github/'
+
+TOKEN = re.compile(r'[a-z][a-z0-9_]{1,29}')
+
+def setup_logging(log_level):
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+def issue_text(issue) -> str:
+    # The title is repeated so that it weighs more than a single body sentence.
+    title = issue.get('title') or ''
+    return f"{title}\n{title}\n{issue.get('body') or ''}"
+
+def content_hash(issue) -> str:
+    return hashlib.sha1(issue_text(issue).encode('utf-8')).hexdigest()[:16]
+
+def tokenize(text: str):
+    return TOKEN.findall(text.lower())
+
+def randomized_svd(matrix, rank: int, oversample: int = 10, power_iterations: int = 3, seed: int = 1):
+    """Top right singular vectors of a sparse matrix, as a (rank, columns) array (Halko et al.)."""
+    rng = np.random.default_rng(seed)
+    sketch = matrix @ rng.standard_normal((matrix.shape[1], rank + oversample)).astype(np.float32)
+    basis, _ = np.linalg.qr(sketch)
+    for _ in range(power_iterations):
+        basis, _ = np.linalg.qr(matrix.T @ basis)
+        basis, _ = np.linalg.qr(matrix @ basis)
+    _, _, right = np.linalg.svd((matrix.T @ basis).T, full_matrices=False)
+    return right[:rank].astype(np.float32)
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+class TfidfSvdModel:
+    """Maps texts to unit-length dense vectors with TF-IDF weighting and an SVD projection."""
+
+    def __init__(self, vocabulary, idf, components, fitted_on: int = 0):
+        self.vocabulary = list(vocabulary)
+        self.index = {term: position for position, term in enumerate(self.vocabulary)}
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.fitted_on = fitted_on
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def model_id(self) -> str:
+        return hashlib.sha1(self.components.tobytes()).hexdigest()[:16]
+
+    @classmethod
+    def fit(cls, texts, dim: int = 128, min_df: int = 2, max_df: float = 0.5, max_terms: int = 50000,
+            seed: int = 1) -> 'TfidfSvdModel':
+        document_frequency = Counter()
+        for text in texts:
+            document_frequency.update(set(tokenize(text)))
+        limit = max_df * len(texts)
+        terms = [term for term, count in document_frequency.most_common()
+                 if min_df <= count <= limit][:max_terms]
+        idf = np.array([np.log((1 + len(texts)) / (1 + document_frequency[term])) + 1 for term in terms],
+                       dtype=np.float32)
+        rank = min(dim, len(texts) - 1, len(terms) - 1)
+        if rank < 1:
+            raise ValueError(f"Too few issues to fit an embedding model: {len(texts)} issues give {len(terms)} terms "
+                             f"in at least {min_df} and at most {max_df:.0%} of them")
+        model = cls(terms, idf, np.zeros((0, len(terms)), dtype=np.float32), fitted_on=len(texts))
+        model.components = randomized_svd(model.tfidf(texts), rank, seed=seed)
+        return model
+
+    def tfidf(self, texts) -> csr_matrix:
+        """Sublinear term frequency times IDF, with unit-length rows."""
+        rows, columns = [], []
+        for row, text in enumerate(texts):
+            positions = [self.index[token] for token in tokenize(text) if token in self.index]
+            rows.extend([row] * len(positions))
+            columns.extend(positions)
+        counts = csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, columns)),
+                            shape=(len(texts), len(self.vocabulary)))
+        counts.sum_duplicates()
+        counts.data = (1 + np.log(counts.data)) * self.idf[counts.indices]
+        norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+        return csr_matrix(counts.multiply(1 / np.maximum(norms, 1e-12)[:, None]))
+
+    def embed(self, texts, batch_size: int = 4096) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = self.tfidf(texts[start:start + batch_size])
+            vectors[start:start + batch_size] = normalize_rows(batch @ self.components.T)
+        return vectors
+
+    def top_terms(self, vector: np.ndarray, count: int = 8):
+        weights = vector @ self.components
+        return [self.vocabulary[position] for position in np.argsort(-weights)[:count]]
+
+    def save(self, path):
+        np.savez(path, vocabulary=np.array(self.vocabulary), idf=self.idf, components=self.components,
+                 fitted_on=self.fitted_on)
+
+    @classmethod
+    def load(cls, path) -> 'TfidfSvdModel':
+        with np.load(path) as data:
+            fitted_on = int(data['fitted_on']) if 'fitted_on' in data.files else 0
+            return cls(data['vocabulary'].tolist(), data['idf'], data['components'], fitted_on)
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 10, sample_size: int = None, seed: int = 1):
+    """Spherical k-means: unit-length centroids and the centroid of every row."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    sample = vectors
+    if sample_size and len(vectors) > sample_size:
+        sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    sample = np.asarray(sample, dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = assign(sample, centroids)
+        sums = coo_matrix((np.ones(len(sample), dtype=np.float32), (assignment, np.arange(len(sample)))),
+                          shape=(k, len(sample))) @ sample
+        empty = np.flatnonzero(np.bincount(assignment, minlength=k) == 0)
+        # Restart empty clusters from random rows instead of leaving them dead.
+        sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        centroids = normalize_rows(sums).astype(np.float32)
+    return centroids, assign(vectors, centroids)
+
+def assign(vectors, centroids, chunk_size: int = 8192) -> np.ndarray:
+    """Index of the most similar centroid of each row, computed in chunks."""
+    assignment = np.empty(len(vectors), dtype=np.intp)
+    for start in range(0, len(vectors), chunk_size):
+        assignment[start:start + chunk_size] = np.argmax(
+            np.asarray(vectors[start:start + chunk_size]) @ centroids.T, axis=1)
+    return assignment
+
+class IvfIndex:
+    """Inverted-file ANN index: rows grouped by their nearest k-means centroid."""
+
+    def __init__(self, centroids, offsets, rows):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+
+    @classmethod
+    def build(cls, vectors, lists: int = None, seed: int = 1) -> 'IvfIndex':
+        lists = lists or max(1, int(2 * np.sqrt(len(vectors))))
+        centroids, assignment = kmeans(vectors, lists, sample_size=64 * lists, seed=seed)
+        rows = np.argsort(assignment, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))])
+        return cls(centroids, offsets, rows)
+
+    def search(self, vectors, query: np.ndarray, limit: int = 10, nprobe: int = 16):
+        """(rows, similarities) of the best matches among the rows of the nprobe closest lists."""
+        nprobe = min(nprobe, len(self.centroids))
+        probed = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        candidates = np.sort(np.concatenate([self.rows[self.offsets[i]:self.offsets[i + 1]] for i in probed]))
+        scores = vectors[candidates] @ query
+        best = np.argsort(-scores)[:limit]
+        return candidates[best], scores[best]
+
+    def save(self, path):
+        np.savez(path, centroids=self.centroids, offsets=self.offsets, rows=self.rows)
+
+    @classmethod
+    def load(cls, path) -> 'IvfIndex':
+        with np.load(path) as data:
+            return cls(data['centroids'], data['offsets'], data['rows'])
+
+class EmbeddingStore:
+    """The model, vectors, row metadata and IVF index in one directory."""
+
+    def __init__(self, directory=DEFAULT_STORE):
+        self.directory = Path(directory)
+        self.model = None
+        self.keys, self.hashes, self.titles = [], [], []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.index = None
+        if (self.directory / 'issues.json').is_file():
+            self._load()
+
+    def _load(self):
+        self.model = TfidfSvdModel.load(self.directory / 'model.npz')
+        if not self.model.dim:
+            logging.warning(f"{self.directory} holds an empty model; it will be refitted")
+            self.model = None
+            return
+        with open(self.directory / 'issues.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['model'] != self.model.model_id:
+            logging.warning(f"{self.directory} was written by another model; it will be rebuilt")
+            return
+        self.keys, self.hashes, self.titles = meta['keys'], meta['hashes'], meta['titles']
+        if self.keys:
+            self.vectors = np.memmap(self.directory / 'vectors.f32', dtype=np.float32, mode='r',
+                                     shape=(len(self.keys), self.model.dim))
+            self.index = IvfIndex.load(self.directory / 'ivf.npz')
+
+    def update(self, issues, refit: bool = False, dim: int = 128, batch_size: int = 4096, seed: int = 1) -> dict:
+        """Store vectors for exactly these issues, embedding only those not stored with the same content."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        texts = [issue_text(issue) for issue in issues]
+        # A model fitted on a small corpus has fewer dims than asked for; it is
+        # refitted as soon as more issues are there.
+        undersized = self.model is not None and self.model.dim < dim and len(texts) > self.model.fitted_on
+        if self.model is None or refit or undersized:
+            start = time.perf_counter()
+            self.model = TfidfSvdModel.fit(texts, dim, seed=seed)
+            self.model.save(self.directory / 'model.npz')
+            self.keys, self.hashes = [], []
+            logging.info(f"Fitted {len(self.model.vocabulary)} terms x {self.model.dim} dims "
+                         f"on {len(texts)} issues in {time.perf_counter() - start:.2f}s")
+
+        stored = {content: row for row, content in enumerate(self.hashes)}
+        hashes = [content_hash(issue) for issue in issues]
+        missing = [position for position, content in enumerate(hashes) if content not in stored]
+        embedded = self.model.embed([texts[position] for position in missing], batch_size)
+
+        tmp_path = self.directory / 'vectors.f32.tmp'
+        vectors = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=(max(len(issues), 1), self.model.dim))
+        reused = np.array([position for position, content in enumerate(hashes) if content in stored], dtype=np.intp)
+        if len(reused):
+            vectors[reused] = self.vectors[[stored[hashes[position]] for position in reused]]
+        if missing:
+            vectors[missing] = embedded
+        vectors.flush()
+        del vectors
+        if hasattr(self.vectors, '_mmap'):
+            self.vectors._mmap.close()
+        os.replace(tmp_path, self.directory / 'vectors.f32')
+
+        self.keys = [issue_key(issue) for issue in issues]
+        self.hashes = hashes
+        self.titles = [issue.get('title') or '' for issue in issues]
+        self.vectors = np.memmap(self.directory / 'vectors.f32', dtype=np.float32, mode='r',
+                                 shape=(len(issues), self.model.dim)) if issues else np.zeros((0, self.model.dim))
+        if issues:
+            self.index = IvfIndex.build(self.vectors, seed=seed)
+            self.index.save(self.directory / 'ivf.npz')
+        meta = {'model': self.model.model_id, 'keys': self.keys, 'hashes': self.hashes, 'titles': self.titles}
+        tmp_meta = self.directory / 'issues.json.tmp'
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, self.directory / 'issues.json')
+        return {'issues': len(issues), 'embedded': len(missing), 'reused': len(reused)}
+
+    def similar(self, query: str, limit: int = 10, nprobe: int = 16):
+        """(key, title, similarity) of the issues closest to an issue key or a free-text query."""
+        rows = {key: row for row, key in enumerate(self.keys)}
+        if query in rows:
+            vector = np.asarray(self.vectors[rows[query]])
+        else:
+            vector = self.model.embed([query])[0]
+        # One extra result, since an issue key query finds the issue itself.
+        found, scores = self.index.search(self.vectors, vector, limit + 1, nprobe)
+        return [(self.keys[row], self.titles[row], float(score))
+                for row, score in zip(found, scores) if self.keys[row] != query][:limit]
+
+    def clusters(self, k: int = 50, seed: int = 1):
+        """k-means clusters of all stored issues, largest first, members ordered by closeness."""
+        centroids, assignment = kmeans(self.vectors, k, iterations=20, seed=seed)
+        clusters = []
+        for label in np.argsort(-np.bincount(assignment, minlength=len(centroids))):
+            members = np.flatnonzero(assignment == label)
+            if not len(members):
+                continue
+            closeness = np.asarray(self.vectors[members]) @ centroids[label]
+            members = members[np.argsort(-closeness)]
+            clusters.append({
+                'size': len(members),
+                'top_terms': self.model.top_terms(centroids[label]),
+                'issues': [self.keys[row] for row in members],
+            })
+        return clusters
+
+def load_issues(patterns, matches=None):
+    """Unique issues of the dumps, the first occurrence of a key winning."""
+    issues, seen = [], set()
+    for path in expand_paths(patterns):
+        for issue in iter_issues(path):
+            key = issue_key(issue)
+            if key not in seen and (matches is None or matches(issue)):
+                seen.add(key)
+                issues.append(issue)
+    return issues
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the mined issues and query or cluster them by meaning.")
+    parser.add_argument("--store", type=str, default=str(DEFAULT_STORE), help=f"Embedding store directory (default: {DEFAULT_STORE})")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = subparsers.add_parser("update", help="Embed new and changed issues and rebuild the ANN index")
+    update_parser.add_argument("paths", nargs="*", default=[DEFAULT_SOURCES], help="Issue dumps (JSON/JSONL, optionally gzipped), directories or glob patterns")
+    update_parser.add_argument("-f", "--filter", type=str, default=None, help="Only embed issues matching this filter expression (see issue_filters.py)")
+    update_parser.add_argument("--refit", action="store_true", help="Refit the TF-IDF/SVD model on the current issues and re-embed all of them")
+    update_parser.add_argument("--dim", type=int, default=128, help="Embedding dimensions when fitting (default: 128)")
+    update_parser.add_argument("--batch-size", type=int, default=4096, help="Issues embedded per batch (default: 4096)")
+
+    similar_parser = subparsers.add_parser("similar", help="Issues most similar to an issue (owner/name#number) or to a text")
+    similar_parser.add_argument("query", type=str)
+    similar_parser.add_argument("-n", "--limit", type=int, default=10, help="Maximum number of results (default: 10)")
+    similar_parser.add_argument("--nprobe", type=int, default=16, help="Inverted lists scanned per query; higher is slower and more exact (default: 16)")
+
+    cluster_parser = subparsers.add_parser("cluster", help="Group all stored issues with k-means")
+    cluster_parser.add_argument("-k", "--clusters", type=int, default=50, help="Number of clusters (default: 50)")
+    cluster_parser.add_argument("-o", "--output", type=str, default="issue_clusters.json", help="Clusters file (default: issue_clusters.json)")
+    args = parser.parse_args()
+
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    store = EmbeddingStore(args.store)
+    start = time.perf_counter()
+    if args.command == "update":
+        try:
+            matches = compile_filter(args.filter) if args.filter else None
+        except ValueError as e:
+            parser.error(str(e))
+        issues = load_issues(args.paths, matches)
+        try:
+            counts = store.update(issues, args.refit, args.dim, args.batch_size)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Stored {counts['issues']} issues: {counts['embedded']} embedded, {counts['reused']} reused "
+              f"({time.perf_counter() - start:.2f}s)")
+        return
+
+    if not store.keys:
+        parser.error(f"No embeddings in {args.store}; run the update command first")
+    if args.command == "similar":
+        for key, title, score in store.similar(args.query, args.limit, args.nprobe):
+            print(f"{key} ({score:.3f}): {title}")
+        print(f"({(time.perf_counter() - start) * 1000:.1f}ms)")
+    else:
+        clusters = store.clusters(args.clusters)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(clusters, f, indent=2)
+        for cluster in clusters:
+            print(f"{cluster['size']:6d}  {' '.join(cluster['top_terms'])}")
+        print(f"Saved {len(clusters)} clusters to {args.output} ({time.perf_counter() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Filter expressions for mined GitHub issues.
+
+An expression is a list of terms that must all hold. Clauses can be joined
+with OR. Quote values that contain spaces, and use single quotes around
+regexes so that backslashes are kept.
+
+    label:bug,crash           has one of these labels (case-insensitive, exact)
+    -label:question           has none of these labels
+    label~bug                 some label contains one of these substrings
+    -label~docs,"help wanted" no label contains any of these substrings
+    comments>=1               comment count compared with >=, >, <=, < or =
+    title:'/rate ?limit/i'    title matches the regex (i = ignore case)
+    -body:'/^test/'           body does not match the regex
+    text:'/openai/i'          title or body matches the regex
+
+Each expression is compiled once. Label terms become frozenset lookups and
+one precompiled regex per term. All negative substring terms of a clause are
+folded into a single alternation, so checking an issue costs a few set
+operations and regex searches no matter how many keywords there are.
+"""
+import re
+import shlex
+import operator
+from functools import lru_cache
+
+DEFAULT_FILTER = 'label~bug'
+
+# The keyword rules used to clean the bug-labeled issues for Table 3 of the
+# paper (see Tables Data/cleaned_issues.csv).
+STUDY_FILTER = 'label~bug -label~enhancement,improvement,docs,documentation,question,"help wanted"'
+
+PRESETS = {
+    'bug': DEFAULT_FILTER,
+    'study': STUDY_FILTER,
+}
+
+COMPARISONS = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '>': operator.gt,
+    '<': operator.lt,
+    '=': operator.eq,
+}
+
+TERM_PATTERN = re.compile(
+    r'^(?P<negate>-?)(?:'
+    r'label(?P<label_op>[:~])(?P<labels>.+)'
+    r'|comments(?P<comparison>>=|<=|>|<|=)(?P<count>\d+)'
+    r'|(?P<field>title|body|text):/(?P<regex>.*)/(?P<flags>i?)'
+    r')$',
+    re.DOTALL,
+)
+
+def normalize_label(label):
+    if isinstance(label, dict):
+        label = label.get('name', '')
+    return ' '.join(str(label).split()).lower()
+
+class Clause:
+    def __init__(self):
+        self.include_sets = []
+        self.exclude_set = set()
+        self.include_substrings = []
+        self.exclude_substrings = []
+        self.comment_checks = []
+        self.include_regexes = []
+        self.exclude_regexes = {'title': [], 'body': []}
+
+    def compile(self):
+        self.include_sets = [frozenset(labels) for labels in self.include_sets]
+        self.exclude_set = frozenset(self.exclude_set)
+        self.include_substrings = [_alternation(substrings) for substrings in self.include_substrings]
+        self.exclude_substrings = _alternation(self.exclude_substrings) if self.exclude_substrings else None
+        # Each pattern stays its own regex: folded into one alternation, global
+        # inline flags such as (?x) and numbered backreferences would break.
+        self.exclude_regexes = {field: regexes for field, regexes in self.exclude_regexes.items() if regexes}
+        return self
+
+    def matches(self, issue):
+        for check, count in self.comment_checks:
+            if not check(issue.get('num_comments', 0) or 0, count):
+                return False
+
+        labels = [normalize_label(label) for label in issue.get('labels', [])]
+        if self.include_sets or self.exclude_set:
+            label_set = set(labels)
+            if not self.exclude_set.isdisjoint(label_set):
+                return False
+            for include_set in self.include_sets:
+                if include_set.isdisjoint(label_set):
+                    return False
+        if self.include_substrings or self.exclude_substrings:
+            # Joined with newlines, which no substring contains, so a match
+            # can never span two labels.
+            joined = '\n'.join(labels)
+            if self.exclude_substrings and self.exclude_substrings.search(joined):
+                return False
+            for regex in self.include_substrings:
+                if not regex.search(joined):
+                    return False
+
+        fields = {'title': issue.get('title') or '', 'body': issue.get('body') or ''}
+        for field, regexes in self.exclude_regexes.items():
+            if any(regex.search(fields[field]) for regex in regexes):
+                return False
+        for field_names, regex in self.include_regexes:
+            if not any(regex.search(fields[field]) for field in field_names):
+                return False
+        return True
+
+def _alternation(substrings):
+    return re.compile('|'.join(re.escape(substring) for substring in substrings))
+
+class IssueFilter:
+    """A compiled filter expression; call it with an issue dict to test it."""
+
+    def __init__(self, expression, clauses):
+        self.expression = expression
+        self.clauses = clauses
+
+    def __call__(self, issue):
+        return any(clause.matches(issue) for clause in self.clauses)
+
+    def filter(self, issues):
+        return (issue for issue in issues if self(issue))
+
+    def __repr__(self):
+        return f"IssueFilter({self.expression!r})"
+
+def _parse_term(token, clause):
+    match = TERM_PATTERN.match(token)
+    if not match:
+        raise ValueError(f"Invalid filter term: {token!r}")
+    negate = bool(match.group('negate'))
+
+    if match.group('labels') is not None:
+        values = [normalize_label(value) for value in match.group('labels').split(',') if value.strip()]
+        if not values:
+            raise ValueError(f"Filter term has no labels: {token!r}")
+        if match.group('label_op') == ':':
+            if negate:
+                clause.exclude_set.update(values)
+            else:
+                clause.include_sets.append(values)
+        elif negate:
+            clause.exclude_substrings.extend(values)
+        else:
+            clause.include_substrings.append(values)
+    elif match.group('comparison'):
+        if negate:
+            raise ValueError(f"Comment comparisons cannot be negated: {token!r}")
+        clause.comment_checks.append((COMPARISONS[match.group('comparison')], int(match.group('count'))))
+    else:
+        field = match.group('field')
+        try:
+            regex = re.compile(match.group('regex'), re.IGNORECASE if match.group('flags') else 0)
+        except re.error as e:
+            raise ValueError(f"Invalid regex in filter term {token!r}: {e}")
+        field_names = ('title', 'body') if field == 'text' else (field,)
+        if negate:
+            for field_name in field_names:
+                clause.exclude_regexes[field_name].append(regex)
+        else:
+            clause.include_regexes.append((field_names, regex))
+
+@lru_cache(maxsize=None)
+def compile_filter(expression):
+    """Compile a filter expression, or the name of a preset, into an IssueFilter."""
+    expression = PRESETS.get(expression, expression)
+    clauses = [Clause()]
+    terms = [0]
+    for token in shlex.split(expression):
+        if token == 'OR':
+            clauses.append(Clause())
+            terms.append(0)
+        else:
+            _parse_term(token, clauses[-1])
+            terms[-1] += 1
+    if len(clauses) > 1 and not all(terms):
+        raise ValueError(f"Empty clause around OR in filter: {expression!r}")
+    return IssueFilter(expression, [clause.compile() for clause in clauses])
@@ -0,0 +1,302 @@
+"""Full-text index over the titles and bodies of the mined issues.
+
+The index is a SQLite database next to the mined files. `issues` holds one
+row per (repo, issue_number); two FTS5 tables are kept in sync with it by
+triggers: `issue_text` (porter-stemmed words, for ranked keyword and
+phrase queries) and `issue_trigrams` (for substring and regex prefilters).
+Each source file's size and mtime are recorded, so `update` only reads
+files that changed, and appended JSON Lines files only from where the last
+update stopped.
+
+    python issue_index.py update ../reports/Github/github_issues_*
+    python issue_index.py search 'timeout NEAR(retry)' --repo langchain-ai/langchain
+    python issue_index.py search '"rate limit"'
+    python issue_index.py search --regex 'openai\\.error\\.\\w+Error'
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from preprocess_buggy_files import is_jsonl, iter_issues, repo_of
+
+DEFAULT_DB = Path('../reports/Github/issue_index.sqlite')
+DEFAULT_SOURCES = '../reports/Github/github_issues_*'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    issue_number INTEGER NOT NULL,
+    title TEXT,
+    body TEXT,
+    labels TEXT,
+    num_comments INTEGER,
+    updated_at TEXT,
+    issue_url TEXT,
+    UNIQUE (repo, issue_number)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    offset INTEGER,
+    head TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS issue_text USING fts5(
+    title, body, content='issues', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS issue_trigrams USING fts5(
+    title, body, content='issues', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS issues_insert AFTER INSERT ON issues BEGIN
+    INSERT INTO issue_text(rowid, title, body) VALUES (new.id, new.title, new.body);
+    INSERT INTO issue_trigrams(rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS issues_delete AFTER DELETE ON issues BEGIN
+    INSERT INTO issue_text(issue_text, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    INSERT INTO issue_trigrams(issue_trigrams, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS issues_update AFTER UPDATE OF title, body ON issues BEGIN
+    INSERT INTO issue_text(issue_text, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    INSERT INTO issue_trigrams(issue_trigrams, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    INSERT INTO issue_text(rowid, title, body) VALUES (new.id, new.title, new.body);
+    INSERT INTO issue_trigrams(rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+"""
+
+UPSERT = """
+INSERT INTO issues (repo, issue_number, title, body, labels, num_comments, updated_at, issue_url)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (repo, issue_number) DO UPDATE SET
+    title = excluded.title, body = excluded.body, labels = excluded.labels,
+    num_comments = excluded.num_comments, updated_at = excluded.updated_at, issue_url = excluded.issue_url
+WHERE excluded.updated_at IS NOT issues.updated_at OR excluded.title IS NOT issues.title
+    OR excluded.body IS NOT issues.body
+"""
+
+# Title matches count ten times as much as body matches in the ranking.
+BM25_WEIGHTS = (10.0, 1.0)
+BATCH_SIZE = 1000
+HEAD_BYTES = 4096
+
+def connect(db_path=DEFAULT_DB) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(db_path))
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+def _row(issue):
+    return (repo_of(issue), issue['issue_number'], issue.get('title'), issue.get('body'),
+            json.dumps(issue.get('labels', [])), issue.get('num_comments'), issue.get('updated_at'),
+            issue.get('issue_url'))
+
+def _iter_appended(path, offset):
+    """Issues appended to a plain .jsonl file after byte offset; yields (issue, offset after its line)."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # still being written; picked up by the next update
+            offset += len(line)
+            if line.strip():
+                yield json.loads(line), offset
+
+def file_head(path, length) -> str:
+    """Digest of the first bytes of a file, to tell an appended file from a rewritten one."""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(min(length, HEAD_BYTES))).hexdigest()
+
+def _resume_offset(path, previous):
+    """Where to continue reading a plain .jsonl file, or None when the whole file must be read."""
+    if not is_jsonl(Path(path)) or str(path).endswith('.gz'):
+        return None
+    if previous and os.path.getsize(path) >= previous['offset'] and file_head(path, previous['offset']) == previous['head']:
+        return previous['offset']
+    return 0
+
+def update_index(connection: sqlite3.Connection, paths) -> dict:
+    """Index the issues of every changed source file; returns per-file counts of upserted issues."""
+    counts = {}
+    for path in map(str, paths):
+        stat = os.stat(path)
+        previous = connection.execute('SELECT size, mtime_ns, offset, head FROM sources WHERE path = ?', (path,)).fetchone()
+        previous = dict(zip(['size', 'mtime_ns', 'offset', 'head'], previous)) if previous else None
+        if previous and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+            continue
+
+        offset = _resume_offset(path, previous)
+        if offset is None:
+            offset = stat.st_size
+            issues = ((issue, offset) for issue in iter_issues(Path(path)))
+        else:
+            issues = _iter_appended(path, offset)
+
+        changed = 0
+        batch = []
+        with connection:
+            for issue, offset in issues:
+                batch.append(_row(issue))
+                if len(batch) >= BATCH_SIZE:
+                    changed += _flush(connection, batch)
+            changed += _flush(connection, batch)
+            connection.execute('INSERT OR REPLACE INTO sources (path, size, mtime_ns, offset, head) VALUES (?, ?, ?, ?, ?)',
+                               (path, stat.st_size, stat.st_mtime_ns, offset, file_head(path, offset)))
+        counts[path] = changed
+    return counts
+
+def _flush(connection, batch) -> int:
+    # rowcount leaves out the rows the triggers write to the FTS tables.
+    changed = connection.executemany(UPSERT, batch).rowcount
+    batch.clear()
+    return changed
+
+def _match_clause(table: str, repo):
+    sql = f"FROM {table} JOIN issues ON issues.id = {table}.rowid WHERE {table} MATCH ?"
+    return sql + (" AND issues.repo = ?" if repo else "")
+
+def search(connection, query: str, repo: str = None, limit: int = 20):
+    """Ranked FTS5 query (words, "phrases", prefix*, AND/OR/NOT, NEAR) over titles and bodies."""
+    sql = (f"SELECT issues.repo, issues.issue_number, issues.title, "
+           f"bm25(issue_text, {BM25_WEIGHTS[0]}, {BM25_WEIGHTS[1]}) AS score, "
+           f"snippet(issue_text, 1, '[', ']', '...', 12) "
+           f"{_match_clause('issue_text', repo)} ORDER BY score LIMIT ?")
+    return connection.execute(sql, [query] + ([repo] if repo else []) + [limit]).fetchall()
+
+QUANTIFIER_BRACES = re.compile(r'\{\d*(,\d*)?\}')
+
+def required_literals(pattern: str):
+    """Literal runs of at least three characters that every match of the regex must contain.
+
+    Returns None when the pattern has alternation, optional groups,
+    lookarounds, inline flags or other (?...) extensions, where no literal is
+    guaranteed and the trigram index cannot narrow the search. Anything else
+    that is not plainly literal only ends the current run, so the literals
+    never exclude a match.
+    """
+    if '|' in pattern or re.search(r'\)[?*{]', pattern) or re.search(r'\((?!\?:)\?', pattern):
+        return None
+    literals, current = [], ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            current = _end_run(literals, current)
+            if escaped and not escaped.isalnum():
+                current = escaped
+            i += 2
+            continue
+        if char == '[':
+            current = _end_run(literals, current)
+            i = _class_end(pattern, i)
+            continue
+        if char == '{':
+            # A counted quantifier makes the previous character optional ({0,n}),
+            # and its digits are not part of the text.
+            current = _end_run(literals, current[:-1])
+            quantifier = QUANTIFIER_BRACES.match(pattern, i)
+            i = quantifier.end() if quantifier else i + 1
+            continue
+        if pattern.startswith('(?:', i):
+            current = _end_run(literals, current)
+            i += 3
+            continue
+        if char in '*?':
+            current = _end_run(literals, current[:-1])
+        elif char in '.^$+()':
+            current = _end_run(literals, current)
+        else:
+            current += char
+        i += 1
+    _end_run(literals, current)
+    return literals
+
+def _class_end(pattern: str, start: int) -> int:
+    """Index just past the character class opened at `start`."""
+    i = start + 1
+    if pattern[i:i + 1] == '^':
+        i += 1
+    if pattern[i:i + 1] == ']':
+        # A ']' right after the opening bracket is a literal member.
+        i += 1
+    while i < len(pattern) and pattern[i] != ']':
+        i += 2 if pattern[i] == '\\' else 1
+    return i + 1
+
+def _end_run(literals, current) -> str:
+    if len(current) >= 3:
+        literals.append(current)
+    return ''
+
+def regex_search(connection, pattern: str, repo: str = None, limit: int = 20, ignore_case: bool = True):
+    """Issues whose title or body matches the regex, narrowed first by the trigram index when possible."""
+    regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    literals = required_literals(pattern)
+    if literals:
+        match = ' AND '.join('"' + literal.replace('"', '""') + '"' for literal in literals)
+        sql = f"SELECT issues.repo, issues.issue_number, issues.title, issues.body {_match_clause('issue_trigrams', repo)}"
+        rows = connection.execute(sql, [match] + ([repo] if repo else []))
+    else:
+        sql = "SELECT repo, issue_number, title, body FROM issues" + (" WHERE repo = ?" if repo else "")
+        rows = connection.execute(sql, [repo] if repo else [])
+
+    results = []
+    for repo_name, number, title, body in rows:
+        found = regex.search(title or '') or regex.search(body or '')
+        if found:
+            results.append((repo_name, number, title, found.group(0)))
+            if len(results) >= limit:
+                break
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query a full-text index over the mined GitHub issues.")
+    parser.add_argument("--db", type=str, default=str(DEFAULT_DB), help=f"Index database (default: {DEFAULT_DB})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = subparsers.add_parser("update", help="Add new and changed issues from mined issue files")
+    update_parser.add_argument("paths", nargs="*", default=[DEFAULT_SOURCES], help="Issue files or glob patterns (.json, .jsonl, .jsonl.gz)")
+
+    search_parser = subparsers.add_parser("search", help="Ranked keyword/phrase query, or a regex with --regex")
+    search_parser.add_argument("query", type=str)
+    search_parser.add_argument("--regex", action="store_true", help="Treat the query as a regular expression")
+    search_parser.add_argument("--case-sensitive", action="store_true", help="Case-sensitive regex matching")
+    search_parser.add_argument("--repo", type=str, default=None, help="Only search one owner/name repository")
+    search_parser.add_argument("-n", "--limit", type=int, default=20, help="Maximum number of results (default: 20)")
+    args = parser.parse_args()
+
+    connection = connect(args.db)
+    start = time.perf_counter()
+    if args.command == "update":
+        paths = sorted({path for pattern in args.paths for path in glob.glob(pattern)
+                        if not path.endswith(('.tmp', '.sqlite', '-wal', '-shm'))})
+        counts = update_index(connection, paths)
+        for path, changed in counts.items():
+            print(f"{path}: {changed} new or updated issues")
+        total = connection.execute('SELECT COUNT(*) FROM issues').fetchone()[0]
+        print(f"Indexed {total} issues; {len(paths) - len(counts)} of {len(paths)} files unchanged "
+              f"({time.perf_counter() - start:.2f}s)")
+        return
+
+    try:
+        if args.regex:
+            for repo, number, title, matched in regex_search(connection, args.query, args.repo, args.limit,
+                                                             not args.case_sensitive):
+                print(f"{repo}#{number}: {title}\n    {matched}")
+        else:
+            for repo, number, title, score, snippet in search(connection, args.query, args.repo, args.limit):
+                print(f"{repo}#{number} ({-score:.2f}): {title}\n    {' '.join(snippet.split())}")
+    except (sqlite3.OperationalError, re.error) as e:
+        parser.error(f"Invalid query: {e}")
+    print(f"({time.perf_counter() - start:.3f}s)")
+
+if __name__ == "__main__":
+    main()
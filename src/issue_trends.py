@@ -0,0 +1,222 @@
+import argparse
+import csv
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from labeled_dataset import DEFAULT_DATA_DIR, LabeledDataset, UNKNOWN_CODE, labeled_issue_paths, load_labeled_dataset
+from preprocess_buggy_files import expand_paths, issue_key, iter_issues, repo_of
+from taxonomy import CATEGORY_LABELS
+
+SURVIVAL_DAYS = [1, 7, 30, 90, 365]
+
+class IssueTimeline:
+    """Creation and close times of the mined issues as datetime64 columns, one row per issue.
+
+    `closed` is NaT for issues that are still open. Frameworks are the
+    repository names (e.g. langchain), which is how the labeled files name them.
+    """
+
+    def __init__(self, frameworks: List[str], framework: np.ndarray, issue_number: np.ndarray,
+                 created: np.ndarray, closed: np.ndarray):
+        self.frameworks = frameworks
+        self.framework = framework
+        self.issue_number = issue_number
+        self.created = created
+        self.closed = closed
+
+    def __len__(self):
+        return len(self.issue_number)
+
+    def resolution_days(self) -> np.ndarray:
+        """Days from creation to close, NaN for open issues."""
+        return (self.closed - self.created) / np.timedelta64(1, 'D')
+
+def parse_timestamps(values) -> np.ndarray:
+    # GitHub timestamps are UTC ('2024-01-02T03:04:05Z'); the U19 dtype cuts the Z
+    # off, and empty strings (open issues) become NaT.
+    return np.array([value or '' for value in values], dtype='U19').astype('datetime64[s]')
+
+def load_timeline(patterns) -> IssueTimeline:
+    """Timestamps of the issues in the dumps; a later copy of an issue replaces an earlier one."""
+    issues = {}
+    for path in expand_paths(patterns):
+        for issue in iter_issues(path):
+            if issue.get('created_at'):
+                issues[issue_key(issue)] = (repo_of(issue).split('/')[-1], issue['issue_number'],
+                                            issue['created_at'], issue.get('closed_at'))
+
+    frameworks = list(dict.fromkeys(name for name, _, _, _ in issues.values()))
+    positions = {name: i for i, name in enumerate(frameworks)}
+    names, numbers, created, closed = zip(*issues.values()) if issues else ((), (), (), ())
+    return IssueTimeline(
+        frameworks,
+        np.array([positions[name] for name in names], dtype=np.int8),
+        np.array(numbers, dtype=np.int64),
+        parse_timestamps(created),
+        parse_timestamps(closed),
+    )
+
+def join_labels(timeline: IssueTimeline, dataset: LabeledDataset):
+    """Mask of the labeled timeline rows and each category column aligned with the timeline."""
+    names = {name.lower(): i for i, name in enumerate(dataset.frameworks)}
+    framework = np.array([names.get(name.lower(), -1) for name in timeline.frameworks], dtype=np.int64)
+    framework = framework[timeline.framework.astype(np.intp)]
+    if not len(dataset):
+        return np.zeros(len(timeline), dtype=bool), {category: np.full(len(timeline), UNKNOWN_CODE)
+                                                     for category in dataset.columns}
+
+    # One int64 key per issue: framework in the high bits, issue number in the low ones.
+    labeled_keys = (dataset.framework.astype(np.int64) << 32) | dataset.issue_id.astype(np.int64)
+    timeline_keys = (framework << 32) | timeline.issue_number
+    order = np.argsort(labeled_keys)
+    rows = order[np.minimum(np.searchsorted(labeled_keys[order], timeline_keys), len(order) - 1)]
+    found = (framework >= 0) & (labeled_keys[rows] == timeline_keys)
+    return found, {category: np.where(found, column[rows], UNKNOWN_CODE) for category, column in dataset.columns.items()}
+
+def monthly_counts(created: np.ndarray, codes: np.ndarray, n_codes: int):
+    """First day of each month from the first to the last issue, and a months x codes count matrix."""
+    months = created.astype('datetime64[M]')
+    first = months.min()
+    offset = (months - first).astype(np.intp)
+    counts = np.bincount(offset * n_codes + codes, minlength=(offset.max() + 1) * n_codes)
+    return first + np.arange(offset.max() + 1), counts.reshape(-1, n_codes)
+
+def rolling_rates(counts: np.ndarray, window: int):
+    """Counts and shares of each code over the trailing `window` months, ending at every month."""
+    cumulative = np.vstack([np.zeros((1, counts.shape[1]), dtype=counts.dtype), np.cumsum(counts, axis=0)])
+    ends = np.arange(1, len(counts) + 1)
+    windowed = cumulative[ends] - cumulative[np.maximum(ends - window, 0)]
+    totals = windowed.sum(axis=1, keepdims=True)
+    return windowed, windowed / np.where(totals == 0, 1, totals)
+
+def resolution_summary(days: np.ndarray) -> Dict[str, float]:
+    closed = days[~np.isnan(days)]
+    if not len(closed):
+        return {'closed': 0, 'mean': np.nan, 'median': np.nan, 'p90': np.nan}
+    median, p90 = np.percentile(closed, [50, 90])
+    return {'closed': len(closed), 'mean': closed.mean(), 'median': median, 'p90': p90}
+
+def kaplan_meier(durations: np.ndarray, observed: np.ndarray):
+    """Distinct durations and the estimated probability of an issue staying open past each one.
+
+    Open issues are censored: they leave the risk set at their current age
+    without counting as a close.
+    """
+    order = np.argsort(durations, kind='stable')
+    durations, observed = durations[order], observed[order]
+    times, first = np.unique(durations, return_index=True)
+    events = np.add.reduceat(observed.astype(np.int64), first)
+    at_risk = len(durations) - first
+    return times, np.cumprod(1 - events / at_risk)
+
+def survival_at(times: np.ndarray, survival: np.ndarray, points) -> np.ndarray:
+    index = np.searchsorted(times, points, side='right') - 1
+    return np.where(index >= 0, survival[np.maximum(index, 0)], 1.0)
+
+def median_survival(times: np.ndarray, survival: np.ndarray) -> float:
+    below = np.flatnonzero(survival <= 0.5)
+    return float(times[below[0]]) if len(below) else np.nan
+
+def format_resolution_report(timeline: IssueTimeline) -> List[str]:
+    days = timeline.resolution_days()
+    output = ["Resolution time of closed issues (days):"]
+    for framework, name in enumerate(timeline.frameworks):
+        mask = timeline.framework == framework
+        summary = resolution_summary(days[mask])
+        output.append(f"   {name}: {summary['closed']} of {mask.sum()} closed, mean = {summary['mean']:.1f}, "
+                      f"median = {summary['median']:.1f}, p90 = {summary['p90']:.1f}")
+    return output
+
+def format_survival_report(timeline: IssueTimeline, as_of: np.datetime64) -> List[str]:
+    days = timeline.resolution_days()
+    observed = ~np.isnan(days)
+    durations = np.where(observed, days, (as_of - timeline.created) / np.timedelta64(1, 'D'))
+    output = [f"Probability of an issue still being open (Kaplan-Meier, open issues censored at {as_of}):"]
+    for framework, name in enumerate(timeline.frameworks):
+        mask = timeline.framework == framework
+        times, survival = kaplan_meier(durations[mask], observed[mask])
+        points = ', '.join(f"{day}d = {value:.3f}"
+                           for day, value in zip(SURVIVAL_DAYS, survival_at(times, survival, SURVIVAL_DAYS)))
+        output.append(f"   {name}: {points}; median time to close = {median_survival(times, survival):.1f} days")
+    return output
+
+def format_category_resolution_report(timeline: IssueTimeline, labeled: np.ndarray, codes: np.ndarray,
+                                      category: str) -> List[str]:
+    days = timeline.resolution_days()
+    output = [f"Resolution time by {category} (days, labeled issues of all frameworks):"]
+    for code, label in enumerate(CATEGORY_LABELS[category]):
+        summary = resolution_summary(days[labeled & (codes == code)])
+        if summary['closed']:
+            output.append(f"   {CATEGORY_LABELS[category][label]} ({label}): {summary['closed']} closed, "
+                          f"median = {summary['median']:.1f}, p90 = {summary['p90']:.1f}")
+    return output
+
+def rate_rows(timeline: IssueTimeline, labeled: np.ndarray, codes: np.ndarray, category: str, window: int):
+    """(framework, month, label, window count, rate) for every month with labeled issues in its window."""
+    labels = list(CATEGORY_LABELS[category]) + ["Unknown"]
+    codes = np.where(codes == UNKNOWN_CODE, len(labels) - 1, codes).astype(np.intp)
+    rows = []
+    for framework, name in enumerate(timeline.frameworks):
+        mask = labeled & (timeline.framework == framework)
+        if not mask.any():
+            continue
+        months, counts = monthly_counts(timeline.created[mask], codes[mask], len(labels))
+        windowed, rates = rolling_rates(counts, window)
+        for month, label in zip(*np.nonzero(windowed)):
+            rows.append((name, str(months[month]), labels[label], int(windowed[month, label]), float(rates[month, label])))
+    return rows
+
+def format_rate_report(rows, category: str, window: int) -> List[str]:
+    output = [f"Share of each {category} over the trailing {window} months (labeled issues):"]
+    current = None
+    for name, month, label, count, rate in rows:
+        if (name, month) != current:
+            if current and current[0] != name:
+                output.append("")
+            output.append(f"   {name} {month}:")
+            current = (name, month)
+        output[-1] += f" {label} {rate * 100:.1f}% ({count})"
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description="Trends over the creation and close times of the mined issues.")
+    parser.add_argument("file_path", type=str, nargs="+", help="Issue dumps (JSON/JSONL, optionally gzipped), directories or glob patterns")
+    parser.add_argument("--data-dir", type=str, default=str(DEFAULT_DATA_DIR), help="Directory with the labeled_issues_*.json files")
+    parser.add_argument("--category", type=str, default="bug_type", choices=list(CATEGORY_LABELS), help="Category for the rates and per-label resolution times (default: bug_type)")
+    parser.add_argument("-w", "--window", type=int, default=3, help="Rolling window in months (default: 3)")
+    parser.add_argument("--as-of", type=str, default=None, help="Time at which open issues are censored (default: the latest timestamp in the dumps)")
+    parser.add_argument("--rates-csv", type=str, default=None, help="Also write the rolling rates as CSV")
+    parser.add_argument("-o", "--output", type=str, default="issue_trends_results.txt", help="Output file (default: issue_trends_results.txt)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    timeline = load_timeline(args.file_path)
+    if not len(timeline):
+        parser.error("No issues with created_at timestamps; mine them again with the current collect_github_issues.py")
+    closed = timeline.closed[~np.isnat(timeline.closed)]
+    latest = max(timeline.created.max(), closed.max()) if len(closed) else timeline.created.max()
+    as_of = np.datetime64(args.as_of, 's') if args.as_of else latest
+
+    output = format_resolution_report(timeline) + [""] + format_survival_report(timeline, as_of)
+
+    paths = [path for path in labeled_issue_paths(args.data_dir).values() if path.is_file()]
+    if paths:
+        labeled, columns = join_labels(timeline, load_labeled_dataset(paths))
+        rows = rate_rows(timeline, labeled, columns[args.category], args.category, args.window)
+        output += [""] + format_category_resolution_report(timeline, labeled, columns[args.category], args.category)
+        output += [""] + format_rate_report(rows, args.category, args.window)
+        if args.rates_csv:
+            with open(args.rates_csv, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['framework', 'month', args.category, 'count', 'rate'])
+                writer.writerows(rows)
+
+    print("\n".join(output))
+    with open(args.output, "w") as f:
+        f.write("\n".join(output))
+    print(f"\nFinished in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
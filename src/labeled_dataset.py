@@ -0,0 +1,141 @@
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from taxonomy import CATEGORY_LABELS, LABEL_INDEX, UNKNOWN_LABELS, get_label
+
+FRAMEWORKS = ['langchain', 'OpenDevin', 'autogen', 'AutoGPT', 'gpt-engineer']
+CATEGORIES = list(CATEGORY_LABELS.keys())
+
+# The RQ scripts have always read '../../result/final/' from their own directory.
+DEFAULT_DATA_DIR = Path(__file__).resolve().parents[2] / 'result' / 'final'
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / '.cache'
+
+# Bump when the layout of the cached arrays changes.
+CACHE_VERSION = 2
+UNKNOWN_CODE = -1
+
+def labeled_issue_paths(data_dir=DEFAULT_DATA_DIR, frameworks=FRAMEWORKS) -> Dict[str, Path]:
+    return {framework: Path(data_dir) / f'labeled_issues_{framework}.json' for framework in frameworks}
+
+def framework_name(path) -> str:
+    return Path(path).stem.replace('labeled_issues_', '', 1)
+
+def labeled_issue_numbers(path) -> set:
+    with open(path, 'r') as f:
+        return {int(key) for key in json.load(f)}
+
+class LabeledDataset:
+    """The labeled issues as integer-coded columns, one row per issue.
+
+    Category columns hold the position of the label in its taxonomy dict
+    (e.g. 0 for A1), or UNKNOWN_CODE when the label did not resolve. Rows
+    keep the order of the source files and of the issues within them.
+    """
+
+    def __init__(self, frameworks: List[str], framework: np.ndarray, issue_id: np.ndarray,
+                 columns: Dict[str, np.ndarray]):
+        self.frameworks = frameworks
+        self.framework = framework
+        self.issue_id = issue_id
+        self.columns = columns
+        self.codes = {category: list(labels.keys()) for category, labels in CATEGORY_LABELS.items()}
+
+    def __len__(self):
+        return len(self.issue_id)
+
+    def label_of(self, category: str, code: int) -> str:
+        return self.codes[category][code] if code != UNKNOWN_CODE else "Unknown"
+
+    def select(self, framework: str) -> 'LabeledDataset':
+        mask = self.framework == self.frameworks.index(framework)
+        return LabeledDataset(self.frameworks, self.framework[mask], self.issue_id[mask],
+                              {category: column[mask] for category, column in self.columns.items()})
+
+    def counter(self, category: str) -> Counter:
+        """Count of each label, in order of first appearance like a Counter filled issue by issue."""
+        values, first, counts = np.unique(self.columns[category], return_index=True, return_counts=True)
+        return Counter({self.label_of(category, values[i]): int(counts[i]) for i in np.argsort(first)})
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _as_sources(paths) -> Dict[str, Path]:
+    # Either {framework: path} or a list of labeled_issues_<framework>.json paths.
+    if isinstance(paths, dict):
+        return {framework: Path(path) for framework, path in paths.items()}
+    return {framework_name(path): Path(path) for path in paths}
+
+def _cache_key(sources: Dict[str, Path]) -> str:
+    key = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    key.update(json.dumps(LABEL_INDEX, sort_keys=True).encode())
+    for framework, path in sources.items():
+        key.update(framework.encode())
+        key.update(file_digest(path).encode())
+    return key.hexdigest()[:20]
+
+def source_digest(paths) -> str:
+    """Fingerprint of the labeled issue files and the label index, without parsing them."""
+    return _cache_key(_as_sources(paths))
+
+def parse_labeled_issues(paths) -> LabeledDataset:
+    sources = _as_sources(paths)
+    framework, issue_id = [], []
+    columns = {category: [] for category in CATEGORIES}
+    positions = {category: {code: i for i, code in enumerate(labels)} for category, labels in CATEGORY_LABELS.items()}
+
+    for framework_code, path in enumerate(sources.values()):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        for key, issue in data.items():
+            framework.append(framework_code)
+            issue_id.append(key)
+            for category in CATEGORIES:
+                code = get_label(category, issue[category])
+                columns[category].append(positions[category].get(code, UNKNOWN_CODE))
+
+    return LabeledDataset(
+        list(sources),
+        np.array(framework, dtype=np.int8),
+        np.array(issue_id, dtype=str),
+        {category: np.array(values, dtype=np.int8) for category, values in columns.items()},
+    )
+
+def load_labeled_dataset(paths, cache_dir=DEFAULT_CACHE_DIR) -> LabeledDataset:
+    """Load the labeled issues, reusing the on-disk table while the source files are unchanged."""
+    sources = _as_sources(paths)
+    if cache_dir is None:
+        return parse_labeled_issues(sources)
+
+    cache_file = Path(cache_dir) / f"labeled_issues_{_cache_key(sources)}.npz"
+    if cache_file.is_file():
+        with np.load(cache_file) as cached:
+            # Replay the labels that did not resolve, as parsing would have counted them.
+            UNKNOWN_LABELS.update({(str(category), str(value)): int(count) for category, value, count in
+                                   zip(cached['unknown_category'], cached['unknown_value'], cached['unknown_count'])})
+            return LabeledDataset(
+                list(sources),
+                cached['framework'],
+                cached['issue_id'],
+                {category: cached[category] for category in CATEGORIES},
+            )
+
+    known = Counter(UNKNOWN_LABELS)
+    dataset = parse_labeled_issues(sources)
+    unknown = UNKNOWN_LABELS - known
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(cache_file.stem + '.tmp.npz')
+    np.savez_compressed(tmp_file, framework=dataset.framework, issue_id=dataset.issue_id,
+                        unknown_category=np.array([category for category, _ in unknown], dtype=str),
+                        unknown_value=np.array([value for _, value in unknown], dtype=str),
+                        unknown_count=np.array(list(unknown.values()), dtype=np.int64), **dataset.columns)
+    tmp_file.replace(cache_file)
+    return dataset
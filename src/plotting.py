@@ -0,0 +1,44 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+# The plotting stack takes longer to import than the text analyses take to run,
+# so the RQ scripts only load it through these helpers when a figure is drawn.
+
+@lru_cache(maxsize=None)
+def pyplot():
+    """matplotlib.pyplot, on the non-interactive Agg backend unless MPLBACKEND says otherwise."""
+    import matplotlib
+    if not os.environ.get('MPLBACKEND'):
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+@lru_cache(maxsize=None)
+def seaborn():
+    pyplot()
+    import seaborn as sns
+    return sns
+
+def colormap(name: str, n: int = None):
+    """A named colormap, resampled to n colors when given (matplotlib.cm.get_cmap is gone in 3.9)."""
+    pyplot()
+    from matplotlib import colormaps
+    cmap = colormaps[name]
+    return cmap.resampled(n) if n is not None else cmap
+
+# Publication figures are the PDFs that go into the paper; previews are small
+# PNGs that render in a fraction of the time while iterating on a layout.
+RENDER_MODES = {
+    'publication': {'format': 'pdf', 'dpi': 300},
+    'preview': {'format': 'png', 'dpi': 60},
+}
+
+def figure_path(output_dir, name: str, mode: str = 'publication') -> Path:
+    return Path(output_dir) / f"{name}.{RENDER_MODES[mode]['format']}"
+
+def save_figure(filename, mode: str = 'publication', **kwargs):
+    """Save and close the current figure in the given render mode."""
+    plt = pyplot()
+    plt.savefig(filename, format=RENDER_MODES[mode]['format'], dpi=RENDER_MODES[mode]['dpi'], **kwargs)
+    plt.close()
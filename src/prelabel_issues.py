@@ -0,0 +1,250 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from issue_filters import compile_filter
+from labeled_dataset import DEFAULT_CACHE_DIR, DEFAULT_DATA_DIR
+from preprocess_buggy_files import expand_paths, iter_issues, repo_of
+from request_scheduler import GitHubAPIError, RequestBudgetExhausted, RequestScheduler
+from taxonomy import CATEGORY_LABELS, get_label
+
+DEFAULT_API_URL = "https://api.openai.com/v1/chat/completions"
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_OUTPUT_DIR = DEFAULT_DATA_DIR.parent / 'prelabeled'
+
+# Bump when the prompt changes, so cached answers to the old prompt are not reused.
+PROMPT_VERSION = 1
+MAX_BODY_CHARS = 4000
+
+CATEGORY_NAMES = {
+    'bug_type': 'Bug Type',
+    'root_cause': 'Root Cause',
+    'symptoms': 'Symptom',
+    'development_cycle': 'Development Cycle',
+}
+
+def setup_logging(log_level):
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+def system_prompt() -> str:
+    lines = ["You label GitHub issues of LLM agent frameworks with the codes of a bug taxonomy.", ""]
+    for category, labels in CATEGORY_LABELS.items():
+        lines.append(f"{CATEGORY_NAMES[category]} ({category}):")
+        lines.extend(f"  {code}: {description}" for code, description in labels.items())
+    lines += [
+        "",
+        "For every issue you are given, pick exactly one code per category.",
+        "Answer with one JSON object that maps each issue id to "
+        '{"bug_type": code, "root_cause": code, "symptoms": code, "development_cycle": code} '
+        "and nothing else.",
+    ]
+    return "\n".join(lines)
+
+def user_prompt(issues) -> str:
+    parts = []
+    for issue in issues:
+        body = (issue.get('body') or '')[:MAX_BODY_CHARS]
+        parts.append(f"### Issue {issue['issue_number']}\nTitle: {issue.get('title') or ''}\n\n{body}")
+    return "\n\n".join(parts)
+
+def content_key(model: str, issue) -> str:
+    """Cache key of one issue's suggestion: the model, prompt, taxonomy and the issue text."""
+    digest = hashlib.sha256()
+    for part in [model, str(PROMPT_VERSION), system_prompt(), issue.get('title') or '', issue.get('body') or '']:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class ResponseCache:
+    """Suggested labels keyed by content_key, one JSON file per issue, shared by every run."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.hits = 0
+        self._memory = {}
+        self._lock = threading.Lock()
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self.hits += 1
+                return self._memory[key]
+        if self.cache_dir and self._path(key).is_file():
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                labels = json.load(f)
+            with self._lock:
+                self._memory[key] = labels
+                self.hits += 1
+            return labels
+        return None
+
+    def put(self, key, labels):
+        with self._lock:
+            self._memory[key] = labels
+        if self.cache_dir:
+            path = self._path(key)
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(path.name + f'.{threading.get_ident()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(labels, f)
+            os.replace(tmp_path, path)
+
+def parse_suggestion(answer) -> dict:
+    """Labels of one issue as taxonomy descriptions, the form the labeled_issues files use.
+
+    A category whose answer is not a taxonomy code or description is None;
+    "Unknown" would read as the real code D4 of development_cycle.
+    """
+    labels = {}
+    for category, descriptions in CATEGORY_LABELS.items():
+        value = str(answer.get(category, '')).strip() if isinstance(answer, dict) else ''
+        code = value.upper() if value.upper() in descriptions else get_label(category, value)
+        labels[category] = descriptions.get(code)
+    return labels
+
+def _json_object(text: str) -> dict:
+    # Some models wrap the object in a ```json fence despite the instructions.
+    start, end = text.find('{'), text.rfind('}')
+    return json.loads(text[start:end + 1]) if start != -1 and end > start else {}
+
+class PreLabeler:
+    """Sends batches of issues to an OpenAI-compatible chat completions endpoint."""
+
+    def __init__(self, api_url=DEFAULT_API_URL, model=DEFAULT_MODEL, api_key=None, cache_dir=None,
+                 max_workers=4, max_requests=None):
+        session = requests.Session()
+        session.mount('http://', HTTPAdapter(pool_maxsize=max_workers))
+        session.mount('https://', HTTPAdapter(pool_maxsize=max_workers))
+        if api_key:
+            session.headers['Authorization'] = f"Bearer {api_key}"
+        self.api_url = api_url
+        self.model = model
+        self.max_workers = max_workers
+        self.scheduler = RequestScheduler(session, max_requests=max_requests)
+        self.cache = ResponseCache(cache_dir)
+
+    def classify_batch(self, issues) -> dict:
+        """issue number -> labels for one batch; issues missing from the answer are left out."""
+        response = self.scheduler.post(self.api_url, {
+            'model': self.model,
+            'temperature': 0,
+            'response_format': {'type': 'json_object'},
+            'messages': [
+                {'role': 'system', 'content': system_prompt()},
+                {'role': 'user', 'content': user_prompt(issues)},
+            ],
+        })
+        answer = _json_object(response.json()['choices'][0]['message']['content'])
+        suggestions = {}
+        for issue in issues:
+            item = answer.get(str(issue['issue_number']))
+            if item is None:
+                continue
+            labels = parse_suggestion(item)
+            invalid = [category for category, label in labels.items() if label is None]
+            if invalid:
+                # Not cached, so the next run asks about this issue again.
+                logging.warning(f"Issue {issue['issue_number']}: no valid code for {', '.join(invalid)}")
+            else:
+                self.cache.put(content_key(self.model, issue), labels)
+            suggestions[issue['issue_number']] = labels
+        return suggestions
+
+    def prelabel(self, issues, batch_size=10) -> dict:
+        """issue number -> labels for the issues of one repository, asking only for uncached ones."""
+        suggestions = {}
+        pending = []
+        for issue in issues:
+            cached = self.cache.get(content_key(self.model, issue))
+            if cached is not None:
+                suggestions[issue['issue_number']] = cached
+            else:
+                pending.append(issue)
+
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.classify_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    suggestions.update(future.result())
+                except (GitHubAPIError, RequestBudgetExhausted, requests.RequestException, KeyError, ValueError) as e:
+                    numbers = ', '.join(str(issue['issue_number']) for issue in futures[future])
+                    logging.error(f"Batch with issues {numbers} failed: {e}")
+        missing = len(pending) - sum(1 for issue in pending if issue['issue_number'] in suggestions)
+        if missing:
+            logging.warning(f"{missing} issue(s) got no suggestion; run again to retry them")
+        return suggestions
+
+def save_suggestions(suggestions: dict, filename) -> list:
+    """Write suggestions in the schema of the labeled_issues_<framework>.json files.
+
+    Issues with an invalid code in any category are left out, since every
+    issue in those files needs all four labels; their numbers are returned.
+    """
+    incomplete = sorted(number for number, labels in suggestions.items() if None in labels.values())
+    ordered = {str(number): suggestions[number] for number in sorted(suggestions, reverse=True)
+               if number not in incomplete}
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(ordered, f, indent=4)
+    if incomplete:
+        logging.warning(f"Left out of {filename} for invalid codes: issues {', '.join(map(str, incomplete))}")
+    return incomplete
+
+def main():
+    parser = argparse.ArgumentParser(description="Suggest taxonomy labels for mined issues with an LLM, to speed up manual labeling.")
+    parser.add_argument("file_path", type=str, nargs="+", help="Issue dumps (JSON/JSONL, optionally gzipped), directories or glob patterns")
+    parser.add_argument("-o", "--output-dir", type=str, default=str(DEFAULT_OUTPUT_DIR), help="Directory for the labeled_issues_<framework>.json suggestions")
+    parser.add_argument("-f", "--filter", type=str, default=None, help="Only pre-label issues matching this filter expression (see issue_filters.py)")
+    parser.add_argument("--api-url", type=str, default=os.environ.get("PRELABEL_API_URL", DEFAULT_API_URL), help="OpenAI-compatible chat completions URL; point it at a local server to run offline")
+    parser.add_argument("--model", type=str, default=os.environ.get("PRELABEL_MODEL", DEFAULT_MODEL), help=f"Model name (default: {DEFAULT_MODEL})")
+    parser.add_argument("-b", "--batch-size", type=int, default=10, help="Issues per request (default: 10)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Concurrent requests (default: 4)")
+    parser.add_argument("--max-requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--cache-dir", type=str, default=str(DEFAULT_CACHE_DIR / 'prelabel'), help="Directory of the response cache")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args()
+
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    try:
+        matches = compile_filter(args.filter) if args.filter else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    issues_by_repo = defaultdict(dict)
+    for path in expand_paths(args.file_path):
+        for issue in iter_issues(path):
+            if matches is None or matches(issue):
+                issues_by_repo[repo_of(issue)][issue['issue_number']] = issue
+
+    labeler = PreLabeler(args.api_url, args.model, os.environ.get("OPENAI_API_KEY"), args.cache_dir,
+                         args.workers, args.max_requests)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for repo, issues in sorted(issues_by_repo.items()):
+        suggestions = labeler.prelabel(list(issues.values()), args.batch_size)
+        filename = output_dir / f"labeled_issues_{repo.split('/')[-1]}.json"
+        incomplete = save_suggestions(suggestions, filename)
+        print(f"{repo}: {len(suggestions) - len(incomplete)} of {len(issues)} issues pre-labeled, saved to {filename}")
+
+    print(f"{labeler.scheduler.request_count} requests, {labeler.cache.hits} issues answered from the cache")
+
+if __name__ == "__main__":
+    main()
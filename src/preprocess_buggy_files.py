@@ -1,7 +1,14 @@
 import json
+import gzip
+import glob
 import argparse
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from issue_filters import DEFAULT_FILTER, compile_filter
+
+JSON_SUFFIXES = ('.json', '.jsonl', '.jsonl.gz')
+CHUNK_SIZE = 1 << 20
 
 def setup_logging(log_level):
     logging.basicConfig(
@@ -10,42 +17,156 @@ def setup_logging(log_level):
         datefmt='%Y-%m-%d %H:%M:%S'
     )
 
-def analyze_github_issues(filepath, min_comments=0, copy=False):
+def is_jsonl(filepath):
+    return filepath.name.endswith(('.jsonl', '.jsonl.gz'))
+
+def open_issue_file(filepath, mode='r'):
+    if filepath.name.endswith('.gz'):
+        return gzip.open(filepath, mode + 't', encoding='utf-8')
+    return open(filepath, mode, encoding='utf-8')
+
+def iter_json_array(file):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise json.JSONDecodeError("Expected a JSON array", buffer, 0)
+    position = 1
+    while True:
+        # Skip whitespace and the separating comma, refilling the buffer as needed.
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer):
+                break
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, position)
+            buffer, position = chunk, 0
+
+        if buffer[position] == ']':
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError:
+                chunk = file.read(CHUNK_SIZE)
+                if not chunk:
+                    raise
+                buffer, position = buffer[position:] + chunk, 0
+        yield item
+        position = end
+
+def iter_issues(filepath):
+    with open_issue_file(filepath) as file:
+        if is_jsonl(filepath):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(file)
+
+def repo_of(issue):
+    # https://github.com/<owner>/<name>/issues/<number>
+    parts = issue.get('issue_url', '').split('/')
+    return '/'.join(parts[3:5]) if len(parts) > 4 else ''
+
+def issue_key(issue):
+    return f"{repo_of(issue)}#{issue['issue_number']}"
+
+def load_duplicate_map(filepath):
+    """duplicate issue key -> canonical issue key, from the clusters file written by issue_dedup.py."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        clusters = json.load(f)
+    return {duplicate: cluster['canonical'] for cluster in clusters for duplicate in cluster['duplicates']}
+
+def filtered_filepath(filepath):
+    if is_jsonl(filepath):
+        name = filepath.name.split('.jsonl')[0]
+        return filepath.with_name(name + '_filtered' + filepath.name[len(name):])
+    return filepath.with_name(filepath.stem + '_filtered.json')
+
+class FilteredIssueWriter:
+    """Writes the kept issues as they are found, as a JSON array or as JSON Lines."""
+
+    def __init__(self, filepath):
+        self.jsonl = is_jsonl(filepath)
+        self.file = open_issue_file(filepath, 'w')
+        self.count = 0
+        if not self.jsonl:
+            self.file.write('[')
+
+    def write(self, issue):
+        if self.jsonl:
+            self.file.write(json.dumps(issue, ensure_ascii=False) + '\n')
+        else:
+            separator = ',\n  ' if self.count else '\n  '
+            self.file.write(separator + json.dumps(issue, indent=2).replace('\n', '\n  '))
+        self.count += 1
+
+    def close(self):
+        if not self.jsonl:
+            self.file.write('\n]' if self.count else ']')
+        self.file.close()
+
+def analyze_github_issues(filepath, min_comments=0, copy=False, filter_expression=DEFAULT_FILTER,
+                          duplicate_map=None, collapse=False):
+    """Count (and optionally copy) the matching issues of one dump.
+
+    duplicate_map maps duplicate issue keys to their canonical issue (see
+    issue_dedup.py); duplicates are skipped, and with collapse the copied
+    canonical issues list their duplicates under 'duplicates'.
+    """
+    filepath = Path(filepath)
+    duplicate_map = duplicate_map or {}
+    duplicates_of = {}
+    if collapse:
+        for duplicate, canonical in duplicate_map.items():
+            duplicates_of.setdefault(canonical, []).append(duplicate)
+    writer = None
     try:
+        matches = compile_filter(filter_expression)
         logging.info(f"Reading file: {filepath}")
-        with open(filepath, 'r') as file:
-            data = json.load(file)
-        
-        logging.info(f"Found {len(data)} issues in the file")
-        
-        def has_bug_label(labels):
-            for label in labels:
-                if isinstance(label, str):
-                    if "bug" in label.lower():
-                        return True
-                elif isinstance(label, dict):
-                    if "bug" in label.get('name', '').lower():
-                        return True
-            return False
-        
-        bug_issues = [issue for issue in data 
-                      if has_bug_label(issue.get('labels', []))
-                      and issue.get('num_comments', 0) >= min_comments]
-        
-        bug_issue_count = len(bug_issues)
-        
-        logging.info(f"Counted {bug_issue_count} issues with 'bug' label and at least {min_comments} comment(s)")
-        
         if copy:
-            output_filepath = filepath.with_name(filepath.stem + '_filtered.json')
-            with open(output_filepath, 'w') as outfile:
-                json.dump(bug_issues, outfile, indent=2)
-            logging.info(f"Filtered issues saved to {output_filepath}")
-        
+            writer = FilteredIssueWriter(filtered_filepath(filepath))
+
+        # Issues are streamed from disk and filtered in a single pass, so only
+        # one issue is held in memory at a time.
+        total_issues = 0
+        bug_issue_count = 0
+        duplicate_count = 0
+        for issue in iter_issues(filepath):
+            total_issues += 1
+            if duplicate_map:
+                key = issue_key(issue)
+                if key in duplicate_map:
+                    duplicate_count += 1
+                    continue
+                if key in duplicates_of:
+                    issue = dict(issue, duplicates=duplicates_of[key])
+            if matches(issue) and issue.get('num_comments', 0) >= min_comments:
+                bug_issue_count += 1
+                if writer:
+                    writer.write(issue)
+
+        logging.info(f"Found {total_issues} issues in the file")
+        if duplicate_map:
+            logging.info(f"Skipped {duplicate_count} near-duplicate issues")
+        logging.info(f"Counted {bug_issue_count} issues matching '{matches.expression}' with at least {min_comments} comment(s)")
+
+        if writer:
+            writer.close()
+            writer = None
+            logging.info(f"Filtered issues saved to {filtered_filepath(filepath)}")
+
+        # Percentages are over the unique issues once duplicates are skipped.
+        unique_issues = total_issues - duplicate_count
         return {
-            'total_issues': len(data),
+            'total_issues': total_issues,
             'bug_issue_count': bug_issue_count,
-            'percentage': round((bug_issue_count / len(data)) * 100, 2) if data else 0
+            'duplicate_count': duplicate_count,
+            'percentage': round((bug_issue_count / unique_issues) * 100, 2) if unique_issues else 0
         }
     except FileNotFoundError:
         logging.error(f"The file {filepath} was not found.")
@@ -53,36 +174,129 @@ def analyze_github_issues(filepath, min_comments=0, copy=False):
     except json.JSONDecodeError:
         logging.error(f"The file {filepath} is not a valid JSON file.")
         return None
+    except ValueError as e:
+        logging.error(f"Invalid filter: {e}")
+        return None
     except Exception as e:
         logging.error(f"An unexpected error occurred: {str(e)}")
         return None
+    finally:
+        if writer:
+            writer.file.close()
+            filtered_filepath(filepath).unlink(missing_ok=True)
+
+def expand_paths(patterns):
+    """Resolve files, directories and glob patterns into the issue dumps to process."""
+    paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = sorted(path.iterdir())
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = sorted(Path(match) for match in glob.glob(pattern, recursive=True))
+        for candidate in candidates:
+            if (candidate.is_file() and candidate.name.endswith(JSON_SUFFIXES)
+                    and '_filtered' not in candidate.name):
+                paths.append(candidate)
+    return list(dict.fromkeys(paths))
+
+def analyze_batch(filepaths, min_comments=0, copy=False, jobs=None, filter_expression=DEFAULT_FILTER,
+                  duplicate_map=None, collapse=False):
+    """Analyze each dump in a process pool; returns per-file results and the aggregate."""
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(analyze_github_issues, filepaths,
+                                    [min_comments] * len(filepaths), [copy] * len(filepaths),
+                                    [filter_expression] * len(filepaths), [duplicate_map] * len(filepaths),
+                                    [collapse] * len(filepaths)))
+
+    succeeded = [result for result in results if result]
+    total_issues = sum(result['total_issues'] for result in succeeded)
+    bug_issue_count = sum(result['bug_issue_count'] for result in succeeded)
+    duplicate_count = sum(result['duplicate_count'] for result in succeeded)
+    unique_issues = total_issues - duplicate_count
+    aggregate = {
+        'total_issues': total_issues,
+        'bug_issue_count': bug_issue_count,
+        'duplicate_count': duplicate_count,
+        'percentage': round((bug_issue_count / unique_issues) * 100, 2) if unique_issues else 0
+    }
+    return dict(zip(filepaths, results)), aggregate
+
+def load_into_warehouse(db_path, filepaths, selection):
+    # Imported here: study_warehouse itself imports this module.
+    from study_warehouse import DEFAULT_DB, connect, load_issue_dumps
+    count = load_issue_dumps(connect(db_path or DEFAULT_DB), [filtered_filepath(path) for path in filepaths], selection)
+    print(f"Loaded {count} filtered issues into {db_path or DEFAULT_DB} as selection '{selection}'")
 
 def main():
-    parser = argparse.ArgumentParser(description="Filter GitHub issues from a JSON file.")
-    parser.add_argument("file_path", type=str, help="Path to the JSON file")
+    parser = argparse.ArgumentParser(description="Filter GitHub issues from JSON or JSONL files.")
+    parser.add_argument("file_path", type=str, nargs="+", help="Path to a JSON/JSONL file, a directory of them, or a glob pattern")
     parser.add_argument("-c", "--min_comments", type=int, default=0, help="Minimum number of comments for GitHub issues (default: 1)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
     parser.add_argument("--copy", action="store_true", help="Copy filtered results to a new JSON file")
+    parser.add_argument("-f", "--filter", type=str, default=DEFAULT_FILTER, help=f"Filter expression or preset name ('bug', 'study'); see issue_filters.py for the syntax (default: {DEFAULT_FILTER})")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of worker processes in batch mode (default: number of CPUs)")
+    parser.add_argument("--duplicates", type=str, default=None, help="Clusters file from issue_dedup.py; near-duplicate issues are skipped")
+    parser.add_argument("--collapse", action="store_true", help="With --duplicates and --copy, list each kept issue's duplicates in its 'duplicates' field")
+    parser.add_argument("--warehouse", type=str, nargs="?", const="", default=None, help="With --copy, load the kept issues into the study warehouse as a selection named after the filter; optionally give its database path")
     args = parser.parse_args()
+    if args.warehouse is not None and not args.copy:
+        parser.error("--warehouse loads the filtered copies and needs --copy")
 
     log_level = logging.DEBUG if args.verbose else logging.INFO
     setup_logging(log_level)
 
-    file_path = Path(args.file_path)
-    if not file_path.is_file():
-        logging.error(f"The specified file does not exist: {file_path}")
+    try:
+        compile_filter(args.filter)
+    except ValueError as e:
+        parser.error(str(e))
+    duplicate_map = load_duplicate_map(args.duplicates) if args.duplicates else None
+
+    if len(args.file_path) == 1 and not Path(args.file_path[0]).is_dir() and not glob.has_magic(args.file_path[0]):
+        file_path = Path(args.file_path[0])
+        if not file_path.is_file():
+            logging.error(f"The specified file does not exist: {file_path}")
+            return
+
+        result = analyze_github_issues(file_path, args.min_comments, args.copy, args.filter, duplicate_map, args.collapse)
+        if result:
+            print("\nGitHub issues analysis:")
+            print(f"Total issues: {result['total_issues']}")
+            if duplicate_map:
+                print(f"Near-duplicates skipped: {result['duplicate_count']}")
+            print(f"Matching issues with at least {args.min_comments} comment(s): {result['bug_issue_count']}")
+            print(f"Percentage: {result['percentage']}%")
+            if args.copy:
+                print(f"Filtered issues saved to {filtered_filepath(file_path).name}")
+            if args.warehouse is not None:
+                load_into_warehouse(args.warehouse, [file_path], args.filter)
+        else:
+            print("Failed to process GitHub issues. Check the logs for more information.")
         return
-    
-    result = analyze_github_issues(file_path, args.min_comments, args.copy)
-    if result:
-        print("\nGitHub issues analysis:")
-        print(f"Total issues: {result['total_issues']}")
-        print(f"Bug issues with at least {args.min_comments} comment(s): {result['bug_issue_count']}")
-        print(f"Percentage: {result['percentage']}%")
-        if args.copy:
-            print(f"Filtered issues saved to {file_path.stem}_filtered.json")
-    else:
-        print("Failed to process GitHub issues. Check the logs for more information.")
+
+    file_paths = expand_paths(args.file_path)
+    if not file_paths:
+        logging.error(f"No JSON or JSONL files found in: {', '.join(args.file_path)}")
+        return
+
+    results, aggregate = analyze_batch(file_paths, args.min_comments, args.copy, args.jobs, args.filter,
+                                       duplicate_map, args.collapse)
+    print("\nGitHub issues analysis:")
+    for file_path, result in results.items():
+        if result:
+            print(f"{file_path}: {result['bug_issue_count']} of {result['total_issues']} issues ({result['percentage']}%)")
+        else:
+            print(f"{file_path}: failed, check the logs for more information")
+    print(f"\nFiles processed: {sum(1 for result in results.values() if result)} of {len(results)}")
+    print(f"Total issues: {aggregate['total_issues']}")
+    if duplicate_map:
+        print(f"Near-duplicates skipped: {aggregate['duplicate_count']}")
+    print(f"Matching issues with at least {args.min_comments} comment(s): {aggregate['bug_issue_count']}")
+    print(f"Percentage: {aggregate['percentage']}%")
+    if args.warehouse is not None:
+        load_into_warehouse(args.warehouse, [path for path, result in results.items() if result], args.filter)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
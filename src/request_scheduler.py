@@ -0,0 +1,219 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+
+RETRY_STATUS_CODES = {403, 429, 500, 502, 503, 504}
+
+class GitHubAPIError(Exception):
+    def __init__(self, status_code, text):
+        super().__init__(f"API request failed: {status_code}, {text}")
+        self.status_code = status_code
+        self.text = text
+
+class RequestBudgetExhausted(Exception):
+    pass
+
+class SchedulerResponse:
+    """The parts of a response the miners use, whether it came from the wire or the ETag cache."""
+
+    def __init__(self, status_code, content, headers, from_cache=False):
+        self.status_code = status_code
+        self.content = content
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.from_cache = from_cache
+        links = requests.utils.parse_header_links(self.headers.get('Link', ''))
+        self.links = {link.get('rel') or link.get('url'): link for link in links}
+
+    def json(self):
+        return json.loads(self.content)
+
+def parse_retry_after(value):
+    """Seconds to wait for a Retry-After header, given as seconds or as an HTTP date; None if absent or invalid."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+class RequestScheduler:
+    """Sends GitHub API requests while respecting the rate limit.
+
+    Requests are paced against X-RateLimit-Remaining/Reset, retried with
+    backoff on rate-limit and server errors, and made conditional with the
+    ETag/Last-Modified of the previous response for the same URL. A 304
+    reply is served from the cache and does not count against the quota.
+    """
+
+    def __init__(self, session, max_retries=6, backoff_factor=2.0, reserve=10,
+                 pace_below=500, cache_dir=None, max_requests=None):
+        self.session = session
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.reserve = reserve
+        self.pace_below = pace_below
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_requests = max_requests
+        self.sleep = time.sleep
+        self.remaining = None
+        self.reset_at = None
+        self.request_count = 0
+        # Requests counted against max_requests; a 304 is refunded, as GitHub does not charge for it.
+        self.budget_used = 0
+        self.requests_by_path = Counter()
+        self.bytes_by_path = Counter()
+        self.cache_hits = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None):
+        return self.request('GET', url, params=params)
+
+    def post(self, url, json_body):
+        # POST bodies (GraphQL) are not cacheable; only pacing and retries apply.
+        return self.request('POST', url, json_body=json_body)
+
+    def request(self, method, url, params=None, json_body=None):
+        if params:
+            params = {key: value for key, value in params.items() if value is not None}
+        full_url = requests.Request(method, url, params=params).prepare().url
+        cached = self._load_cache(full_url) if method == 'GET' else None
+
+        path = urlparse(full_url).path
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_budget()
+            headers = {}
+            if cached:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+
+            try:
+                response = self.session.request(method, full_url, headers=headers, json=json_body)
+            except requests.RequestException as e:
+                # No response came back, so the reserved slot is given back.
+                with self._lock:
+                    self.budget_used -= 1
+                if not isinstance(e, requests.ConnectionError) or attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"Connection error on {full_url} ({e}), retrying in {delay:.1f}s")
+                self.sleep(delay)
+                continue
+
+            with self._lock:
+                self.request_count += 1
+                self.requests_by_path[path] += 1
+                self.bytes_by_path[path] += len(response.content)
+            self._update_budget(response)
+
+            if response.status_code == 304 and cached:
+                with self._lock:
+                    self.cache_hits += 1
+                    self.budget_used -= 1
+                return SchedulerResponse(200, cached['content'].encode('utf-8'), cached['headers'], from_cache=True)
+            if response.status_code == 200:
+                if method == 'GET':
+                    self._store_cache(full_url, response)
+                return SchedulerResponse(200, response.content, response.headers)
+
+            delay = self._retry_delay(response, attempt)
+            if delay is None or attempt == self.max_retries:
+                raise GitHubAPIError(response.status_code, response.text)
+            logging.warning(f"Got {response.status_code} for {full_url}, retrying in {delay:.1f}s")
+            self.sleep(delay)
+
+    def _backoff(self, attempt):
+        return self.backoff_factor * (2 ** attempt) + random.uniform(0, 1)
+
+    def _retry_delay(self, response, attempt):
+        if response.status_code not in RETRY_STATUS_CODES:
+            return None
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            return retry_after
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            reset = float(response.headers.get('X-RateLimit-Reset', time.time()))
+            return max(reset - time.time(), 0) + 1
+        if response.status_code == 403 and 'rate limit' not in response.text.lower():
+            # A plain 403 is a permission problem; retrying will not help.
+            return None
+        return self._backoff(attempt)
+
+    def _update_budget(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        with self._lock:
+            self.remaining = int(remaining)
+            self.reset_at = float(reset)
+
+    def _wait_for_budget(self):
+        # The lock is held while sleeping so that every worker thread waits
+        # on the same shared budget instead of racing past it. The request's
+        # slot is reserved in the same step, so concurrent workers cannot
+        # overshoot max_requests.
+        with self._lock:
+            if self.max_requests is not None and self.budget_used >= self.max_requests:
+                raise RequestBudgetExhausted(f"Request budget of {self.max_requests} requests is used up")
+            self.budget_used += 1
+            if self.remaining is None:
+                return
+            until_reset = max(self.reset_at - time.time(), 0)
+            if self.remaining <= self.reserve:
+                logging.info(f"Rate limit budget exhausted, sleeping {until_reset + 1:.0f}s until reset")
+                self.sleep(until_reset + 1)
+                self.remaining = None
+            elif self.remaining < self.pace_below:
+                self.sleep(until_reset / (self.remaining - self.reserve))
+
+    def _cache_path(self, url):
+        return self.cache_dir / (hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _load_cache(self, url):
+        with self._lock:
+            if url in self._cache:
+                return self._cache[url]
+        if self.cache_dir and self._cache_path(url).is_file():
+            with open(self._cache_path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return None
+
+    def _store_cache(self, url, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        entry = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'headers': {key: value for key, value in response.headers.items() if key.lower() in ('link', 'etag', 'last-modified')},
+            'content': response.content.decode('utf-8'),
+        }
+        if self.cache_dir:
+            with open(self._cache_path(url), 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+        else:
+            with self._lock:
+                self._cache[url] = entry
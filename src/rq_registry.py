@@ -0,0 +1,32 @@
+import inspect
+from typing import Callable, Dict, NamedTuple
+
+class Analysis(NamedTuple):
+    name: str
+    path: str
+    function: str
+    kind: str
+    outputs: tuple
+    needs_dataset: bool
+    inputs: tuple
+    params: dict
+
+ANALYSES: Dict[str, Analysis] = {}
+
+def register_analysis(name: str, kind: str = 'text', outputs: tuple = (), needs_dataset: bool = True,
+                      inputs: tuple = (), params: dict = None):
+    """Register an analysis step for run_analyses.py.
+
+    The decorated function is called as function(dataset, output_dir) and
+    must write its results into output_dir. kind is 'text' or 'figure',
+    outputs lists the files the step writes there, and needs_dataset=False
+    marks steps that do not read the labeled issues (dataset is then None).
+    inputs lists any other files the step reads, relative to its script, and
+    params are passed to it as keyword arguments; both are part of the
+    fingerprint build_cache uses to decide whether the outputs are stale.
+    """
+    def decorator(function: Callable) -> Callable:
+        ANALYSES[name] = Analysis(name, inspect.getfile(function), function.__name__, kind, tuple(outputs), needs_dataset,
+                                  tuple(inputs), dict(params or {}))
+        return function
+    return decorator
@@ -0,0 +1,206 @@
+import argparse
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import combinations
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import stats as scipy_stats
+
+from labeled_dataset import DEFAULT_DATA_DIR, LabeledDataset, UNKNOWN_CODE, labeled_issue_paths, load_labeled_dataset
+from contingency import contingency
+from taxonomy import CATEGORY_LABELS
+
+# Resamples drawn per seeded chunk; the unit of work handed to each worker.
+RESAMPLES_PER_CHUNK = 1000
+
+def category_codes(dataset: LabeledDataset, category: str) -> np.ndarray:
+    """The category column with UNKNOWN_CODE moved to the last slot, ready for bincount."""
+    column = dataset.columns[category]
+    return np.where(column == UNKNOWN_CODE, len(dataset.codes[category]), column).astype(np.intp)
+
+def framework_table(dataset: LabeledDataset, category: str) -> np.ndarray:
+    """Frameworks x labels count matrix for one category."""
+    size = len(dataset.codes[category]) + 1
+    flat = dataset.framework.astype(np.intp) * size + category_codes(dataset, category)
+    return np.bincount(flat, minlength=len(dataset.frameworks) * size).reshape(len(dataset.frameworks), size)
+
+def chi_square_statistic(observed: np.ndarray) -> np.ndarray:
+    """Pearson's chi-square over the last two axes, so a stack of tables is handled at once."""
+    observed = np.asarray(observed, dtype=float)
+    rows = observed.sum(axis=-1, keepdims=True)
+    columns = observed.sum(axis=-2, keepdims=True)
+    total = observed.sum(axis=(-2, -1), keepdims=True)
+    expected = rows * columns / np.where(total == 0, 1, total)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(expected > 0, (observed - expected) ** 2 / expected, 0.0)
+    return terms.sum(axis=(-2, -1))
+
+def chi_square_test(observed: np.ndarray) -> Dict[str, float]:
+    """Chi-square test of independence with Cramér's V; empty rows and columns are dropped."""
+    observed = np.asarray(observed)
+    observed = observed[observed.sum(axis=1) > 0][:, observed.sum(axis=0) > 0]
+    rows, columns = observed.shape
+    statistic = float(chi_square_statistic(observed))
+    dof = (rows - 1) * (columns - 1)
+    total = observed.sum()
+    smaller = min(rows, columns) - 1
+    return {
+        'chi2': statistic,
+        'dof': dof,
+        'p_value': float(scipy_stats.chi2.sf(statistic, dof)) if dof > 0 else 1.0,
+        'cramers_v': float(np.sqrt(statistic / (total * smaller))) if total and smaller > 0 else 0.0,
+    }
+
+def _bootstrap_chunk(counts: np.ndarray, n_resamples: int, seed) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    total = counts.sum()
+    # Resampling issues with replacement is a multinomial draw over the cells,
+    # so one call produces every replicate's counts at once.
+    return rng.multinomial(total, counts / total, size=n_resamples) / total * 100
+
+def _permutation_chunk(first: np.ndarray, second: np.ndarray, n_permutations: int, seed) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    pooled = np.concatenate([first, second])
+    size = int(pooled.max()) + 1
+    shuffled = rng.permuted(np.broadcast_to(pooled, (n_permutations, len(pooled))), axis=1)
+    # Count the labels that land in the first group for every permutation in one bincount.
+    offsets = np.arange(n_permutations)[:, None] * size
+    first_counts = np.bincount((shuffled[:, :len(first)] + offsets).ravel(),
+                               minlength=n_permutations * size).reshape(n_permutations, size)
+    second_counts = np.bincount(pooled, minlength=size) - first_counts
+    return chi_square_statistic(np.stack([first_counts, second_counts], axis=1))
+
+def _run_chunks(function, args, n_resamples: int, seed: int, executor: Optional[Executor] = None) -> np.ndarray:
+    """Run the resamples in fixed-size chunks, on the executor's workers when one is given.
+
+    Chunk i is always seeded from (seed, i), so the same seed gives the same
+    replicates whatever the number of workers.
+    """
+    starts = range(0, n_resamples, RESAMPLES_PER_CHUNK)
+    chunk_sizes = [min(RESAMPLES_PER_CHUNK, n_resamples - start) for start in starts]
+    seeds = [np.random.SeedSequence(seed, spawn_key=(index,)) for index in range(len(chunk_sizes))]
+    if executor is None:
+        results = [function(*args, size, chunk_seed) for size, chunk_seed in zip(chunk_sizes, seeds)]
+    else:
+        futures = [executor.submit(function, *args, size, chunk_seed) for size, chunk_seed in zip(chunk_sizes, seeds)]
+        results = [future.result() for future in futures]
+    return np.concatenate(results)
+
+def bootstrap_percentage_ci(counts, n_resamples: int = 10000, confidence: float = 0.95,
+                            seed: int = 0, executor: Optional[Executor] = None) -> np.ndarray:
+    """Percentile bootstrap interval for every cell's percentage; returns (cells, 2)."""
+    counts = np.asarray(counts, dtype=np.int64).ravel()
+    if counts.sum() == 0:
+        return np.zeros((len(counts), 2))
+    replicates = _run_chunks(_bootstrap_chunk, (counts,), n_resamples, seed, executor)
+    alpha = (1 - confidence) / 2 * 100
+    return np.percentile(replicates, [alpha, 100 - alpha], axis=0).T
+
+def permutation_test(first: np.ndarray, second: np.ndarray, n_permutations: int = 10000,
+                     seed: int = 0, executor: Optional[Executor] = None) -> Dict[str, float]:
+    """Permutation test of whether two groups' label distributions differ (chi-square statistic)."""
+    first = np.asarray(first, dtype=np.intp)
+    second = np.asarray(second, dtype=np.intp)
+    size = int(max(first.max(initial=0), second.max(initial=0))) + 1
+    observed = float(chi_square_statistic(np.stack([np.bincount(first, minlength=size),
+                                                    np.bincount(second, minlength=size)])))
+    permuted = _run_chunks(_permutation_chunk, (first, second), n_permutations, seed, executor)
+    return {
+        'chi2': observed,
+        'p_value': float((np.sum(permuted >= observed - 1e-9) + 1) / (n_permutations + 1)),
+    }
+
+def format_share_intervals(dataset: LabeledDataset, category: str, n_resamples: int,
+                           seed: int, executor: Optional[Executor]) -> List[str]:
+    labels = dataset.codes[category] + ["Unknown"]
+    descriptions = CATEGORY_LABELS[category]
+    counts = np.bincount(category_codes(dataset, category), minlength=len(labels))
+    if not counts.sum():
+        return []
+    percentages = counts / counts.sum() * 100
+    intervals = bootstrap_percentage_ci(counts, n_resamples, seed=seed, executor=executor)
+    output = [f"   Percentages with 95% bootstrap CI ({n_resamples} resamples):"]
+    for i in np.flatnonzero(counts):
+        name = descriptions.get(labels[i], "Unknown")
+        output.append(f"   {name} ({labels[i]}): {percentages[i]:.2f}% [{intervals[i, 0]:.2f}%, {intervals[i, 1]:.2f}%]")
+    return output
+
+def format_category_report(dataset: LabeledDataset, category: str, n_resamples: int,
+                           seed: int, executor: Optional[Executor]) -> List[str]:
+    output = [f"{category}:"] + format_share_intervals(dataset, category, n_resamples, seed, executor)
+
+    test = chi_square_test(framework_table(dataset, category))
+    output.append(f"   Across frameworks: chi2 = {test['chi2']:.2f}, dof = {test['dof']}, "
+                  f"p = {test['p_value']:.4g}, Cramér's V = {test['cramers_v']:.3f}")
+
+    output.append(f"   Pairwise permutation tests ({n_resamples} permutations):")
+    codes = category_codes(dataset, category)
+    for first, second in combinations(range(len(dataset.frameworks)), 2):
+        result = permutation_test(codes[dataset.framework == first], codes[dataset.framework == second],
+                                  n_resamples, seed=seed, executor=executor)
+        output.append(f"   {dataset.frameworks[first]} vs {dataset.frameworks[second]}: "
+                      f"chi2 = {result['chi2']:.2f}, p = {result['p_value']:.4f}")
+    return output
+
+def format_combination_report(dataset: LabeledDataset, dimensions: List[str], n_resamples: int,
+                              seed: int, executor: Optional[Executor], k: int = 5, prefix: str = "") -> List[str]:
+    table = contingency(dataset, dimensions)
+    intervals = bootstrap_percentage_ci(table.counts, n_resamples, seed=seed, executor=executor)
+    output = [f"{prefix}Top {k} {' + '.join(dimensions)} combinations with 95% bootstrap CI:"]
+    for cell_labels, count, percentage in table.top_k(k):
+        index = np.ravel_multi_index([table.labels[axis].index(label) for axis, label in enumerate(cell_labels)],
+                                     table.counts.shape)
+        output.append(f"   {' + '.join(cell_labels)}: {percentage:.2f}% [{intervals[index, 0]:.2f}%, {intervals[index, 1]:.2f}%]")
+    return output
+
+def format_framework_report(dataset: LabeledDataset, n_resamples: int, seed: int, executor: Optional[Executor]) -> List[str]:
+    """The RQ2 percentages, which are taken within each framework."""
+    output = []
+    for framework in dataset.frameworks:
+        subset = dataset.select(framework)
+        for category in ['bug_type', 'root_cause', 'symptoms']:
+            output.append(f"{framework} {category} ({len(subset)} issues):")
+            output.extend(format_share_intervals(subset, category, n_resamples, seed, executor))
+            output.append("")
+        output.extend(format_combination_report(subset, ['bug_type', 'root_cause'], n_resamples, seed, executor,
+                                                prefix=f"{framework}: "))
+        output.append("")
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description="Significance tests and confidence intervals for the RQ1-RQ3 percentages.")
+    parser.add_argument("--data-dir", type=str, default=str(DEFAULT_DATA_DIR), help="Directory with the labeled_issues_*.json files")
+    parser.add_argument("-n", "--resamples", type=int, default=10000, help="Bootstrap resamples and permutations (default: 10000)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Worker processes for resampling (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("-o", "--output", type=str, default="rq_statistics_results.txt", help="Output file (default: rq_statistics_results.txt)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = load_labeled_dataset(labeled_issue_paths(args.data_dir))
+
+    # One pool for the whole report; starting workers per test cost more than the resampling saved.
+    with ProcessPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else nullcontext() as executor:
+        output = ["RQ1: all frameworks", ""]
+        for category in ['bug_type', 'root_cause', 'symptoms']:
+            output.extend(format_category_report(dataset, category, args.resamples, args.seed, executor))
+            output.append("")
+        output.extend(format_combination_report(dataset, ['bug_type', 'root_cause'], args.resamples, args.seed, executor))
+
+        output.extend(["", "RQ2: per framework", ""])
+        output.extend(format_framework_report(dataset, args.resamples, args.seed, executor))
+
+        output.extend(["RQ3: development cycle", ""])
+        output.extend(format_category_report(dataset, 'development_cycle', args.resamples, args.seed, executor))
+        output.append("")
+        output.extend(format_combination_report(dataset, ['bug_type', 'development_cycle'], args.resamples, args.seed, executor))
+
+    print("\n".join(output))
+    with open(args.output, "w") as f:
+        f.write("\n".join(output))
+    print(f"\nFinished in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List
+
+from build_cache import BuildManifest, fingerprint
+from labeled_dataset import DEFAULT_DATA_DIR, labeled_issue_paths, load_labeled_dataset, source_digest
+from plotting import RENDER_MODES
+from rq_registry import ANALYSES, Analysis
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules loaded by path, per process; forked workers inherit the parent's.
+_modules = {}
+
+def load_module(path):
+    path = str(path)
+    if path not in _modules:
+        spec = importlib.util.spec_from_file_location(Path(path).stem, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[path] = module
+    return _modules[path]
+
+def discover_analyses(root=REPO_ROOT) -> Dict[str, Analysis]:
+    """Import every RQ*/rq*_analysis.py so their @register_analysis steps are recorded."""
+    for path in sorted(Path(root).glob('RQ*/rq*_analysis.py')):
+        try:
+            load_module(path.resolve())
+        except Exception as e:
+            # One broken script should not keep the other RQs from running.
+            print(f"Skipping {path.relative_to(root)}: {type(e).__name__}: {e}", file=sys.stderr)
+    return dict(ANALYSES)
+
+def select_analyses(analyses: Dict[str, Analysis], only: List[str], text_only: bool = False) -> List[Analysis]:
+    selected = [analysis for name, analysis in analyses.items()
+                if (not only or any(name.startswith(prefix) for prefix in only))
+                and (not text_only or analysis.kind == 'text')]
+    if not selected:
+        raise ValueError(f"No analysis matches {', '.join(only) or '--text-only'}; use --list to see the registered ones")
+    return selected
+
+def with_render_mode(analysis: Analysis, mode: str) -> Analysis:
+    """The same figure step rendered in another plotting.RENDER_MODES mode, tracked under its own name."""
+    if analysis.kind != 'figure' or 'mode' not in analysis.params or analysis.params['mode'] == mode:
+        return analysis
+    suffix = '.' + RENDER_MODES[mode]['format']
+    return analysis._replace(name=f"{analysis.name}:{mode}",
+                             outputs=tuple(str(Path(output).with_suffix(suffix)) for output in analysis.outputs),
+                             params={**analysis.params, 'mode': mode})
+
+def run_analysis(analysis: Analysis, dataset, output_dir: str):
+    """Run one step and return (name, captured stdout, seconds, error)."""
+    start = time.perf_counter()
+    captured = io.StringIO()
+    error = None
+    try:
+        with contextlib.redirect_stdout(captured):
+            function = getattr(load_module(analysis.path), analysis.function)
+            function(dataset if analysis.needs_dataset else None, output_dir, **analysis.params)
+    except Exception:
+        error = traceback.format_exc()
+    return analysis.name, captured.getvalue(), time.perf_counter() - start, error
+
+def run_analyses(analyses: List[Analysis], dataset, output_dir: str, jobs: int):
+    if jobs <= 1:
+        for analysis in analyses:
+            yield run_analysis(analysis, dataset, output_dir)
+        return
+    # Figures take far longer than the text results, so hand them to the workers first.
+    analyses = sorted(analyses, key=lambda analysis: analysis.kind != 'figure')
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_analysis, analysis, dataset, output_dir) for analysis in analyses]
+        for future in as_completed(futures):
+            yield future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the registered RQ analyses and figures against the labeled issues.")
+    parser.add_argument("--data-dir", type=str, default=str(DEFAULT_DATA_DIR), help="Directory with the labeled_issues_*.json files")
+    parser.add_argument("-o", "--output-dir", type=str, default="results", help="Directory for result files and figures (default: results)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes (default: number of CPUs)")
+    parser.add_argument("--only", nargs="+", default=[], help="Run only the analyses whose names start with these prefixes (e.g. rq1 rq4_figure)")
+    parser.add_argument("--text-only", action="store_true", help="Run only the text results; matplotlib is never imported")
+    parser.add_argument("--preview", action="store_true", help="Render figures as low-dpi PNG previews instead of the publication PDFs")
+    parser.add_argument("--force", action="store_true", help="Rebuild every output even if its fingerprint is unchanged")
+    parser.add_argument("--list", action="store_true", help="List the registered analyses and exit")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    analyses = discover_analyses()
+    discovered = time.perf_counter()
+
+    if args.list:
+        for analysis in analyses.values():
+            print(f"{analysis.name:<15} {analysis.kind:<7} {', '.join(analysis.outputs)}")
+        return
+
+    try:
+        selected = select_analyses(analyses, args.only, args.text_only)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.preview:
+        selected = [with_render_mode(analysis, 'preview') for analysis in selected]
+
+    paths = labeled_issue_paths(args.data_dir)
+    dataset_digest = source_digest(paths) if any(analysis.needs_dataset for analysis in selected) else None
+    manifest = BuildManifest(args.output_dir)
+    fingerprints = {analysis.name: fingerprint(analysis, load_module(analysis.path), dataset_digest)
+                    for analysis in selected}
+    stale = [analysis for analysis in selected
+             if args.force or not manifest.is_fresh(analysis, fingerprints[analysis.name])]
+    fingerprinted = time.perf_counter()
+
+    dataset = None
+    if any(analysis.needs_dataset for analysis in stale):
+        dataset = load_labeled_dataset(paths)
+    loaded = time.perf_counter()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    by_name = {analysis.name: analysis for analysis in stale}
+    timings = []
+    failed = []
+    if stale:
+        for name, output, elapsed, error in run_analyses(stale, dataset, args.output_dir, min(args.jobs, len(stale))):
+            timings.append((name, elapsed))
+            if output:
+                print(output, end="" if output.endswith("\n") else "\n")
+            if error:
+                failed.append(name)
+                manifest.forget(by_name[name])
+                print(f"{name} failed:\n{error}", file=sys.stderr)
+            else:
+                manifest.record(by_name[name], fingerprints[name])
+        manifest.save()
+
+    print("\nTimings:")
+    print(f"   {'discover analyses':<20} {discovered - start:8.2f}s")
+    print(f"   {'fingerprint outputs':<20} {fingerprinted - discovered:8.2f}s")
+    print(f"   {'load labeled issues':<20} {loaded - fingerprinted:8.2f}s")
+    for name, elapsed in sorted(timings):
+        print(f"   {name:<20} {elapsed:8.2f}s")
+    print(f"   {'total':<20} {time.perf_counter() - start:8.2f}s")
+    print(f"\nRebuilt {len(stale) - len(failed)} of {len(selected)} analyses in {args.output_dir}, "
+          f"{len(selected) - len(stale)} up to date, {len(failed)} failed")
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""One SQLite database with all the study data, queried with plain SQL.
+
+Normalized tables replace the scattered inputs:
+
+    repos                  one row per repository, with the framework_info.csv columns
+    issues, issue_labels   mined issues and their GitHub labels (from the issue dumps)
+    issue_selections       issues kept by a preprocess_buggy_files.py filter, by filter expression
+    taxonomy               the A/B/C/D codes and their descriptions
+    assignments            taxonomy code of each labeled issue per category; source is
+                           'manual' for labeled_issues_*.json and 'prelabel' for LLM suggestions
+    pr_metrics             the RQ4 pull request totals per repository (view rq4_metrics adds averages)
+    issue_counts           Tables Data/total_issues.csv
+    excluded_label_counts  the per-repository sections of Tables Data/cleaned_issues.csv
+
+The RQ tables are named queries (see QUERIES), for example
+
+    python study_warehouse.py load ../reports/Github/
+    python study_warehouse.py query label_shares -p category=root_cause -p framework=autogen
+    python study_warehouse.py query "SELECT label, COUNT(*) FROM issue_labels GROUP BY label" --csv
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from labeled_dataset import DEFAULT_DATA_DIR, framework_name
+from preprocess_buggy_files import expand_paths, iter_issues, repo_of
+from taxonomy import CATEGORY_LABELS, get_label
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DB = DEFAULT_DATA_DIR.parent / 'study_warehouse.sqlite'
+DEFAULT_TABLES_DIR = ROOT_DIR / 'Tables Data'
+DEFAULT_RQ4_CSV = ROOT_DIR / 'RQ4' / 'rq4_raw.csv'
+DEFAULT_PRELABELED_DIR = DEFAULT_DATA_DIR.parent / 'prelabeled'
+
+# The studied repositories, so that files naming only the framework resolve to owner/name.
+STUDY_REPOS = [
+    "gpt-engineer-org/gpt-engineer",
+    "langchain-ai/langchain",
+    "microsoft/autogen",
+    "OpenDevin/OpenDevin",
+    "Significant-Gravitas/AutoGPT",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    id INTEGER PRIMARY KEY,
+    full_name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    name TEXT NOT NULL COLLATE NOCASE,
+    stars INTEGER,
+    commits INTEGER,
+    lines_of_code INTEGER,
+    files INTEGER,
+    open_closed_issues INTEGER
+);
+CREATE INDEX IF NOT EXISTS repos_name ON repos (name);
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    repo_id INTEGER NOT NULL REFERENCES repos (id),
+    issue_number INTEGER NOT NULL,
+    title TEXT,
+    body TEXT,
+    num_comments INTEGER,
+    created_at TEXT,
+    updated_at TEXT,
+    closed_at TEXT,
+    issue_url TEXT,
+    UNIQUE (repo_id, issue_number)
+);
+CREATE TABLE IF NOT EXISTS issue_labels (
+    issue_id INTEGER NOT NULL REFERENCES issues (id),
+    label TEXT NOT NULL,
+    PRIMARY KEY (issue_id, label)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS issue_labels_label ON issue_labels (label, issue_id);
+CREATE TABLE IF NOT EXISTS issue_selections (
+    selection TEXT NOT NULL,
+    issue_id INTEGER NOT NULL REFERENCES issues (id),
+    PRIMARY KEY (selection, issue_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS taxonomy (
+    category TEXT NOT NULL,
+    code TEXT NOT NULL,
+    description TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (category, code)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS assignments (
+    source TEXT NOT NULL,
+    repo_id INTEGER NOT NULL REFERENCES repos (id),
+    issue_number INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    code TEXT NOT NULL,
+    PRIMARY KEY (source, repo_id, issue_number, category)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS assignments_category ON assignments (category, code, source);
+CREATE INDEX IF NOT EXISTS assignments_issue ON assignments (repo_id, issue_number);
+CREATE TABLE IF NOT EXISTS pr_metrics (
+    repo_id INTEGER PRIMARY KEY REFERENCES repos (id),
+    total_prs INTEGER,
+    investigated_prs INTEGER,
+    total_additions INTEGER,
+    total_deletions INTEGER,
+    total_changes INTEGER,
+    total_changed_files INTEGER,
+    total_commits INTEGER,
+    total_time REAL
+);
+CREATE TABLE IF NOT EXISTS issue_counts (
+    repo_id INTEGER NOT NULL REFERENCES repos (id),
+    filter TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (repo_id, filter)
+);
+CREATE TABLE IF NOT EXISTS excluded_label_counts (
+    repo_id INTEGER NOT NULL REFERENCES repos (id),
+    label TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    keywords TEXT,
+    PRIMARY KEY (repo_id, label)
+);
+CREATE VIEW IF NOT EXISTS rq4_metrics AS
+SELECT r.full_name AS "owner/repo", m.total_prs AS total_PRs, m.investigated_prs AS investigated_PRs,
+       m.total_additions, 1.0 * m.total_additions / m.investigated_prs AS average_additions,
+       m.total_deletions, 1.0 * m.total_deletions / m.investigated_prs AS average_deletions,
+       m.total_changes, 1.0 * m.total_changes / m.investigated_prs AS average_changes,
+       m.total_changed_files, 1.0 * m.total_changed_files / m.investigated_prs AS average_changed_files,
+       m.total_commits, 1.0 * m.total_commits / m.investigated_prs AS average_commits,
+       m.total_time, m.total_time / m.investigated_prs AS average_time
+FROM pr_metrics m JOIN repos r ON r.id = m.repo_id;
+"""
+
+UPSERT_ISSUE = """
+INSERT INTO issues (repo_id, issue_number, title, body, num_comments, created_at, updated_at, closed_at, issue_url)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (repo_id, issue_number) DO UPDATE SET
+    title = excluded.title, body = excluded.body, num_comments = excluded.num_comments,
+    created_at = excluded.created_at, updated_at = excluded.updated_at, closed_at = excluded.closed_at,
+    issue_url = excluded.issue_url
+"""
+ISSUE_ID = "(SELECT id FROM issues WHERE repo_id = ? AND issue_number = ?)"
+
+# The share of each code uses the labeled issues of the selected frameworks as denominator,
+# like the RQ scripts; codes that did not resolve are reported as 'Unknown'.
+LABEL_SHARES = """
+SELECT COALESCE(t.description, a.code) AS label, a.code,
+       COUNT(*) AS issues, ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (), 2) AS percentage
+FROM assignments a JOIN repos r ON r.id = a.repo_id
+LEFT JOIN taxonomy t ON t.category = a.category AND t.code = a.code
+WHERE a.category = :category AND a.source = :source AND (:framework IS NULL OR r.name = :framework)
+GROUP BY a.code ORDER BY issues DESC, MIN(t.position)
+"""
+FRAMEWORK_LABEL_COUNTS = """
+SELECT r.name AS framework, a.code, COUNT(*) AS issues,
+       ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (PARTITION BY r.id), 2) AS percentage
+FROM assignments a JOIN repos r ON r.id = a.repo_id
+WHERE a.category = :category AND a.source = :source
+GROUP BY r.id, a.code ORDER BY r.name, issues DESC
+"""
+TOP_COMBINATIONS = """
+SELECT COALESCE(t1.description, a1.code) || ' (' || a1.code || ') + '
+       || COALESCE(t2.description, a2.code) || ' (' || a2.code || ')' AS combination,
+       COUNT(*) AS issues, ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (), 2) AS percentage
+FROM assignments a1
+JOIN assignments a2 ON a2.source = a1.source AND a2.repo_id = a1.repo_id
+    AND a2.issue_number = a1.issue_number AND a2.category = :second
+JOIN repos r ON r.id = a1.repo_id
+LEFT JOIN taxonomy t1 ON t1.category = a1.category AND t1.code = a1.code
+LEFT JOIN taxonomy t2 ON t2.category = a2.category AND t2.code = a2.code
+WHERE a1.category = :first AND a1.source = :source AND (:framework IS NULL OR r.name = :framework)
+GROUP BY a1.code, a2.code ORDER BY issues DESC LIMIT :limit
+"""
+RQ4_TABLE = """
+SELECT * FROM rq4_metrics
+UNION ALL
+SELECT 'Total', SUM(total_PRs), SUM(investigated_PRs),
+       SUM(total_additions), 1.0 * SUM(total_additions) / SUM(investigated_PRs),
+       SUM(total_deletions), 1.0 * SUM(total_deletions) / SUM(investigated_PRs),
+       SUM(total_changes), 1.0 * SUM(total_changes) / SUM(investigated_PRs),
+       SUM(total_changed_files), 1.0 * SUM(total_changed_files) / SUM(investigated_PRs),
+       SUM(total_commits), 1.0 * SUM(total_commits) / SUM(investigated_PRs),
+       SUM(total_time), SUM(total_time) / SUM(investigated_PRs)
+FROM rq4_metrics
+"""
+
+# name -> (description, SQL, default parameters)
+QUERIES = {
+    'label_shares': ("Share of each code of a category (RQ1, RQ2 with framework, RQ3 with development_cycle)",
+                     LABEL_SHARES, {'category': 'bug_type', 'framework': None, 'source': 'manual'}),
+    'framework_label_counts': ("Count and share of each code of a category per framework",
+                               FRAMEWORK_LABEL_COUNTS, {'category': 'bug_type', 'source': 'manual'}),
+    'top_combinations': ("Most frequent code pairs of two categories",
+                         TOP_COMBINATIONS, {'first': 'bug_type', 'second': 'root_cause', 'framework': None,
+                                            'source': 'manual', 'limit': 5}),
+    'rq4_metrics': ("RQ4 pull request metrics with a Total row, like RQ4/rq4_raw.csv", RQ4_TABLE, {}),
+    'total_issues': ("Bug issues per repository (Tables Data/total_issues.csv)",
+                     "SELECT r.full_name AS repository, c.filter, c.count FROM issue_counts c "
+                     "JOIN repos r ON r.id = c.repo_id ORDER BY r.full_name", {}),
+    'framework_info': ("Size of each framework (Tables Data/framework_info.csv)",
+                       "SELECT name, stars, commits, lines_of_code, files, open_closed_issues FROM repos "
+                       "WHERE stars IS NOT NULL ORDER BY name", {}),
+    'github_labels': ("Mined issues per GitHub label and repository",
+                      "SELECT r.full_name AS repository, l.label, COUNT(*) AS issues FROM issue_labels l "
+                      "JOIN issues i ON i.id = l.issue_id JOIN repos r ON r.id = i.repo_id "
+                      "GROUP BY r.id, l.label ORDER BY issues DESC", {}),
+}
+
+BATCH_SIZE = 1000
+
+def connect(db_path=DEFAULT_DB) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(db_path))
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    with connection:
+        connection.executemany('INSERT OR REPLACE INTO taxonomy (category, code, description, position) VALUES (?, ?, ?, ?)',
+                               [(category, code, description, position)
+                                for category, labels in CATEGORY_LABELS.items()
+                                for position, (code, description) in enumerate(labels.items())])
+    return connection
+
+def repo_id(connection: sqlite3.Connection, repo: str) -> int:
+    """Id of a repository given as owner/name or as a framework name, added if it is new."""
+    if '/' not in repo:
+        row = connection.execute('SELECT id FROM repos WHERE name = ?', (repo,)).fetchone()
+        if row:
+            return row[0]
+        repo = next((full_name for full_name in STUDY_REPOS if full_name.split('/')[1].lower() == repo.lower()), repo)
+    connection.execute('INSERT OR IGNORE INTO repos (full_name, name) VALUES (?, ?)', (repo, repo.split('/')[-1]))
+    return connection.execute('SELECT id FROM repos WHERE full_name = ?', (repo,)).fetchone()[0]
+
+def load_issue_dumps(connection: sqlite3.Connection, paths, selection: str = None) -> int:
+    """Upsert the issues of the dump files and replace their labels; returns the number of issues read."""
+    repo_ids = {}
+    count = 0
+    with connection:
+        for path in map(Path, paths):
+            batch = []
+            for issue in iter_issues(path):
+                repo = repo_of(issue)
+                if repo not in repo_ids:
+                    repo_ids[repo] = repo_id(connection, repo)
+                batch.append((repo_ids[repo], issue))
+                if len(batch) >= BATCH_SIZE:
+                    count += _flush_issues(connection, batch, selection)
+            count += _flush_issues(connection, batch, selection)
+    return count
+
+def _flush_issues(connection, batch, selection) -> int:
+    keys = [(repo, issue['issue_number']) for repo, issue in batch]
+    connection.executemany(UPSERT_ISSUE, [
+        (repo, issue['issue_number'], issue.get('title'), issue.get('body'), issue.get('num_comments'),
+         issue.get('created_at'), issue.get('updated_at'), issue.get('closed_at'), issue.get('issue_url'))
+        for repo, issue in batch])
+    connection.executemany(f'DELETE FROM issue_labels WHERE issue_id = {ISSUE_ID}', keys)
+    connection.executemany('INSERT OR IGNORE INTO issue_labels (issue_id, label) SELECT id, ? FROM issues '
+                           'WHERE repo_id = ? AND issue_number = ?',
+                           [(label, repo, issue['issue_number']) for repo, issue in batch
+                            for label in issue.get('labels', [])])
+    if selection:
+        connection.executemany('INSERT OR IGNORE INTO issue_selections (selection, issue_id) '
+                               'SELECT ?, id FROM issues WHERE repo_id = ? AND issue_number = ?',
+                               [(selection, *key) for key in keys])
+    size = len(batch)
+    batch.clear()
+    return size
+
+def load_assignments(connection: sqlite3.Connection, paths, source: str = 'manual') -> int:
+    """Replace the taxonomy assignments of each labeled_issues_<framework>.json file."""
+    count = 0
+    with connection:
+        for path in paths:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            repo = repo_id(connection, framework_name(path))
+            connection.execute('DELETE FROM assignments WHERE source = ? AND repo_id = ?', (source, repo))
+            connection.executemany(
+                'INSERT OR REPLACE INTO assignments (source, repo_id, issue_number, category, code) VALUES (?, ?, ?, ?, ?)',
+                [(source, repo, int(number), category, get_label(category, issue[category]))
+                 for number, issue in data.items() for category in CATEGORY_LABELS if category in issue])
+            count += len(data)
+    return count
+
+def load_pr_metrics(connection: sqlite3.Connection, csv_path) -> int:
+    """Load the totals of an rq4_raw.csv; the averages and the Total row are derived by queries."""
+    with open(csv_path, 'r', newline='') as f:
+        rows = [row for row in csv.DictReader(f) if row['owner/repo'] != 'Total']
+    with connection:
+        connection.executemany('INSERT OR REPLACE INTO pr_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+            (repo_id(connection, row['owner/repo']), int(row['total_PRs']), int(row['investigated_PRs']),
+             int(row['total_additions']), int(row['total_deletions']), int(row['total_changes']),
+             int(row['total_changed_files']), int(row['total_commits']), float(row['total_time']))
+            for row in rows])
+    return len(rows)
+
+def cleaned_issue_sections(csv_path):
+    """(framework, label, count, keywords) rows of the per-repository sections of cleaned_issues.csv.
+
+    A section is a line holding only the framework name, a 'label,count,...'
+    header and one row per label; the columns to the right hold an unrelated
+    summary table and are ignored.
+    """
+    framework = None
+    with open(csv_path, 'r', newline='') as f:
+        for cells in csv.reader(f):
+            cells = cells + [''] * (3 - len(cells))
+            if cells[0] and not any(cells[1:3]):
+                framework = cells[0]
+            elif cells[0] and cells[0] != 'label' and framework and cells[1].isdigit():
+                yield framework, cells[0], int(cells[1]), cells[2]
+
+def load_tables_data(connection: sqlite3.Connection, tables_dir=DEFAULT_TABLES_DIR) -> int:
+    """Load framework_info.csv, total_issues.csv and cleaned_issues.csv; returns the rows loaded."""
+    tables_dir = Path(tables_dir)
+    count = 0
+    with connection:
+        with open(tables_dir / 'framework_info.csv', 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                connection.execute('UPDATE repos SET stars = ?, commits = ?, lines_of_code = ?, files = ?, '
+                                   'open_closed_issues = ? WHERE id = ?',
+                                   (int(row['Stars']), int(row['Commits']), int(row['Lines of Code']),
+                                    int(row['Number of Files']), int(row['Number of Open/Closed Issues']),
+                                    repo_id(connection, row['Project Name'])))
+                count += 1
+        with open(tables_dir / 'total_issues.csv', 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                if row['Repository']:
+                    connection.execute('INSERT OR REPLACE INTO issue_counts (repo_id, filter, count) VALUES (?, ?, ?)',
+                                       (repo_id(connection, row['Repository']), row['Filter'], int(row['Count'])))
+                    count += 1
+        for framework, label, label_count, keywords in cleaned_issue_sections(tables_dir / 'cleaned_issues.csv'):
+            connection.execute('INSERT OR REPLACE INTO excluded_label_counts (repo_id, label, count, keywords) '
+                               'VALUES (?, ?, ?, ?)', (repo_id(connection, framework), label, label_count, keywords))
+            count += 1
+    return count
+
+def run_query(connection: sqlite3.Connection, query: str, params: dict = None):
+    """Column names and rows of a named query from QUERIES or of any SQL statement."""
+    if query in QUERIES:
+        _, query, defaults = QUERIES[query]
+        params = dict(defaults, **(params or {}))
+    cursor = connection.execute(query, params or {})
+    columns = [description[0] for description in cursor.description or []]
+    return columns, cursor.fetchall()
+
+def _parse_param(text: str):
+    name, _, value = text.partition('=')
+    return name, int(value) if value.lstrip('-').isdigit() else value
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the study data into one SQLite database and query it with SQL.")
+    parser.add_argument("--db", type=str, default=str(DEFAULT_DB), help=f"Warehouse database (default: {DEFAULT_DB})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load_parser = subparsers.add_parser("load", help="Load the tables, labeled issues, RQ4 metrics and any issue dumps")
+    load_parser.add_argument("paths", nargs="*", help="Mined issue dumps (JSON/JSONL, optionally gzipped), directories or glob patterns")
+    load_parser.add_argument("--data-dir", type=str, default=str(DEFAULT_DATA_DIR), help="Directory with the labeled_issues_*.json files")
+    load_parser.add_argument("--prelabeled-dir", type=str, default=str(DEFAULT_PRELABELED_DIR), help="Directory with prelabel_issues.py suggestions (loaded as source 'prelabel')")
+    load_parser.add_argument("--tables-dir", type=str, default=str(DEFAULT_TABLES_DIR), help="Directory with the Tables Data CSV files")
+    load_parser.add_argument("--rq4-csv", type=str, default=str(DEFAULT_RQ4_CSV), help="RQ4 pull request metrics CSV")
+    load_parser.add_argument("--selection", type=str, default=None, help="Also record the loaded issues under this selection name")
+
+    query_parser = subparsers.add_parser("query", help="Run a named query or an SQL statement")
+    query_parser.add_argument("query", type=str, nargs="?", help="Name of a query (see --list) or SQL")
+    query_parser.add_argument("-p", "--param", action="append", default=[], help="Query parameter as name=value, e.g. -p category=symptoms")
+    query_parser.add_argument("--csv", action="store_true", help="Print the result as CSV")
+    query_parser.add_argument("--list", action="store_true", help="List the named queries and the table sizes")
+    args = parser.parse_args()
+
+    connection = connect(args.db)
+    start = time.perf_counter()
+    if args.command == "load":
+        for repo in STUDY_REPOS:
+            repo_id(connection, repo)
+        if Path(args.tables_dir).is_dir():
+            print(f"Tables Data: {load_tables_data(connection, args.tables_dir)} rows")
+        for source, directory in [('manual', args.data_dir), ('prelabel', args.prelabeled_dir)]:
+            paths = sorted(Path(directory).glob('labeled_issues_*.json'))
+            if paths:
+                print(f"{source} labels: {load_assignments(connection, paths, source)} issues from {directory}")
+        if Path(args.rq4_csv).is_file():
+            print(f"RQ4 metrics: {load_pr_metrics(connection, args.rq4_csv)} repositories")
+        if args.paths:
+            print(f"Issue dumps: {load_issue_dumps(connection, expand_paths(args.paths), args.selection)} issues")
+        print(f"Loaded into {args.db} ({time.perf_counter() - start:.2f}s)")
+        return
+
+    if args.list or not args.query:
+        for name, (description, _, defaults) in QUERIES.items():
+            options = ' '.join(f"-p {key}={value}" for key, value in defaults.items() if value is not None)
+            print(f"{name}: {description}" + (f" [{options}]" if options else ""))
+        print()
+        for (table,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"):
+            print(f"{table}: {connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]} rows")
+        return
+
+    try:
+        columns, rows = run_query(connection, args.query, dict(map(_parse_param, args.param)))
+    except sqlite3.Error as e:
+        parser.error(f"Query failed: {e}")
+    if args.csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(columns)
+        writer.writerows(rows)
+        return
+    widths = [max([len(str(column))] + [len(str(row[i])) for row in rows]) for i, column in enumerate(columns)]
+    print('  '.join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(str(value).ljust(width) for value, width in zip(row, widths)))
+    print(f"({len(rows)} rows, {(time.perf_counter() - start) * 1000:.1f}ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import difflib
+from collections import Counter, OrderedDict
+
+# Define label mappings
+BUG_TYPE_LABELS = OrderedDict([
+    ("A1", "tool integration issue"),
+    ("A2", "model integration issue"),
+    ("A3", "api compatibility and dependency issue"),
+    ("A4", "framework setup issue"),
+    ("A5", "data format problem"),
+    ("A6", "memory management issue"),
+    ("A7", "context window overflow"),
+    ("A8", "hallucination"),
+    ("A9", "other")
+])
+
+ROOT_CAUSE_LABELS = OrderedDict([
+    ("B1", "tool design and behavior mismatch"),
+    ("B2", "unsupported tool functionality"),
+    ("B3", "unhandled tool exception"),
+    ("B4", "model version incompatibility"),
+    ("B5", "unhandled model exception handling"),
+    ("B6", "api rate limit exceeded"),
+    ("B7", "wrong api implementation"),
+    ("B8", "improper api usage"),
+    ("B9", "misconfigured api keys or tokens"),
+    ("B10", "library dependency conflicts"),
+    ("B11", "dependency installation failure"),
+    ("B12", "incompatible execution environment"),
+    ("B13", "unhandled exceptions in asynchronous operations"),
+    ("B14", "network connectivity problems"),
+    ("B15", "unsupported data format"),
+    ("B16", "incorrect response parsing"),
+    ("B17", "other")
+])
+
+SYMPTOM_LABELS = OrderedDict([
+    ("C1", "crash"),
+    ("C2", "authentication failure"),
+    ("C3", "Wrong Output than expected"),
+    ("C4", "performance degradation")
+])
+
+DEVELOPMENT_CYCLE_LABELS = OrderedDict([
+    ("D1", "Preprocessing Stage"),
+    ("D2", "Agent Development and Integration Stage"),
+    ("D3", "Postprocessing Stage"),
+    ("D4", "Unknown")
+])
+
+CATEGORY_LABELS = {
+    'bug_type': BUG_TYPE_LABELS,
+    'root_cause': ROOT_CAUSE_LABELS,
+    'symptoms': SYMPTOM_LABELS,
+    'development_cycle': DEVELOPMENT_CYCLE_LABELS,
+}
+
+def normalize(value: str) -> str:
+    return ' '.join(str(value).split()).casefold()
+
+# Case-folded description -> code, built once so each lookup is a dict hit. The
+# spreadsheets capitalize the descriptions ('Tool Integration Issue'), so lookups
+# ignore case and repeated whitespace; other spellings only match with fuzzy=True.
+LABEL_INDEX = {
+    category: {normalize(description): code for code, description in labels.items()}
+    for category, labels in CATEGORY_LABELS.items()
+}
+
+UNKNOWN_LABELS = Counter()
+
+_fuzzy_matches = {}
+
+def _fuzzy_code(category: str, key: str) -> str:
+    if (category, key) not in _fuzzy_matches:
+        match = difflib.get_close_matches(key, LABEL_INDEX[category].keys(), n=1, cutoff=0.9)
+        _fuzzy_matches[(category, key)] = LABEL_INDEX[category][match[0]] if match else None
+    return _fuzzy_matches[(category, key)]
+
+def get_label(category: str, value: str, fuzzy: bool = False) -> str:
+    index = LABEL_INDEX.get(category)
+    if index is None:
+        return value
+    key = normalize(value)
+    code = index.get(key)
+    if code is None and fuzzy:
+        code = _fuzzy_code(category, key)
+    if code is None:
+        UNKNOWN_LABELS[(category, value)] += 1
+        return "Unknown"
+    return code
+
+def report_unknown_labels():
+    """Print every label that did not map to a code once, with how often it occurred."""
+    for (category, value), count in sorted(UNKNOWN_LABELS.items()):
+        print(f"Unknown {category} label {value!r}: {count} issue(s)")
+    UNKNOWN_LABELS.clear()
@@ -0,0 +1,168 @@
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from collect_github_issues import GitHubIssueMiner, labeled_pr_metrics
+from request_scheduler import GitHubAPIError
+
+REPO = 'microsoft/autogen'
+
+def pr_node(number, additions=10, merged=True, repo=REPO):
+    return {
+        'number': number,
+        'url': f"https://github.com/{repo}/pull/{number}",
+        'repository': {'nameWithOwner': repo},
+        'merged': merged,
+        'createdAt': '2024-01-01T00:00:00Z',
+        'mergedAt': '2024-01-01T01:00:00Z' if merged else None,
+        'additions': additions,
+        'deletions': 2,
+        'changedFiles': 1,
+        'commits': {'totalCount': 1},
+    }
+
+def issue_node(number, events=()):
+    return {
+        'number': number,
+        'url': f"https://github.com/{REPO}/issues/{number}",
+        'title': f"Issue {number}",
+        'body': 'Traceback',
+        'createdAt': '2023-12-01T00:00:00Z',
+        'updatedAt': '2024-01-02T00:00:00Z',
+        'closedAt': '2024-01-02T00:00:00Z',
+        'labels': {'nodes': [{'name': 'bug'}]},
+        'comments': {'totalCount': 3},
+        'timelineItems': {'nodes': list(events)},
+    }
+
+def page(nodes, cursor=None):
+    issues = {'pageInfo': {'hasNextPage': cursor is not None, 'endCursor': cursor}, 'nodes': nodes}
+    return {'data': {'repository': {'issues': issues}, 'rateLimit': {'cost': 1, 'remaining': 4999, 'resetAt': None}}}
+
+class StubGraphQLServer:
+    """A local /graphql endpoint that replays `replies`, a list of (status, headers, payload), in order."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                stub.requests.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                status, headers, payload = stub.replies.pop(0)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(replies):
+        servers.append(StubGraphQLServer(replies))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+def miner_for(server, sleeps):
+    miner = GitHubIssueMiner('test-token')
+    miner.base_url = server.base_url
+    miner.scheduler.sleep = sleeps.append
+    return miner
+
+def test_pages_are_followed_by_cursor(serve):
+    server = serve([
+        (200, {}, page([issue_node(1, [{'source': pr_node(10)}]), issue_node(2)], cursor='c1')),
+        (200, {}, page([issue_node(3, [{'closer': pr_node(11)}, {'source': pr_node(12, repo='other/repo')}])])),
+    ])
+    issues, pull_requests = miner_for(server, []).fetch_issues_graphql(REPO, 'closed', 'bug')
+
+    assert [request['variables']['cursor'] for request in server.requests] == [None, 'c1']
+    assert server.requests[0]['variables']['states'] == ['CLOSED']
+    assert server.requests[0]['variables']['labels'] == ['bug']
+    assert [issue['issue_number'] for issue in issues] == [1, 2, 3]
+    assert issues[0]['labels'] == ['bug'] and issues[0]['num_comments'] == 3
+    # The pull request of another repository is not linked.
+    assert [(pr['issue_number'], pr['pr_number']) for pr in pull_requests] == [(1, 10), (3, 11)]
+
+def test_rate_limited_page_is_retried(serve):
+    server = serve([
+        (200, {'X-RateLimit-Remaining': '4000', 'X-RateLimit-Reset': '9999999999'}, page([issue_node(1)], cursor='c1')),
+        (403, {'Retry-After': '7'}, {'message': 'You have exceeded a secondary rate limit'}),
+        (200, {}, page([issue_node(2)])),
+    ])
+    sleeps = []
+    miner = miner_for(server, sleeps)
+    issues, _ = miner.fetch_issues_graphql(REPO)
+
+    assert [issue['issue_number'] for issue in issues] == [1, 2]
+    assert [request['variables']['cursor'] for request in server.requests] == [None, 'c1', 'c1']
+    assert sleeps == [7.0]
+    assert miner.scheduler.remaining == 4000
+
+def test_graphql_errors_raise(serve):
+    server = serve([(200, {}, {'errors': [{'type': 'NOT_FOUND', 'message': "Could not resolve to a Repository"}]})])
+    with pytest.raises(GitHubAPIError, match='Could not resolve'):
+        miner_for(server, []).fetch_issues_graphql(REPO)
+
+def test_permission_error_is_not_retried(serve):
+    server = serve([(403, {}, {'message': 'Resource not accessible by integration'})])
+    sleeps = []
+    with pytest.raises(GitHubAPIError) as error:
+        miner_for(server, sleeps).fetch_issues_graphql(REPO)
+    assert error.value.status_code == 403
+    assert len(server.requests) == 1 and sleeps == []
+
+def test_server_errors_give_up_after_max_retries(serve):
+    server = serve([(502, {}, {'message': 'Bad Gateway'})] * 3)
+    sleeps = []
+    miner = miner_for(server, sleeps)
+    miner.scheduler.max_retries = 2
+    with pytest.raises(GitHubAPIError) as error:
+        miner.fetch_issues_graphql(REPO)
+    assert error.value.status_code == 502
+    assert len(server.requests) == 3 and len(sleeps) == 2
+
+def test_pr_metrics_cover_only_labeled_issues(tmp_path):
+    with open(tmp_path / 'labeled_issues_autogen.json', 'w') as f:
+        json.dump({'1': {}, '3': {}}, f)
+    pull_requests = [
+        {'issue_number': 1, 'pr_number': 10, 'merged': True, 'created_at': '2024-01-01T00:00:00Z',
+         'merged_at': '2024-01-01T01:00:00Z', 'additions': 10, 'deletions': 2, 'changed_files': 1, 'commits': 1},
+        {'issue_number': 2, 'pr_number': 11, 'merged': True, 'created_at': '2024-01-01T00:00:00Z',
+         'merged_at': '2024-01-01T01:00:00Z', 'additions': 99, 'deletions': 9, 'changed_files': 9, 'commits': 9},
+    ]
+    rows = labeled_pr_metrics({REPO: pull_requests, 'joaomdmoura/crewAI': pull_requests}, tmp_path)
+
+    # crewAI has no labeled issues and is left out, as in RQ4/rq4_raw.csv.
+    assert [row['owner/repo'] for row in rows] == [REPO]
+    assert rows[0]['investigated_PRs'] == 1
+    assert rows[0]['total_additions'] == 10
+    assert rows[0]['average_time'] == 3600
@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from issue_dedup import candidate_pairs
+
+def test_every_pair_of_a_bucket_is_a_candidate():
+    # Documents 0, 1 and 3 share the bucket of band 0. If 0~1 fails verification,
+    # 0~3 must still be checked on its own.
+    signatures = np.array([[1, 1, 5, 5], [1, 1, 6, 6], [2, 2, 7, 7], [1, 1, 8, 8]], dtype=np.uint32)
+    assert candidate_pairs(signatures, bands=2, rows=2).tolist() == [[0, 1], [0, 3], [1, 3]]
+
+def test_oversized_bucket_is_capped():
+    signatures = np.zeros((100, 2), dtype=np.uint32)
+    pairs = candidate_pairs(signatures, bands=1, rows=2, neighbors=3)
+    assert len(pairs) == 97 * 3 + 2 + 1
+    assert (pairs[:, 1] - pairs[:, 0]).max() == 3
@@ -0,0 +1,30 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from labeled_dataset import UNKNOWN_CODE, load_labeled_dataset
+from taxonomy import UNKNOWN_LABELS
+
+ISSUES = {
+    '1': {'bug_type': 'tool integration issue', 'root_cause': 'bogus cause',
+          'symptoms': 'crash', 'development_cycle': 'Unknown'},
+    '2': {'bug_type': 'tool integration issue', 'root_cause': 'network connectivity problems',
+          'symptoms': 'crash', 'development_cycle': 'Unknown'},
+}
+
+def test_cached_load_reports_the_same_unknown_labels(tmp_path):
+    path = tmp_path / 'labeled_issues_autogen.json'
+    with open(path, 'w') as f:
+        json.dump(ISSUES, f)
+
+    reports = []
+    for _ in range(2):
+        UNKNOWN_LABELS.clear()
+        dataset = load_labeled_dataset([path], cache_dir=tmp_path / 'cache')
+        reports.append(dict(UNKNOWN_LABELS))
+    UNKNOWN_LABELS.clear()
+
+    assert len(list((tmp_path / 'cache').glob('*.npz'))) == 1
+    assert reports == [{('root_cause', 'bogus cause'): 1}] * 2
+    assert dataset.columns['root_cause'][0] == UNKNOWN_CODE
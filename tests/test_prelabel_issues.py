@@ -0,0 +1,132 @@
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from labeled_dataset import parse_labeled_issues
+from prelabel_issues import PreLabeler, save_suggestions
+
+VALID_ANSWER = {'bug_type': 'A1', 'root_cause': 'B14', 'symptoms': 'crash', 'development_cycle': 'D2'}
+VALID_LABELS = {
+    'bug_type': 'tool integration issue',
+    'root_cause': 'network connectivity problems',
+    'symptoms': 'crash',
+    'development_cycle': 'Agent Development and Integration Stage',
+}
+
+class StubModelServer:
+    """A local chat completions endpoint; `answer` maps the asked issue numbers to the reply text."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.batches = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                numbers = [int(number) for number in re.findall(r'^### Issue (\d+)$', request['messages'][1]['content'], re.M)]
+                stub.batches.append(numbers)
+                body = json.dumps({'choices': [{'message': {'content': stub.answer(numbers)}}]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(answer):
+        servers.append(StubModelServer(answer))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+def make_issues(count):
+    return [{'issue_number': number, 'title': f"Tool call {number} times out", 'body': f"Traceback {number}"}
+            for number in range(1, count + 1)]
+
+def answer_all(numbers):
+    return json.dumps({str(number): VALID_ANSWER for number in numbers})
+
+def labeler(server, cache_dir, **kwargs):
+    return PreLabeler(api_url=server.url, model='stub', cache_dir=cache_dir, max_workers=2, **kwargs)
+
+def test_issues_are_sent_in_batches(serve, tmp_path):
+    server = serve(answer_all)
+    suggestions = labeler(server, tmp_path).prelabel(make_issues(5), batch_size=2)
+
+    assert sorted(len(batch) for batch in server.batches) == [1, 2, 2]
+    assert sorted(number for batch in server.batches for number in batch) == [1, 2, 3, 4, 5]
+    assert suggestions == {number: VALID_LABELS for number in range(1, 6)}
+
+def test_cached_rerun_makes_no_requests(serve, tmp_path):
+    first = serve(answer_all)
+    suggestions = labeler(first, tmp_path).prelabel(make_issues(3), batch_size=2)
+    assert len(first.batches) == 2
+
+    second = serve(answer_all)
+    rerun = labeler(second, tmp_path)
+    assert rerun.prelabel(make_issues(3), batch_size=2) == suggestions
+    assert second.batches == []
+    assert rerun.cache.hits == 3
+
+def test_issue_missing_from_answer_is_asked_again(serve, tmp_path):
+    first = serve(lambda numbers: json.dumps({str(number): VALID_ANSWER for number in numbers if number != 2}))
+    assert sorted(labeler(first, tmp_path).prelabel(make_issues(3), batch_size=3)) == [1, 3]
+
+    second = serve(answer_all)
+    assert sorted(labeler(second, tmp_path).prelabel(make_issues(3), batch_size=3)) == [1, 2, 3]
+    assert second.batches == [[2]]
+
+def test_fenced_answer_is_parsed(serve, tmp_path):
+    server = serve(lambda numbers: f"Here are the labels:\n```json\n{answer_all(numbers)}\n```")
+    assert labeler(server, tmp_path).prelabel(make_issues(2)) == {1: VALID_LABELS, 2: VALID_LABELS}
+
+def test_malformed_answer_fails_the_batch_without_caching(serve, tmp_path):
+    first = serve(lambda numbers: '{"1": {"bug_type": "A1",')
+    assert labeler(first, tmp_path).prelabel(make_issues(2)) == {}
+
+    second = serve(answer_all)
+    assert labeler(second, tmp_path).prelabel(make_issues(2)) == {1: VALID_LABELS, 2: VALID_LABELS}
+    assert second.batches == [[1, 2]]
+
+def test_invalid_code_is_marked_and_not_cached(serve, tmp_path):
+    first = serve(lambda numbers: json.dumps({str(number): dict(VALID_ANSWER, development_cycle='D9')
+                                              for number in numbers}))
+    suggestions = labeler(first, tmp_path).prelabel(make_issues(1))
+    # "Unknown" is the description of D4, so an invalid code must not turn into it.
+    assert suggestions == {1: dict(VALID_LABELS, development_cycle=None)}
+
+    # Left out of the file, whose issues must carry all four labels.
+    assert save_suggestions({**suggestions, 2: VALID_LABELS}, tmp_path / 'labeled_issues_stub.json') == [1]
+    with open(tmp_path / 'labeled_issues_stub.json') as f:
+        assert json.load(f) == {'2': VALID_LABELS}
+    assert parse_labeled_issues([tmp_path / 'labeled_issues_stub.json']).issue_id.tolist() == ['2']
+
+    second = serve(answer_all)
+    assert labeler(second, tmp_path).prelabel(make_issues(1)) == {1: VALID_LABELS}
+    assert second.batches == [[1]]